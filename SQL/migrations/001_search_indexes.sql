@@ -0,0 +1,37 @@
+-- Indexes for the search and booking hot paths in main.py.
+-- Applied by run.py after tables.sql.
+
+-- Active listings only: search_properties / renter_book_property always filter
+-- on Availability = 'Active'. Covering columns let the price-range search
+-- and the location join skip the heap for the filter columns.
+CREATE INDEX IF NOT EXISTS idx_property_active_price
+    ON property (Price, PropertyID)
+    INCLUDE (Type, ListingType, LocationID)
+    WHERE Availability = 'Active';
+
+CREATE INDEX IF NOT EXISTS idx_property_active_location
+    ON property (LocationID)
+    WHERE Availability = 'Active';
+
+-- City/State search filters; LocationID included for index-only scans.
+CREATE INDEX IF NOT EXISTS idx_locations_city_state
+    ON locations (City, State)
+    INCLUDE (LocationID);
+
+-- Subtype tables are joined/deleted on PropertyID.
+CREATE INDEX IF NOT EXISTS idx_house_property ON house (PropertyID) INCLUDE (NumRooms);
+CREATE INDEX IF NOT EXISTS idx_apartment_property ON apartment (PropertyID) INCLUDE (NumRooms);
+CREATE INDEX IF NOT EXISTS idx_commercialbuilding_property ON commercialBuilding (PropertyID);
+CREATE INDEX IF NOT EXISTS idx_land_property ON land (PropertyID);
+CREATE INDEX IF NOT EXISTS idx_vacationhome_property ON vacationHome (PropertyID);
+
+-- Renter booking / payment screens.
+CREATE INDEX IF NOT EXISTS idx_booking_renter ON booking (RenterID);
+CREATE INDEX IF NOT EXISTS idx_booking_card_end ON booking (CardID, EndDate);
+CREATE INDEX IF NOT EXISTS idx_card_renter ON card (RenterID);
+CREATE INDEX IF NOT EXISTS idx_card_address ON card (AddressID);
+
+-- Login / session lookups by UserID.
+CREATE INDEX IF NOT EXISTS idx_renter_user ON renter (UserID);
+CREATE INDEX IF NOT EXISTS idx_agent_user ON agent (UserID);
+CREATE INDEX IF NOT EXISTS idx_user_x_address_user ON user_x_address (UserID);
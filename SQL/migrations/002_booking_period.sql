@@ -0,0 +1,27 @@
+-- Booking periods as date ranges, with overlaps rejected by the database.
+-- Applied by run.py after tables.sql.
+
+-- btree_gist lets the GiST exclusion constraint compare PropertyID with =.
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+
+-- Inclusive on both ends, matching the old overlap check in main.py
+-- (NOT (EndDate < start OR StartDate > end)): a stay ending on a day blocks
+-- another stay starting that same day.
+ALTER TABLE booking
+    ADD COLUMN IF NOT EXISTS Period daterange
+    GENERATED ALWAYS AS (daterange(StartDate, EndDate, '[]')) STORED;
+
+-- renter_book_property inserts directly and maps exclusion_violation to
+-- "Property already booked for that period."; concurrent bookers of the same
+-- property serialize on the constraint's GiST index instead of racing.
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint WHERE conname = 'booking_no_overlap'
+    ) THEN
+        ALTER TABLE booking
+            ADD CONSTRAINT booking_no_overlap
+            EXCLUDE USING gist (PropertyID WITH =, Period WITH &&);
+    END IF;
+END
+$$;
@@ -0,0 +1,96 @@
+-- NOTIFY listing_changes whenever data shown in property listings changes, so
+-- every main.py process can evict its cached listing pages (listing_events.py).
+-- Applied by run.py after tables.sql.
+--
+-- Triggers are per statement with transition tables, so a bulk COPY sends one
+-- notification instead of one per row. Payload (JSON):
+--   {"table": "house", "op": "UPDATE", "ids": ["<PropertyID>", ...]}
+-- ids holds the distinct key values named by the trigger argument, or null when
+-- there are more than 100 of them (or on TRUNCATE): "assume everything changed".
+
+SET client_min_messages = warning;  -- quiet "trigger does not exist" on first run
+
+CREATE OR REPLACE FUNCTION notify_listing_change() RETURNS trigger AS $$
+DECLARE
+    id_column text := TG_ARGV[0];
+    ids text[];
+    changed bigint;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I::text), count(*) FROM new_rows', id_column)
+            INTO ids, changed;
+    ELSIF TG_OP = 'DELETE' THEN
+        EXECUTE format('SELECT array_agg(DISTINCT %I::text), count(*) FROM old_rows', id_column)
+            INTO ids, changed;
+    ELSIF TG_OP = 'UPDATE' THEN
+        EXECUTE format(
+            'SELECT array_agg(DISTINCT id), count(*) FROM ('
+            '  SELECT %1$I::text AS id FROM old_rows UNION ALL SELECT %1$I::text FROM new_rows'
+            ') changed_rows',
+            id_column
+        ) INTO ids, changed;
+    ELSE
+        changed := 1;  -- TRUNCATE
+    END IF;
+
+    IF changed = 0 THEN
+        RETURN NULL;
+    END IF;
+    IF array_length(ids, 1) > 100 THEN
+        ids := NULL;
+    END IF;
+
+    PERFORM pg_notify(
+        'listing_changes',
+        json_build_object('table', TG_TABLE_NAME, 'op', TG_OP, 'ids', ids)::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            ('property', 'propertyid'),
+            ('locations', 'locationid'),
+            ('booking', 'propertyid'),
+            ('house', 'propertyid'),
+            ('apartment', 'propertyid'),
+            ('commercialbuilding', 'propertyid'),
+            ('land', 'propertyid'),
+            ('vacationhome', 'propertyid'),
+            ('property_x_school', 'propertyid'),
+            ('school', 'schoolid')
+        ) AS v (table_name, id_column)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_notify_insert', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_notify_update', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_notify_delete', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_notify_truncate', t.table_name);
+
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_listing_change(%L)',
+            t.table_name || '_notify_insert', t.table_name, t.id_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_listing_change(%L)',
+            t.table_name || '_notify_update', t.table_name, t.id_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_listing_change(%L)',
+            t.table_name || '_notify_delete', t.table_name, t.id_column
+        );
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION notify_listing_change(%L)',
+            t.table_name || '_notify_truncate', t.table_name, t.id_column
+        );
+    END LOOP;
+END
+$$;
@@ -0,0 +1,180 @@
+-- property_search: one denormalized row per property with its location and
+-- subtype attributes, so search_properties and renter_book_property read a
+-- single table instead of property ⨝ locations ⟕ house ⟕ apartment.
+-- Kept current by statement-level triggers (transition tables, so bulk loads
+-- refresh set-based). Applied by run.py after tables.sql.
+
+SET client_min_messages = warning;  -- quiet "trigger does not exist" on first run
+
+CREATE TABLE IF NOT EXISTS property_search (
+    PropertyID VARCHAR(36) PRIMARY KEY REFERENCES property (PropertyID) ON DELETE CASCADE,
+    Type VARCHAR(50) NOT NULL,
+    ListingType VARCHAR(10) NOT NULL,
+    Description TEXT NOT NULL,
+    Price DECIMAL(10, 2) NOT NULL,
+    Availability VARCHAR(50) NOT NULL,
+    CrimeRate VARCHAR(50),
+    AgentID VARCHAR(36),
+    LocationID VARCHAR(36),
+    Address VARCHAR(255),
+    City VARCHAR(100),
+    State VARCHAR(100),
+    ZipCode VARCHAR(20),
+    Bedrooms INT,          -- house / apartment NumRooms
+    SquareFeet INT,        -- house / apartment / commercial building
+    Floor INT,             -- apartment
+    BuildingType VARCHAR(20),
+    BusinessType VARCHAR(100)
+);
+
+-- Same access paths as 001_search_indexes.sql, now without the joins.
+CREATE INDEX IF NOT EXISTS idx_property_search_active_price
+    ON property_search (Price, PropertyID)
+    INCLUDE (Type, ListingType, City, State, Bedrooms)
+    WHERE Availability = 'Active';
+
+CREATE INDEX IF NOT EXISTS idx_property_search_active_city
+    ON property_search (City, State, Price, PropertyID)
+    WHERE Availability = 'Active';
+
+-- bedrooms sort key used by search.py (NULL bedrooms sort last)
+CREATE INDEX IF NOT EXISTS idx_property_search_active_bedrooms
+    ON property_search ((COALESCE(Bedrooms, 2147483647)), PropertyID)
+    WHERE Availability = 'Active';
+
+CREATE INDEX IF NOT EXISTS idx_property_search_location
+    ON property_search (LocationID);
+
+-- Re-derive the rows of the given properties; properties that no longer exist drop out.
+CREATE OR REPLACE FUNCTION property_search_refresh(ids text[]) RETURNS void AS $$
+    DELETE FROM property_search ps
+    WHERE ps.PropertyID = ANY (ids)
+      AND NOT EXISTS (SELECT 1 FROM property p WHERE p.PropertyID = ps.PropertyID);
+
+    INSERT INTO property_search
+    SELECT p.PropertyID, p.Type, p.ListingType, p.Description, p.Price, p.Availability,
+           p.CrimeRate, p.AgentID, p.LocationID,
+           l.Address, l.City, l.State, l.ZipCode,
+           COALESCE(h.NumRooms, a.NumRooms),
+           COALESCE(h.SquareFeet, a.SquareFeet, cb.SquareFeet),
+           a.Floor, a.BuildingType, cb.BusinessType
+    FROM unnest(ids) AS changed (PropertyID)
+    JOIN property p ON p.PropertyID = changed.PropertyID
+    LEFT JOIN locations l ON l.LocationID = p.LocationID
+    LEFT JOIN house h ON h.PropertyID = p.PropertyID
+    LEFT JOIN apartment a ON a.PropertyID = p.PropertyID
+    LEFT JOIN commercialBuilding cb ON cb.PropertyID = p.PropertyID
+    ON CONFLICT (PropertyID) DO UPDATE SET
+        Type = EXCLUDED.Type,
+        ListingType = EXCLUDED.ListingType,
+        Description = EXCLUDED.Description,
+        Price = EXCLUDED.Price,
+        Availability = EXCLUDED.Availability,
+        CrimeRate = EXCLUDED.CrimeRate,
+        AgentID = EXCLUDED.AgentID,
+        LocationID = EXCLUDED.LocationID,
+        Address = EXCLUDED.Address,
+        City = EXCLUDED.City,
+        State = EXCLUDED.State,
+        ZipCode = EXCLUDED.ZipCode,
+        Bedrooms = EXCLUDED.Bedrooms,
+        SquareFeet = EXCLUDED.SquareFeet,
+        Floor = EXCLUDED.Floor,
+        BuildingType = EXCLUDED.BuildingType,
+        BusinessType = EXCLUDED.BusinessType;
+$$ LANGUAGE sql;
+
+-- Trigger: refresh the properties touched by the statement. TG_ARGV[0] is
+-- 'property' (rows carry PropertyID) or 'location' (rows carry LocationID).
+CREATE OR REPLACE FUNCTION property_search_sync() RETURNS trigger AS $$
+DECLARE
+    ids text[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        -- a truncated subtype table changes arbitrary rows: rebuild
+        PERFORM property_search_refresh(ARRAY(SELECT PropertyID FROM property));
+        RETURN NULL;
+    END IF;
+
+    IF TG_ARGV[0] = 'location' THEN
+        IF TG_OP = 'DELETE' THEN
+            RETURN NULL;  -- locations still in use cannot be deleted
+        END IF;
+        SELECT array_agg(p.PropertyID) INTO ids
+        FROM property p
+        WHERE p.LocationID IN (SELECT LocationID FROM new_rows);
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT PropertyID) INTO ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT PropertyID) INTO ids FROM old_rows;
+    ELSE
+        SELECT array_agg(DISTINCT id) INTO ids FROM (
+            SELECT PropertyID AS id FROM old_rows
+            UNION ALL
+            SELECT PropertyID FROM new_rows
+        ) changed_rows;
+    END IF;
+
+    IF ids IS NOT NULL THEN
+        PERFORM property_search_refresh(ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t record;
+BEGIN
+    FOR t IN
+        SELECT * FROM (VALUES
+            ('property', 'property'),
+            ('house', 'property'),
+            ('apartment', 'property'),
+            ('commercialbuilding', 'property'),
+            ('locations', 'location')
+        ) AS v (table_name, kind)
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_search_insert', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_search_update', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_search_delete', t.table_name);
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', t.table_name || '_search_truncate', t.table_name);
+
+        IF t.kind = 'property' THEN
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+                'FOR EACH STATEMENT EXECUTE FUNCTION property_search_sync(%L)',
+                t.table_name || '_search_insert', t.table_name, t.kind
+            );
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+                'FOR EACH STATEMENT EXECUTE FUNCTION property_search_sync(%L)',
+                t.table_name || '_search_delete', t.table_name, t.kind
+            );
+        END IF;
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION property_search_sync(%L)',
+            t.table_name || '_search_update', t.table_name, t.kind
+        );
+        IF t.table_name <> 'property' THEN
+            EXECUTE format(
+                'CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                'FOR EACH STATEMENT EXECUTE FUNCTION property_search_sync(%L)',
+                t.table_name || '_search_truncate', t.table_name, t.kind
+            );
+        END IF;
+    END LOOP;
+END
+$$;
+
+-- Initial fill (no-op for rows that are already current).
+DO $$
+BEGIN
+    PERFORM property_search_refresh(ARRAY(
+        SELECT p.PropertyID FROM property p
+        WHERE NOT EXISTS (SELECT 1 FROM property_search ps WHERE ps.PropertyID = p.PropertyID)
+    ));
+END
+$$;
+ANALYZE property_search;
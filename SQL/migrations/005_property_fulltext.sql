@@ -0,0 +1,32 @@
+-- Keyword search over property descriptions (search.py "keyword" filter).
+-- SearchVector is a generated column of property_search, so the refresh
+-- triggers from 004_property_search.sql keep it current. Applied by run.py
+-- after tables.sql.
+--
+-- The typo-tolerant fallback needs pg_trgm (part of PostgreSQL contrib). When
+-- the server does not ship it the trigram index is skipped and search.py only
+-- runs the full-text query.
+
+SET client_min_messages = warning;
+
+ALTER TABLE property_search ADD COLUMN IF NOT EXISTS SearchVector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', Description)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_property_search_fts
+    ON property_search USING gin (SearchVector)
+    WHERE Availability = 'Active';
+
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS idx_property_search_description_trgm
+            ON property_search USING gin (Description gin_trgm_ops)
+            WHERE Availability = 'Active';
+    ELSE
+        RAISE WARNING 'pg_trgm is not installed: keyword search runs without the trigram fallback';
+    END IF;
+END
+$$;
+
+ANALYZE property_search;
@@ -0,0 +1,191 @@
+-- Coordinates for locations, offline zip code geocoding and radius search.
+-- Applied by run.py after tables.sql; geocode.py loads geocode_zip from a
+-- local file and backfills existing locations.
+--
+-- Radius queries use a grid instead of a spatial extension: every location
+-- falls into a 0.25 x 0.25 degree cell (GeoCell, b-tree indexed). A search
+-- looks up the cells overlapping the circle's bounding box (geo_cells) and
+-- checks the exact great-circle distance (geo_distance_miles) on those rows only.
+
+SET client_min_messages = warning;  -- quiet "trigger does not exist" on first run
+
+CREATE TABLE IF NOT EXISTS geocode_zip (
+    ZipCode VARCHAR(20) PRIMARY KEY,
+    City VARCHAR(100),
+    State VARCHAR(100),
+    Latitude DOUBLE PRECISION NOT NULL CHECK (Latitude BETWEEN -90 AND 90),
+    Longitude DOUBLE PRECISION NOT NULL CHECK (Longitude BETWEEN -180 AND 180)
+);
+
+-- Grid cell of a point: row (latitude) * 1440 + column (longitude), 4 cells per degree.
+CREATE OR REPLACE FUNCTION geo_cell(lat double precision, lon double precision) RETURNS integer AS $$
+    SELECT floor(lat * 4)::int * 1440 + floor(lon * 4)::int;
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- Cells that overlap the bounding box of a circle of the given radius.
+CREATE OR REPLACE FUNCTION geo_cells(lat double precision, lon double precision, miles double precision)
+RETURNS integer[] AS $$
+    SELECT array_agg(r * 1440 + c)
+    FROM generate_series(
+             floor((lat - miles / 69.0) * 4)::int,
+             floor((lat + miles / 69.0) * 4)::int
+         ) AS r,
+         -- a degree of longitude is shortest on the poleward edge of the box
+         generate_series(
+             floor((lon - miles / (69.0 * cos(radians(least(abs(lat) + miles / 69.0, 89))))) * 4)::int,
+             floor((lon + miles / (69.0 * cos(radians(least(abs(lat) + miles / 69.0, 89))))) * 4)::int
+         ) AS c;
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+-- Great-circle (haversine) distance in miles.
+CREATE OR REPLACE FUNCTION geo_distance_miles(
+    lat1 double precision, lon1 double precision, lat2 double precision, lon2 double precision
+) RETURNS double precision AS $$
+    SELECT 2 * 3958.8 * asin(sqrt(least(1.0,
+        sin(radians(lat2 - lat1) / 2) ^ 2
+        + cos(radians(lat1)) * cos(radians(lat2)) * sin(radians(lon2 - lon1) / 2) ^ 2
+    )));
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+ALTER TABLE locations
+    ADD COLUMN IF NOT EXISTS Latitude DOUBLE PRECISION CHECK (Latitude BETWEEN -90 AND 90),
+    ADD COLUMN IF NOT EXISTS Longitude DOUBLE PRECISION CHECK (Longitude BETWEEN -180 AND 180);
+ALTER TABLE locations
+    ADD COLUMN IF NOT EXISTS GeoCell INTEGER GENERATED ALWAYS AS (geo_cell(Latitude, Longitude)) STORED;
+CREATE INDEX IF NOT EXISTS idx_locations_geo_cell ON locations (GeoCell);
+
+-- New locations (and changed zip codes) without explicit coordinates take the
+-- zip code centroid.
+CREATE OR REPLACE FUNCTION locations_geocode() RETURNS trigger AS $$
+BEGIN
+    IF NEW.Latitude IS NULL
+       OR (TG_OP = 'UPDATE' AND NEW.ZipCode IS DISTINCT FROM OLD.ZipCode
+           AND NEW.Latitude IS NOT DISTINCT FROM OLD.Latitude
+           AND NEW.Longitude IS NOT DISTINCT FROM OLD.Longitude) THEN
+        SELECT g.Latitude, g.Longitude INTO NEW.Latitude, NEW.Longitude
+        FROM geocode_zip g
+        WHERE g.ZipCode = NEW.ZipCode;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS locations_geocode ON locations;
+CREATE TRIGGER locations_geocode
+    BEFORE INSERT OR UPDATE OF ZipCode, Latitude, Longitude ON locations
+    FOR EACH ROW EXECUTE FUNCTION locations_geocode();
+
+-- property_search carries the coordinates so radius searches stay join-free.
+ALTER TABLE property_search
+    ADD COLUMN IF NOT EXISTS Latitude DOUBLE PRECISION,
+    ADD COLUMN IF NOT EXISTS Longitude DOUBLE PRECISION;
+ALTER TABLE property_search
+    ADD COLUMN IF NOT EXISTS GeoCell INTEGER GENERATED ALWAYS AS (geo_cell(Latitude, Longitude)) STORED;
+CREATE INDEX IF NOT EXISTS idx_property_search_active_geo_cell
+    ON property_search (GeoCell)
+    WHERE Availability = 'Active';
+
+-- 004's refresh, now also copying the coordinates.
+CREATE OR REPLACE FUNCTION property_search_refresh(ids text[]) RETURNS void AS $$
+    DELETE FROM property_search ps
+    WHERE ps.PropertyID = ANY (ids)
+      AND NOT EXISTS (SELECT 1 FROM property p WHERE p.PropertyID = ps.PropertyID);
+
+    INSERT INTO property_search (
+        PropertyID, Type, ListingType, Description, Price, Availability, CrimeRate, AgentID,
+        LocationID, Address, City, State, ZipCode, Bedrooms, SquareFeet, Floor, BuildingType,
+        BusinessType, Latitude, Longitude
+    )
+    SELECT p.PropertyID, p.Type, p.ListingType, p.Description, p.Price, p.Availability,
+           p.CrimeRate, p.AgentID, p.LocationID,
+           l.Address, l.City, l.State, l.ZipCode,
+           COALESCE(h.NumRooms, a.NumRooms),
+           COALESCE(h.SquareFeet, a.SquareFeet, cb.SquareFeet),
+           a.Floor, a.BuildingType, cb.BusinessType,
+           l.Latitude, l.Longitude
+    FROM unnest(ids) AS changed (PropertyID)
+    JOIN property p ON p.PropertyID = changed.PropertyID
+    LEFT JOIN locations l ON l.LocationID = p.LocationID
+    LEFT JOIN house h ON h.PropertyID = p.PropertyID
+    LEFT JOIN apartment a ON a.PropertyID = p.PropertyID
+    LEFT JOIN commercialBuilding cb ON cb.PropertyID = p.PropertyID
+    ON CONFLICT (PropertyID) DO UPDATE SET
+        Type = EXCLUDED.Type,
+        ListingType = EXCLUDED.ListingType,
+        Description = EXCLUDED.Description,
+        Price = EXCLUDED.Price,
+        Availability = EXCLUDED.Availability,
+        CrimeRate = EXCLUDED.CrimeRate,
+        AgentID = EXCLUDED.AgentID,
+        LocationID = EXCLUDED.LocationID,
+        Address = EXCLUDED.Address,
+        City = EXCLUDED.City,
+        State = EXCLUDED.State,
+        ZipCode = EXCLUDED.ZipCode,
+        Bedrooms = EXCLUDED.Bedrooms,
+        SquareFeet = EXCLUDED.SquareFeet,
+        Floor = EXCLUDED.Floor,
+        BuildingType = EXCLUDED.BuildingType,
+        BusinessType = EXCLUDED.BusinessType,
+        Latitude = EXCLUDED.Latitude,
+        Longitude = EXCLUDED.Longitude;
+$$ LANGUAGE sql;
+
+-- Recompute property_x_school.DistanceMiles from coordinates for the given
+-- properties (all properties when ids is NULL). Returns the rows updated.
+CREATE OR REPLACE FUNCTION refresh_school_distances(ids text[]) RETURNS integer AS $$
+    WITH updated AS (
+        UPDATE property_x_school pxs
+        SET DistanceMiles = round(least(
+                geo_distance_miles(pl.Latitude, pl.Longitude, sl.Latitude, sl.Longitude), 9999.99
+            )::numeric, 2)
+        FROM property p
+        JOIN locations pl ON pl.LocationID = p.LocationID,
+             school s
+        JOIN locations sl ON sl.LocationID = s.AddressID
+        WHERE (ids IS NULL OR pxs.PropertyID = ANY (ids))
+          AND p.PropertyID = pxs.PropertyID
+          AND s.SchoolID = pxs.SchoolID
+          AND pl.Latitude IS NOT NULL
+          AND sl.Latitude IS NOT NULL
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM updated;
+$$ LANGUAGE sql;
+
+-- Link the given properties (all when ids is NULL) to every school within
+-- miles, with the computed distance. Returns the links created or updated.
+CREATE OR REPLACE FUNCTION link_nearby_schools(ids text[], miles double precision) RETURNS integer AS $$
+    WITH linked AS (
+        INSERT INTO property_x_school (PropertySchoolID, PropertyID, SchoolID, DistanceMiles)
+        SELECT gen_random_uuid()::text, p.PropertyID, near.SchoolID, round(near.Distance::numeric, 2)
+        FROM property p
+        JOIN locations pl ON pl.LocationID = p.LocationID
+        CROSS JOIN LATERAL (
+            SELECT s.SchoolID,
+                   geo_distance_miles(pl.Latitude, pl.Longitude, sl.Latitude, sl.Longitude) AS Distance
+            FROM locations sl
+            JOIN school s ON s.AddressID = sl.LocationID
+            WHERE sl.GeoCell = ANY (geo_cells(pl.Latitude, pl.Longitude, miles))
+        ) near
+        WHERE (ids IS NULL OR p.PropertyID = ANY (ids))
+          AND near.Distance <= miles
+        ON CONFLICT (PropertyID, SchoolID) DO UPDATE SET DistanceMiles = EXCLUDED.DistanceMiles
+        RETURNING 1
+    )
+    SELECT count(*)::int FROM linked;
+$$ LANGUAGE sql;
+
+-- Pick up coordinates of locations that were geocoded before this migration ran.
+DO $$
+BEGIN
+    PERFORM property_search_refresh(ARRAY(
+        SELECT ps.PropertyID
+        FROM property_search ps
+        JOIN locations l ON l.LocationID = ps.LocationID
+        WHERE l.Latitude IS DISTINCT FROM ps.Latitude OR l.Longitude IS DISTINCT FROM ps.Longitude
+    ));
+END
+$$;
+ANALYZE locations;
+ANALYZE property_search;
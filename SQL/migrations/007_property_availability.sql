@@ -0,0 +1,113 @@
+-- property_availability: the free intervals of every property, i.e. the gaps
+-- between its bookings (plus the open-ended ones before the first and after
+-- the last, bounded by -infinity/infinity), so search.py checks "free for the
+-- whole stay" with one index probe instead of scanning the property's bookings.
+-- Applied by run.py after tables.sql; needs PostgreSQL 14+ (multiranges).
+--
+-- An interval is [FreeFrom, FreeUntil): FreeUntil is the first booked day.
+-- Intervals of a property never overlap, so the one that can contain a stay is
+-- the first with FreeUntil after check-out; the primary key finds it without
+-- reading the property's past intervals (booking history).
+--
+-- Kept current by statement-level triggers on booking (and property inserts),
+-- which recompute the free intervals of the touched properties.
+
+SET client_min_messages = warning;  -- quiet "trigger does not exist" on first run
+
+CREATE TABLE IF NOT EXISTS property_availability (
+    PropertyID VARCHAR(36) NOT NULL REFERENCES property (PropertyID) ON DELETE CASCADE,
+    FreeFrom DATE NOT NULL,
+    FreeUntil DATE NOT NULL,
+    PRIMARY KEY (PropertyID, FreeUntil) INCLUDE (FreeFrom),
+    CHECK (FreeFrom < FreeUntil)
+);
+
+-- Recompute the free intervals of the given properties from their bookings.
+CREATE OR REPLACE FUNCTION property_availability_refresh(ids text[]) RETURNS void AS $$
+BEGIN
+    -- Serialize writers per property (row locks, so bulk loads do not exhaust
+    -- the lock table; NO KEY UPDATE does not block booking foreign key checks).
+    -- The statements below take their snapshot after the lock, so they see the
+    -- bookings the previous holder committed (READ COMMITTED).
+    PERFORM 1 FROM property WHERE PropertyID = ANY (ids) ORDER BY PropertyID FOR NO KEY UPDATE;
+
+    DELETE FROM property_availability WHERE PropertyID = ANY (ids);
+
+    INSERT INTO property_availability (PropertyID, FreeFrom, FreeUntil)
+    SELECT p.PropertyID, lower(f.Free), upper(f.Free)
+    FROM property p
+    LEFT JOIN (
+        SELECT PropertyID, range_agg(Period) AS Busy
+        FROM booking
+        WHERE PropertyID = ANY (ids)
+        GROUP BY PropertyID
+    ) b ON b.PropertyID = p.PropertyID
+    CROSS JOIN LATERAL unnest(
+        datemultirange(daterange('-infinity', 'infinity')) - COALESCE(b.Busy, '{}')
+    ) AS f (Free)
+    WHERE p.PropertyID = ANY (ids);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION property_availability_sync() RETURNS trigger AS $$
+DECLARE
+    ids text[];
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM property_availability_refresh(ARRAY(SELECT PropertyID FROM property));
+        RETURN NULL;
+    ELSIF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT PropertyID) INTO ids FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT PropertyID) INTO ids FROM old_rows;
+    ELSE
+        SELECT array_agg(DISTINCT id) INTO ids FROM (
+            SELECT PropertyID AS id FROM old_rows
+            UNION ALL
+            SELECT PropertyID FROM new_rows
+        ) changed_rows;
+    END IF;
+
+    IF ids IS NOT NULL THEN
+        PERFORM property_availability_refresh(ids);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    DROP TRIGGER IF EXISTS booking_availability_insert ON booking;
+    DROP TRIGGER IF EXISTS booking_availability_update ON booking;
+    DROP TRIGGER IF EXISTS booking_availability_delete ON booking;
+    DROP TRIGGER IF EXISTS booking_availability_truncate ON booking;
+    DROP TRIGGER IF EXISTS property_availability_insert ON property;
+
+    CREATE TRIGGER booking_availability_insert AFTER INSERT ON booking
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION property_availability_sync();
+    CREATE TRIGGER booking_availability_update AFTER UPDATE ON booking
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION property_availability_sync();
+    CREATE TRIGGER booking_availability_delete AFTER DELETE ON booking
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION property_availability_sync();
+    CREATE TRIGGER booking_availability_truncate AFTER TRUNCATE ON booking
+        FOR EACH STATEMENT EXECUTE FUNCTION property_availability_sync();
+    -- new properties start out free forever
+    CREATE TRIGGER property_availability_insert AFTER INSERT ON property
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION property_availability_sync();
+END
+$$;
+
+-- Initial fill for properties that have no free intervals yet.
+DO $$
+BEGIN
+    PERFORM property_availability_refresh(ARRAY(
+        SELECT p.PropertyID FROM property p
+        WHERE NOT EXISTS (SELECT 1 FROM property_availability pa WHERE pa.PropertyID = p.PropertyID)
+    ));
+END
+$$;
+ANALYZE property_availability;
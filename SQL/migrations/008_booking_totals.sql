@@ -0,0 +1,22 @@
+-- booking_totals: every booking with its nights and total cost, computed in
+-- NUMERIC (the property's nightly price times EndDate - StartDate, the same
+-- formula as the rewards points). The booking views read their totals here
+-- instead of multiplying floats per row, so they can sort and page bookings by
+-- total and sum a renter's spend in SQL.
+-- Applied by run.py after tables.sql.
+--
+-- AgentID is the listing agent (property.AgentID), whose booking views these are.
+
+CREATE OR REPLACE VIEW booking_totals AS
+SELECT b.BookingID,
+       b.CardID,
+       b.RenterID,
+       b.PropertyID,
+       p.AgentID,
+       b.StartDate,
+       b.EndDate,
+       p.Price,
+       b.EndDate - b.StartDate AS Nights,
+       p.Price * (b.EndDate - b.StartDate) AS TotalCost
+FROM booking b
+JOIN property p ON p.PropertyID = b.PropertyID;
@@ -0,0 +1,185 @@
+-- Rollups behind the agent analytics dashboard (main.py agent_dashboard):
+-- - agent_daily_stats: per listing agent and day, the property-nights booked,
+--   their revenue and the check-ins, for occupancy and revenue over any window
+-- - property_monthly_stats: the same per property and month, for revenue and
+--   occupancy per property
+-- The dashboard reads one row per day or per property-month of the window it
+-- shows, however long the booking history is.
+-- Applied by run.py after tables.sql.
+--
+-- Like booking_totals (008), a night is a day in [StartDate, EndDate) and earns
+-- the property's current nightly price; AgentID is property.AgentID.
+--
+-- Kept current incrementally by statement-level triggers: booking inserts add
+-- their nights, deletes subtract them, updates do both. A property whose Price
+-- or AgentID changes has its bookings moved from the old values to the new.
+
+SET client_min_messages = warning;  -- quiet "trigger does not exist" on first run
+
+CREATE TABLE IF NOT EXISTS agent_daily_stats (
+    AgentID VARCHAR(36) NOT NULL REFERENCES agent (AgentID) ON DELETE CASCADE,
+    Day DATE NOT NULL,
+    BookedNights INT NOT NULL,
+    Revenue NUMERIC(14, 2) NOT NULL,
+    CheckIns INT NOT NULL,
+    PRIMARY KEY (AgentID, Day)
+);
+
+CREATE TABLE IF NOT EXISTS property_monthly_stats (
+    PropertyID VARCHAR(36) NOT NULL REFERENCES property (PropertyID) ON DELETE CASCADE,
+    Month DATE NOT NULL,  -- first day of the month
+    BookedNights INT NOT NULL,
+    Revenue NUMERIC(14, 2) NOT NULL,
+    CheckIns INT NOT NULL,
+    PRIMARY KEY (PropertyID, Month)
+);
+
+-- The booked nights of the given stays, one stay per array position: property,
+-- its AgentID and Price, StartDate and EndDate.
+CREATE OR REPLACE FUNCTION agent_stats_nights(
+    property_ids text[], agent_ids text[], prices numeric[], starts date[], ends date[]
+) RETURNS TABLE (PropertyID text, AgentID text, Price numeric, Day date, CheckIn boolean) AS $$
+    SELECT s.PropertyID, s.AgentID, s.Price, d::date, d = s.StartDate
+    FROM unnest(property_ids, agent_ids, prices, starts, ends) AS s (PropertyID, AgentID, Price, StartDate, EndDate)
+    CROSS JOIN LATERAL generate_series(s.StartDate, s.EndDate - 1, interval '1 day') AS d
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Add (sign 1) or subtract (sign -1) the nights of the given stays.
+-- Keys are upserted in order, so concurrent bookings lock rows in one order.
+CREATE OR REPLACE FUNCTION agent_stats_apply(
+    property_ids text[], agent_ids text[], prices numeric[], starts date[], ends date[], sign int
+) RETURNS void AS $$
+BEGIN
+    INSERT INTO agent_daily_stats AS t (AgentID, Day, BookedNights, Revenue, CheckIns)
+    SELECT n.AgentID, n.Day, sign * count(*), sign * sum(n.Price), sign * count(*) FILTER (WHERE n.CheckIn)
+    FROM agent_stats_nights(property_ids, agent_ids, prices, starts, ends) n
+    WHERE n.AgentID IS NOT NULL
+    GROUP BY n.AgentID, n.Day
+    ORDER BY n.AgentID, n.Day
+    ON CONFLICT (AgentID, Day) DO UPDATE
+        SET BookedNights = t.BookedNights + excluded.BookedNights,
+            Revenue = t.Revenue + excluded.Revenue,
+            CheckIns = t.CheckIns + excluded.CheckIns;
+
+    INSERT INTO property_monthly_stats AS t (PropertyID, Month, BookedNights, Revenue, CheckIns)
+    SELECT n.PropertyID, date_trunc('month', n.Day)::date,
+           sign * count(*), sign * sum(n.Price), sign * count(*) FILTER (WHERE n.CheckIn)
+    FROM agent_stats_nights(property_ids, agent_ids, prices, starts, ends) n
+    GROUP BY n.PropertyID, date_trunc('month', n.Day)
+    ORDER BY 1, 2
+    ON CONFLICT (PropertyID, Month) DO UPDATE
+        SET BookedNights = t.BookedNights + excluded.BookedNights,
+            Revenue = t.Revenue + excluded.Revenue,
+            CheckIns = t.CheckIns + excluded.CheckIns;
+
+    IF sign < 0 THEN
+        -- drop the rows left empty, within the days just touched
+        DELETE FROM agent_daily_stats t
+        USING agent_stats_nights(property_ids, agent_ids, prices, starts, ends) n
+        WHERE t.AgentID = n.AgentID AND t.Day = n.Day AND t.BookedNights = 0;
+        DELETE FROM property_monthly_stats t
+        USING agent_stats_nights(property_ids, agent_ids, prices, starts, ends) n
+        WHERE t.PropertyID = n.PropertyID AND t.Month = date_trunc('month', n.Day) AND t.BookedNights = 0;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recompute both rollups from every booking (initial fill, booking TRUNCATE).
+CREATE OR REPLACE FUNCTION agent_stats_rebuild() RETURNS void AS $$
+BEGIN
+    DELETE FROM agent_daily_stats;
+    DELETE FROM property_monthly_stats;
+    PERFORM agent_stats_apply(
+        array_agg(p.PropertyID), array_agg(p.AgentID), array_agg(p.Price),
+        array_agg(b.StartDate), array_agg(b.EndDate), 1
+    )
+    FROM booking b
+    JOIN property p ON p.PropertyID = b.PropertyID
+    HAVING count(*) > 0;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION booking_stats_sync() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        PERFORM agent_stats_rebuild();
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM agent_stats_apply(
+            array_agg(p.PropertyID), array_agg(p.AgentID), array_agg(p.Price),
+            array_agg(o.StartDate), array_agg(o.EndDate), -1
+        )
+        FROM old_rows o
+        JOIN property p ON p.PropertyID = o.PropertyID
+        HAVING count(*) > 0;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        PERFORM agent_stats_apply(
+            array_agg(p.PropertyID), array_agg(p.AgentID), array_agg(p.Price),
+            array_agg(n.StartDate), array_agg(n.EndDate), 1
+        )
+        FROM new_rows n
+        JOIN property p ON p.PropertyID = n.PropertyID
+        HAVING count(*) > 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Properties whose Price or AgentID changed: their bookings' nights are
+-- subtracted at the old values and added back at the new ones.
+CREATE OR REPLACE FUNCTION property_stats_sync() RETURNS trigger AS $$
+BEGIN
+    PERFORM agent_stats_apply(
+        array_agg(o.PropertyID), array_agg(o.AgentID), array_agg(o.Price),
+        array_agg(b.StartDate), array_agg(b.EndDate), -1
+    )
+    FROM old_rows o
+    JOIN new_rows n ON n.PropertyID = o.PropertyID
+    JOIN booking b ON b.PropertyID = o.PropertyID
+    WHERE o.Price IS DISTINCT FROM n.Price OR o.AgentID IS DISTINCT FROM n.AgentID
+    HAVING count(*) > 0;
+
+    PERFORM agent_stats_apply(
+        array_agg(n.PropertyID), array_agg(n.AgentID), array_agg(n.Price),
+        array_agg(b.StartDate), array_agg(b.EndDate), 1
+    )
+    FROM old_rows o
+    JOIN new_rows n ON n.PropertyID = o.PropertyID
+    JOIN booking b ON b.PropertyID = n.PropertyID
+    WHERE o.Price IS DISTINCT FROM n.Price OR o.AgentID IS DISTINCT FROM n.AgentID
+    HAVING count(*) > 0;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    DROP TRIGGER IF EXISTS booking_stats_insert ON booking;
+    DROP TRIGGER IF EXISTS booking_stats_update ON booking;
+    DROP TRIGGER IF EXISTS booking_stats_delete ON booking;
+    DROP TRIGGER IF EXISTS booking_stats_truncate ON booking;
+    DROP TRIGGER IF EXISTS property_stats_update ON property;
+
+    CREATE TRIGGER booking_stats_insert AFTER INSERT ON booking
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION booking_stats_sync();
+    CREATE TRIGGER booking_stats_update AFTER UPDATE ON booking
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION booking_stats_sync();
+    CREATE TRIGGER booking_stats_delete AFTER DELETE ON booking
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION booking_stats_sync();
+    CREATE TRIGGER booking_stats_truncate AFTER TRUNCATE ON booking
+        FOR EACH STATEMENT EXECUTE FUNCTION booking_stats_sync();
+    CREATE TRIGGER property_stats_update AFTER UPDATE ON property
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION property_stats_sync();
+END
+$$;
+
+-- Initial fill; a re-run recomputes both rollups from the bookings.
+SELECT agent_stats_rebuild();
+ANALYZE agent_daily_stats;
+ANALYZE property_monthly_stats;
@@ -0,0 +1,7 @@
+-- booking.BookedAt: when the booking was made, for the lead time (StartDate
+-- minus the booking day) in reports.py. Bookings made before this migration
+-- have no BookedAt (NULL) and are left out of lead times; new ones get now().
+-- Applied by run.py after tables.sql.
+
+ALTER TABLE booking ADD COLUMN IF NOT EXISTS BookedAt TIMESTAMPTZ;
+ALTER TABLE booking ALTER COLUMN BookedAt SET DEFAULT now();
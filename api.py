@@ -0,0 +1,494 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+import psycopg.errors
+from aiohttp import web
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+import search
+from async_repositories import (
+    AsyncAddressRepository,
+    AsyncBookingRepository,
+    AsyncPaymentRepository,
+    AsyncPropertyRepository,
+    AsyncUserRepository,
+)
+from cli import SEARCH_COLUMNS, to_json
+from main import DB_CONFIG, PAGE_SIZE, mask_card
+from repositories import BOOKING_SORT_KEYS
+
+# api.py
+# HTTP JSON API over the search and booking logic, for many concurrent users
+# (main.py's menus serve one user per process). asyncio + aiohttp, with a
+# psycopg 3 async connection pool; the data access is async_repositories.py,
+# which runs the same SQL as main.py.
+#
+# Every request names its user with an X-User-Email header (the menus' login
+# is by email too) and runs in one transaction on one pooled connection:
+# committed when the handler succeeds, rolled back when it fails.
+# Responses are {"ok": true, ...} like cli.py; errors are
+# {"ok": false, "error": ...} with a 4xx status.
+#
+#   GET    /search?city=&state=&type=&listing_type=&min_price=&max_price=&min_bedrooms=
+#                 &check_in=&check_out=&keyword=&near=&within_miles=&sort=&limit=&after=&fuzzy=
+#   GET    /properties?limit=&after=                 (agents: every property, with schools)
+#   GET    /bookings?sort=start|recent|total&limit=&after=   (renter's own, or bookings of agent's properties)
+#   GET    /bookings/summary?limit=&after=           (renter's spend, or agent's spend per renter)
+#   POST   /bookings {property_id, start, end, card}  (renters)
+#   DELETE /bookings/{booking_id}
+#   GET    /cards, POST /cards, PUT /cards/{card_id}, DELETE /cards/{card_id}          (renters)
+#   GET    /addresses, POST /addresses, PUT/DELETE /addresses/{location_id}            (renters)
+#
+# Listings are keyset pages: a response with "more" carries "next", the key to
+# pass back as after=<JSON array> for the following page.
+#
+# Example:
+#   python api.py --port 8080
+#   curl -H 'X-User-Email: renter@example.com' 'localhost:8080/search?city=Chicago&sort=price'
+
+API_POOL_MIN_SIZE = int(os.getenv("api_pool_min_size", "2"))
+API_POOL_MAX_SIZE = int(os.getenv("api_pool_max_size", "20"))
+API_MAX_PAGE_SIZE = int(os.getenv("api_max_page_size", "200"))
+
+POOL = web.AppKey("pool", AsyncConnectionPool)
+
+ADDRESS_FIELDS = ["address", "city", "state", "zip_code", "country"]
+
+# SQL types of the keyset keys of each listing (search.SORT_KEYS has its own),
+# so page_args can check an after key before it reaches the database
+PROPERTY_LIST_KEY_TYPES = ["varchar", "varchar", "numeric", "varchar"]
+BOOKING_KEY_TYPES = {
+    "start": ["date", "varchar"],
+    "recent": ["int", "varchar"],
+    "total": ["numeric", "varchar"],
+}
+RENTER_SPEND_KEY_TYPES = ["numeric", "varchar"]
+INT_RANGE = range(-(2**31), 2**31)
+
+
+def json_response(result, status=200):
+    return web.json_response(dict(ok=True, **result), status=status, dumps=to_json)
+
+
+def json_error(error_class, message):
+    return error_class(text=to_json({"ok": False, "error": message}), content_type="application/json")
+
+
+def parse_date(value, name):
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid {name} {value!r}, use YYYY-MM-DD")
+
+
+def optional_date(query, name):
+    value = query.get(name, "").strip()
+    return parse_date(value, name) if value else None
+
+
+def key_value(value, type_name):
+    """One element of an after key as the Python value of its SQL type, or None if it is not one."""
+    if isinstance(value, bool):
+        return None
+    if type_name == "varchar":
+        return value if isinstance(value, str) else None
+    if type_name == "int":
+        return value if isinstance(value, int) and value in INT_RANGE else None
+    if type_name == "real":
+        return float(value) if isinstance(value, (int, float)) else None
+    if type_name == "numeric":
+        if not isinstance(value, (str, int, float)):
+            return None
+        try:
+            number = Decimal(str(value))
+        except InvalidOperation:
+            return None
+        return number if number.is_finite() else None
+    if type_name == "date":
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            return None
+    raise ValueError(f"Unknown key type {type_name}")
+
+
+def page_args(query, key_types):
+    """(after key or None, limit) of a listing request whose keys have the SQL types key_types."""
+    limit = int(query.get("limit") or PAGE_SIZE)
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+    after = query.get("after")
+    if after is None:
+        return None, limit
+    key = json.loads(after)
+    if not isinstance(key, list) or len(key) != len(key_types):
+        raise ValueError("after must be the JSON array given as next")
+    key = [key_value(value, type_name) for value, type_name in zip(key, key_types)]
+    if None in key:
+        raise ValueError("after must be the JSON array given as next")
+    return key, limit
+
+
+def page(rows, limit, key_of):
+    """Response fields of a page fetched with limit + 1 rows."""
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, {"count": len(rows), "more": more, "next": list(key_of(rows[-1])) if more else None}
+
+
+async def read_json(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise ValueError("Request body must be a JSON object")
+    if not isinstance(body, dict):
+        raise ValueError("Request body must be a JSON object")
+    return body
+
+
+def renter_id_of(request):
+    user = request["user"]
+    if user.type != "Renter" or user.renter_id is None:
+        raise json_error(web.HTTPForbidden, "Only renters can do this")
+    return user.renter_id
+
+
+def agent_id_of(request):
+    user = request["user"]
+    if user.type != "Agent" or user.agent_id is None:
+        raise json_error(web.HTTPForbidden, "Only agents can do this")
+    return user.agent_id
+
+
+def find(rows, field, value):
+    """The row whose field equals value (compared as text), or a 404."""
+    for row in rows:
+        if str(getattr(row, field)) == value:
+            return row
+    raise json_error(web.HTTPNotFound, f"No such {field.replace('_id', '')}: {value}")
+
+
+@web.middleware
+async def session(request, handler):
+    """Identify the user and run the handler in a transaction on a pooled connection."""
+    email = request.headers.get("X-User-Email", "").strip()
+    if not email:
+        raise json_error(web.HTTPUnauthorized, "Missing X-User-Email header")
+    try:
+        async with request.app[POOL].connection() as conn:
+            user = await AsyncUserRepository(conn).find_by_email(email)
+            if user is None:
+                raise json_error(web.HTTPUnauthorized, "User not found. Please register first.")
+            request["conn"], request["user"] = conn, user
+            return await handler(request)
+    except ValueError as error:
+        raise json_error(web.HTTPBadRequest, str(error))
+    except psycopg.errors.DataError as error:
+        # a value the database cannot take (out of range, bad format, ...)
+        raise json_error(web.HTTPBadRequest, error.diag.message_primary or str(error))
+    except psycopg.errors.ExclusionViolation:
+        raise json_error(web.HTTPConflict, "Property already booked for that period")
+
+
+# ===================== SEARCH AND LISTINGS =====================
+
+
+async def search_properties(request):
+    q = request.query
+    sort = q.get("sort", "none")
+    if sort not in search.SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(sorted(search.SORT_KEYS))}")
+    properties = AsyncPropertyRepository(request["conn"])
+    near = await properties.locate(q["near"]) if q.get("near") else None
+    filters = search.normalize_filters(
+        q.get("city"),
+        q.get("state"),
+        q.get("type"),
+        q.get("listing_type"),
+        q.get("min_price"),
+        q.get("max_price"),
+        q.get("min_bedrooms"),
+        optional_date(q, "check_in"),
+        optional_date(q, "check_out"),
+        q.get("keyword"),
+        near,
+        q.get("within_miles"),
+    )
+    after, limit = page_args(q, search.SORT_KEYS[search.effective_sort(filters, sort)][1])
+    # later pages of a fuzzy search stay fuzzy (the client passes fuzzy=1 back)
+    if filters["keyword"] and q.get("fuzzy") in ("1", "true"):
+        filters = search.fuzzy_filters(filters)
+    rows = await properties.search_page(filters, sort, after, limit + 1)
+    if not rows and after is None and filters["keyword"] and await properties.trigram_available():
+        filters = search.fuzzy_filters(filters)
+        rows = await properties.search_page(filters, sort, after, limit + 1)
+    key_of = search.SORT_KEYS[search.effective_sort(filters, sort)][2]
+    rows, paging = page(rows, limit, key_of)
+    return json_response(
+        dict(
+            fuzzy=filters["fuzzy_keyword"] is not None,
+            results=[dict(zip(SEARCH_COLUMNS, row)) for row in rows],
+            **paging,
+        )
+    )
+
+
+async def list_properties(request):
+    agent_id_of(request)
+    after, limit = page_args(request.query, PROPERTY_LIST_KEY_TYPES)
+    rows = await AsyncPropertyRepository(request["conn"]).listing_page(after, limit + 1)
+    rows, paging = page(rows, limit, lambda r: (r.city, r.state, r.price, r.property_id))
+    return json_response(dict(results=[r._asdict() for r in rows], **paging))
+
+
+# ===================== BOOKINGS =====================
+
+
+async def list_bookings(request):
+    """Renter's bookings (sort start by default) or the agent's (sort recent), a page at a time."""
+    bookings = AsyncBookingRepository(request["conn"])
+    is_agent = request["user"].type == "Agent"
+    sort = request.query.get("sort", "recent" if is_agent else "start")
+    if sort not in BOOKING_SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(sorted(BOOKING_SORT_KEYS))}")
+    after, limit = page_args(request.query, BOOKING_KEY_TYPES[sort])
+    if is_agent:
+        rows = await bookings.agent_page(agent_id_of(request), sort, after, limit + 1)
+    else:
+        rows = await bookings.renter_page(renter_id_of(request), sort, after, limit + 1)
+    rows, paging = page(rows, limit, BOOKING_SORT_KEYS[sort][1])
+    results = [dict(r._asdict(), card_number=mask_card(r.card_number)) for r in rows]
+    return json_response(dict(results=results, **paging))
+
+
+async def booking_summary(request):
+    """Renter: their SpendSummary. Agent: a page of spend per renter of their properties."""
+    bookings = AsyncBookingRepository(request["conn"])
+    if request["user"].type != "Agent":
+        return json_response((await bookings.renter_spend(renter_id_of(request)))._asdict())
+    after, limit = page_args(request.query, RENTER_SPEND_KEY_TYPES)
+    rows = await bookings.renter_spend_page(agent_id_of(request), after, limit + 1)
+    rows, paging = page(rows, limit, lambda r: (-r.total_spent, r.renter_id))
+    return json_response(dict(results=[r._asdict() for r in rows], **paging))
+
+
+async def book_property(request):
+    """Book like renter_book_property; card is a CardID or the card's last 4 digits."""
+    renter_id = renter_id_of(request)
+    body = await read_json(request)
+    start = parse_date(body.get("start"), "start")
+    end = parse_date(body.get("end"), "end")
+    if end <= start:
+        raise ValueError("End date must be after start date")
+    conn = request["conn"]
+
+    cards = await AsyncPaymentRepository(conn).list_cards(renter_id)
+    if not cards:
+        raise ValueError("You must add a credit card before booking")
+    card = str(body.get("card") or "")
+    if card:
+        cards = [c for c in cards if card in (str(c.card_id), str(c.card_number)[-4:])]
+    if len(cards) != 1:
+        raise ValueError("Pick one of your cards with card" if cards else "No matching card")
+
+    property_id = str(body.get("property_id") or "")
+    receipt = await AsyncBookingRepository(conn).book(renter_id, cards[0].card_id, property_id, start, end)
+    if receipt is None:
+        raise json_error(web.HTTPNotFound, f"No active property {property_id}")
+    return json_response(
+        {
+            "booking_id": receipt.booking_id,
+            "property_id": property_id,
+            "card_id": cards[0].card_id,
+            "start": start,
+            "end": end,
+            "total_cost": receipt.total_cost,
+            "points_earned": receipt.points_earned,
+        },
+        status=201,
+    )
+
+
+async def cancel_booking(request):
+    booking_id = request.match_info["booking_id"]
+    bookings = AsyncBookingRepository(request["conn"])
+    if request["user"].type == "Agent":
+        if not await bookings.cancel_for_agent(agent_id_of(request), booking_id):
+            raise json_error(web.HTTPNotFound, "No such booking found for your agency")
+    else:
+        renter_id = renter_id_of(request)
+        booking = find(await bookings.for_renter(renter_id), "booking_id", booking_id)
+        await bookings.cancel_for_renter(renter_id, booking)
+    return json_response({"booking_id": booking_id})
+
+
+# ===================== CARDS =====================
+
+
+def card_json(card):
+    return {
+        "card_id": card.card_id,
+        "card_number": mask_card(card.card_number),
+        "expiration_date": card.expiration_date,
+        "address_id": card.address_id,
+    }
+
+
+async def list_cards(request):
+    cards = await AsyncPaymentRepository(request["conn"]).list_cards(renter_id_of(request))
+    return json_response({"count": len(cards), "results": [card_json(c) for c in cards]})
+
+
+async def add_card(request):
+    renter_id = renter_id_of(request)
+    body = await read_json(request)
+    conn = request["conn"]
+    addresses = await AsyncAddressRepository(conn).list_for_user(request["user"].user_id)
+    if not addresses:
+        raise ValueError("You must add an address before adding a card")
+    address = find(addresses, "location_id", str(body.get("address_id")))
+    fields = [str(body.get(name) or "").strip() for name in ("card_number", "expiration_date", "cvv")]
+    if not all(fields):
+        raise ValueError("card_number, expiration_date and cvv are required")
+    parse_date(fields[1], "expiration_date")
+    card_id = await AsyncPaymentRepository(conn).add_card(renter_id, address.location_id, *fields)
+    return json_response({"card_id": card_id}, status=201)
+
+
+async def update_card(request):
+    renter_id = renter_id_of(request)
+    body = await read_json(request)
+    payments = AsyncPaymentRepository(request["conn"])
+    card = find(await payments.list_cards(renter_id), "card_id", request.match_info["card_id"])
+    expiration_date = body.get("expiration_date") or card.expiration_date
+    if body.get("expiration_date"):
+        expiration_date = parse_date(expiration_date, "expiration_date")
+    await payments.update_card(
+        renter_id,
+        card.card_id,
+        body.get("card_number") or card.card_number,
+        expiration_date,
+        body.get("cvv") or card.cvv,
+    )
+    return json_response({"card_id": card.card_id})
+
+
+async def delete_card(request):
+    renter_id = renter_id_of(request)
+    payments = AsyncPaymentRepository(request["conn"])
+    card = find(await payments.list_cards(renter_id), "card_id", request.match_info["card_id"])
+    if await payments.has_active_bookings(card.card_id):
+        raise json_error(web.HTTPConflict, "Cannot delete card with active bookings")
+    await payments.delete_card(renter_id, card.card_id)
+    return json_response({"card_id": card.card_id})
+
+
+# ===================== ADDRESSES =====================
+
+
+async def list_addresses(request):
+    renter_id_of(request)
+    rows = await AsyncAddressRepository(request["conn"]).list_for_user(request["user"].user_id)
+    return json_response({"count": len(rows), "results": [r._asdict() for r in rows]})
+
+
+async def add_address(request):
+    renter_id_of(request)
+    body = await read_json(request)
+    fields = [str(body.get(name) or "").strip() for name in ADDRESS_FIELDS]
+    if not all(fields):
+        raise ValueError("All address fields are required: " + ", ".join(ADDRESS_FIELDS))
+    location_id = await AsyncAddressRepository(request["conn"]).add_for_user(request["user"].user_id, *fields)
+    return json_response({"location_id": location_id}, status=201)
+
+
+async def update_address(request):
+    renter_id_of(request)
+    body = await read_json(request)
+    addresses = AsyncAddressRepository(request["conn"])
+    loc = find(await addresses.list_for_user(request["user"].user_id), "location_id", request.match_info["location_id"])
+    fields = [str(body.get(name) or "").strip() or getattr(loc, name) for name in ADDRESS_FIELDS]
+    await addresses.update_location(loc.location_id, *fields)
+    return json_response({"location_id": loc.location_id})
+
+
+async def delete_address(request):
+    renter_id_of(request)
+    user_id = request["user"].user_id
+    addresses = AsyncAddressRepository(request["conn"])
+    loc = find(await addresses.list_for_user(user_id), "location_id", request.match_info["location_id"])
+    if await addresses.has_cards(loc.location_id):
+        raise json_error(web.HTTPConflict, "Cannot delete address with associated cards")
+    await addresses.delete_for_user(user_id, loc.location_id)
+    return json_response({"location_id": loc.location_id})
+
+
+# ===================== APP =====================
+
+
+async def database(app):
+    """Open the async pool with the server and close it on shutdown."""
+    conninfo = make_conninfo(
+        host=DB_CONFIG["host"],
+        dbname=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    pool = AsyncConnectionPool(
+        conninfo,
+        min_size=API_POOL_MIN_SIZE,
+        max_size=API_POOL_MAX_SIZE,
+        timeout=float(DB_CONFIG["pool_timeout"]),
+        max_idle=float(DB_CONFIG["pool_idle_timeout"]),
+        open=False,
+    )
+    await pool.open()
+    app[POOL] = pool
+    yield
+    await pool.close()
+
+
+def build_app():
+    app = web.Application(middlewares=[session])
+    app.cleanup_ctx.append(database)
+    app.add_routes(
+        [
+            web.get("/search", search_properties),
+            web.get("/properties", list_properties),
+            web.get("/bookings", list_bookings),
+            web.get("/bookings/summary", booking_summary),
+            web.post("/bookings", book_property),
+            web.delete("/bookings/{booking_id}", cancel_booking),
+            web.get("/cards", list_cards),
+            web.post("/cards", add_card),
+            web.put("/cards/{card_id}", update_card),
+            web.delete("/cards/{card_id}", delete_card),
+            web.get("/addresses", list_addresses),
+            web.post("/addresses", add_address),
+            web.put("/addresses/{location_id}", update_address),
+            web.delete("/addresses/{location_id}", delete_address),
+        ]
+    )
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the search and booking API over HTTP.")
+    parser.add_argument("--host", default=os.getenv("api_host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("api_port", "8080")))
+    args = parser.parse_args()
+    if sys.platform == "win32":
+        # psycopg's async connections need a selector event loop
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    web.run_app(build_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import uuid
+import weakref
+
+from psycopg.types.range import Range
+from psycopg2.extras import Range as Psycopg2Range
+
+import search
+from pagination import keyset_sql
+from records import (
+    AgentBooking,
+    BookingReceipt,
+    Card,
+    Location,
+    PropertyListing,
+    RenterBooking,
+    RenterSpend,
+    SpendSummary,
+    User,
+)
+from repositories import (
+    ADDRESS_HAS_CARDS_SQL,
+    AGENT_BOOKINGS_SQL,
+    AGENT_RENTER_SPEND_SQL,
+    BOOKING_SORT_KEYS,
+    BOOK_SQL,
+    CANCEL_AGENT_BOOKING_SQL,
+    CANCEL_RENTER_BOOKING_SQL,
+    CARD_HAS_ACTIVE_BOOKINGS_SQL,
+    DELETE_CARD_SQL,
+    DELETE_LOCATION_SQL,
+    DELETE_USER_ADDRESS_SQL,
+    INSERT_CARD_SQL,
+    INSERT_LOCATION_SQL,
+    INSERT_USER_ADDRESS_SQL,
+    PROPERTY_LIST_KEYS,
+    PROPERTY_LIST_SQL,
+    REACTIVATE_PROPERTY_SQL,
+    RENTER_BOOKINGS_SQL,
+    RENTER_CARDS_SQL,
+    RENTER_SPEND_KEYS,
+    RENTER_SPEND_SQL,
+    UPDATE_CARD_SQL,
+    UPDATE_LOCATION_SQL,
+    USER_ADDRESSES_SQL,
+    USER_SQL,
+    book_params,
+)
+
+# async_repositories.py
+# asyncio counterparts of the repositories used by the HTTP API (api.py), on
+# psycopg 3 async connections. They run the statements of repositories.py and
+# search.py unchanged and return the same records (records.py), built by a
+# psycopg row factory. Like the sync repositories they never commit.
+#
+# Searches run the same statement shapes as search_properties, never
+# auto-prepared (see search.py: generic plans misestimate them).
+
+# async connection -> whether pg_trgm is installed
+_trigram = weakref.WeakKeyDictionary()
+
+
+def record_rows(record):
+    """psycopg row factory building record (a records.py NamedTuple) from each row."""
+    return lambda cursor: record._make
+
+
+def adapt(value):
+    """psycopg 3 equivalent of a psycopg2 value built by search.normalize_filters."""
+    if isinstance(value, Psycopg2Range):
+        bounds = ("[" if value.lower_inc else "(") + ("]" if value.upper_inc else ")")
+        return Range(value.lower, value.upper, bounds)
+    return value
+
+
+class AsyncRepository:
+    """Base: one async connection, a short-lived cursor per call."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def fetch_one(self, record, sql, params=None):
+        async with self.conn.cursor(row_factory=record_rows(record)) as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchone()
+
+    async def fetch_all(self, record, sql, params=None):
+        async with self.conn.cursor(row_factory=record_rows(record)) as cur:
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+    async def scalar(self, sql, params=None):
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql, params)
+            row = await cur.fetchone()
+        return None if row is None else row[0]
+
+    async def execute(self, sql, params=None):
+        """Run a statement; returns its row count."""
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql, params)
+            return cur.rowcount
+
+
+class AsyncUserRepository(AsyncRepository):
+    async def find_by_email(self, email):
+        """User with the RenterID/AgentID of its type, or None."""
+        return await self.fetch_one(User, USER_SQL, (email,))
+
+
+class AsyncAddressRepository(AsyncRepository):
+    async def list_for_user(self, user_id):
+        return await self.fetch_all(Location, USER_ADDRESSES_SQL, (user_id,))
+
+    async def add_for_user(self, user_id, address, city, state, zip_code, country):
+        location_id = str(uuid.uuid4())
+        await self.execute(INSERT_LOCATION_SQL, (location_id, address, city, state, zip_code, country))
+        await self.execute(INSERT_USER_ADDRESS_SQL, (str(uuid.uuid4()), user_id, location_id))
+        return location_id
+
+    async def update_location(self, location_id, address, city, state, zip_code, country):
+        await self.execute(UPDATE_LOCATION_SQL, (address, city, state, zip_code, country, location_id))
+
+    async def has_cards(self, location_id):
+        return await self.scalar(ADDRESS_HAS_CARDS_SQL, (location_id,)) is not None
+
+    async def delete_for_user(self, user_id, location_id):
+        await self.execute(DELETE_USER_ADDRESS_SQL, (user_id, location_id))
+        await self.execute(DELETE_LOCATION_SQL, (location_id,))
+
+
+class AsyncPaymentRepository(AsyncRepository):
+    async def list_cards(self, renter_id):
+        return await self.fetch_all(Card, RENTER_CARDS_SQL, (renter_id,))
+
+    async def add_card(self, renter_id, address_id, card_number, expiration_date, cvv):
+        card_id = str(uuid.uuid4())
+        await self.execute(INSERT_CARD_SQL, (card_id, renter_id, address_id, card_number, expiration_date, cvv))
+        return card_id
+
+    async def update_card(self, renter_id, card_id, card_number, expiration_date, cvv):
+        await self.execute(UPDATE_CARD_SQL, (card_number, expiration_date, cvv, card_id, renter_id))
+
+    async def has_active_bookings(self, card_id):
+        return await self.scalar(CARD_HAS_ACTIVE_BOOKINGS_SQL, (card_id,)) is not None
+
+    async def delete_card(self, renter_id, card_id):
+        await self.execute(DELETE_CARD_SQL, (card_id, renter_id))
+
+
+class AsyncPropertyRepository(AsyncRepository):
+    async def listing_page(self, after=None, limit=20):
+        """One page of every property (PropertyListing rows) by city, state, price."""
+        sql, extra = keyset_sql(PROPERTY_LIST_SQL, PROPERTY_LIST_KEYS, after=after, limit=limit)
+        return await self.fetch_all(PropertyListing, sql, extra)
+
+    async def locate(self, place):
+        """search.locate() on this connection: (latitude, longitude). Raises ValueError."""
+        point = search.parse_point(place)
+        if point is not None:
+            return point
+        place = str(place).strip()
+        async with self.conn.cursor() as cur:
+            await cur.execute(search.GEOCODE_ZIP_SQL, (place,))
+            row = await cur.fetchone()
+        if row is None:
+            raise ValueError(f"Unknown zip code: {place}")
+        return row
+
+    async def search_page(self, filters, sort="none", after=None, limit=20):
+        """One page of search results (search.SEARCH_SELECT rows) after the key after."""
+        sql, params, _ = search.search_statement(filters, sort, after, None, limit)
+        async with self.conn.cursor() as cur:
+            await cur.execute(sql, {k: adapt(v) for k, v in params.items()}, prepare=False)
+            return await cur.fetchall()
+
+    async def trigram_available(self):
+        """search.trigram_available() on this connection (cached per connection)."""
+        if self.conn not in _trigram:
+            _trigram[self.conn] = await self.scalar(search.TRIGRAM_INSTALLED_SQL)
+        return _trigram[self.conn]
+
+
+class AsyncBookingRepository(AsyncRepository):
+    async def book(self, renter_id, card_id, property_id, start_date, end_date):
+        """BookingRepository.book: a BookingReceipt, or None if the property is not Active.
+
+        Overlaps raise psycopg.errors.ExclusionViolation (booking_no_overlap).
+        """
+        params = book_params(renter_id, card_id, property_id, start_date, end_date)
+        return await self.fetch_one(BookingReceipt, BOOK_SQL, params)
+
+    async def for_renter(self, renter_id):
+        return await self.fetch_all(RenterBooking, RENTER_BOOKINGS_SQL, (renter_id,))
+
+    async def renter_page(self, renter_id, sort="start", after=None, limit=20):
+        """One page of the renter's bookings (BookingRepository.renter_pager)."""
+        sql, extra = keyset_sql(RENTER_BOOKINGS_SQL, BOOKING_SORT_KEYS[sort][0], after=after, limit=limit)
+        return await self.fetch_all(RenterBooking, sql, [renter_id, *extra])
+
+    async def renter_spend(self, renter_id):
+        return await self.fetch_one(SpendSummary, RENTER_SPEND_SQL, (renter_id,))
+
+    async def cancel_for_renter(self, renter_id, booking):
+        """Cancel a RenterBooking and set its property back to Active."""
+        await self.execute(CANCEL_RENTER_BOOKING_SQL, (booking.booking_id, renter_id))
+        await self.execute(REACTIVATE_PROPERTY_SQL, (booking.property_id,))
+
+    async def for_agent(self, agent_id):
+        """Bookings of the agent's properties, latest start first."""
+        return await self.fetch_all(AgentBooking, AGENT_BOOKINGS_SQL + " ORDER BY b.startdate DESC", (agent_id,))
+
+    async def agent_page(self, agent_id, sort="recent", after=None, limit=20):
+        """One page of bookings of the agent's properties (BookingRepository.agent_pager)."""
+        sql, extra = keyset_sql(AGENT_BOOKINGS_SQL, BOOKING_SORT_KEYS[sort][0], after=after, limit=limit)
+        return await self.fetch_all(AgentBooking, sql, [agent_id, *extra])
+
+    async def renter_spend_page(self, agent_id, after=None, limit=20):
+        """One page of RenterSpend rows of the agent's properties, biggest spender first."""
+        sql, extra = keyset_sql(AGENT_RENTER_SPEND_SQL, RENTER_SPEND_KEYS, after=after, limit=limit)
+        return await self.fetch_all(RenterSpend, sql, [agent_id, *extra])
+
+    async def cancel_for_agent(self, agent_id, booking_id):
+        """Cancel a booking of one of the agent's properties; False if there is none."""
+        return await self.execute(CANCEL_AGENT_BOOKING_SQL, (booking_id, agent_id)) > 0
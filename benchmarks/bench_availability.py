@@ -0,0 +1,167 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2.extras import DateRange
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_search import explain_times  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from seed import CITIES, seed_catalog  # noqa: E402
+
+# bench_availability.py
+# "Free for the whole stay" search (SQL/migrations/007). Seeds a catalog with
+# a booking history per property (rolled back afterwards) and answers random
+# check-in/check-out stays inside that history with
+#   subquery - NOT EXISTS over the property's overlapping bookings (the old SQL;
+#              its index probe reads every booking starting before check-out)
+#   table    - EXISTS a property_availability interval containing the stay
+#              (what search.py runs now; reads from the first interval ending
+#              after check-out)
+# for a first result page, a city search sorted by price and a count of every
+# free property, reporting wall time and the server's planning/execution time.
+# Also times the trigger upkeep of single booking inserts.
+
+FREE = {
+    "subquery": """NOT EXISTS (
+            SELECT 1 FROM booking b
+            WHERE b.PropertyID = ps.PropertyID
+              AND b.StartDate <= %(check_out)s AND b.EndDate >= %(check_in)s
+        )""",
+    "table": """EXISTS (
+            SELECT 1 FROM property_availability pa
+            WHERE pa.PropertyID = ps.PropertyID
+              AND pa.FreeUntil >= upper(%(stay)s)
+              AND pa.FreeFrom <= lower(%(stay)s)
+        )""",
+}
+
+QUERIES = {
+    "first page": """
+        SELECT ps.PropertyID FROM property_search ps
+        WHERE ps.Availability = 'Active' AND {free}
+        ORDER BY ps.PropertyID
+        LIMIT %(limit)s
+    """,
+    "city by price": """
+        SELECT ps.PropertyID FROM property_search ps
+        WHERE ps.Availability = 'Active' AND ps.City = %(city)s AND {free}
+        ORDER BY ps.Price, ps.PropertyID
+        LIMIT %(limit)s
+    """,
+    "count free": """
+        SELECT count(*) FROM property_search ps
+        WHERE ps.Availability = 'Active' AND {free}
+    """,
+}
+
+
+def random_stay(rng, days, limit):
+    # seed_catalog books each property back to back from January 2025
+    check_in = date(2025, 1, 1) + timedelta(days=rng.randrange(days))
+    check_out = check_in + timedelta(days=rng.randint(0, 14))
+    return {
+        "check_in": check_in,
+        "check_out": check_out,
+        "stay": DateRange(check_in, check_out, "[]"),
+        "city": rng.choice(CITIES)[0],
+        "limit": limit,
+    }
+
+
+def run(cur, query, variant, stays):
+    sql = QUERIES[query].format(free=FREE[variant])
+    walls, plans, execs, results = [], [], [], []
+    for params in stays:
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        walls.append(time.perf_counter() - start)
+        results.append(rows)
+        plan_ms, exec_ms = explain_times(cur, sql, params)
+        plans.append(plan_ms)
+        execs.append(exec_ms)
+    return walls, plans, execs, results
+
+
+def time_inserts(cur, ids, with_trigger):
+    """Mean ms of single-row booking inserts (far-future dates, no overlaps)."""
+    if not with_trigger:
+        cur.execute("ALTER TABLE booking DISABLE TRIGGER booking_availability_insert")
+    tag = "on" if with_trigger else "off"
+    walls = []
+    for n, prop_id in enumerate(ids):
+        start_date = date(2040, 1, 1) + timedelta(days=30 * n + (15 if with_trigger else 0))
+        start = time.perf_counter()
+        cur.execute(
+            "INSERT INTO booking (BookingID, PropertyID, StartDate, EndDate) VALUES (%s, %s, %s, %s)",
+            (f"bench-avail-{tag}-{n}", prop_id, start_date, start_date + timedelta(days=7)),
+        )
+        walls.append(time.perf_counter() - start)
+    if not with_trigger:
+        cur.execute("ALTER TABLE booking ENABLE TRIGGER booking_availability_insert")
+    return statistics.mean(walls) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stay search: booking subquery vs property_availability.")
+    parser.add_argument("--properties", type=int, default=100000)
+    parser.add_argument("--bookings-per-property", type=int, default=12)
+    parser.add_argument("--stays", type=int, default=100, help="random check-in/check-out searches per query")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--inserts", type=int, default=200, help="single booking inserts timed for upkeep")
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    try:
+        print(f"Seeding {args.properties} properties ...")
+        start = time.perf_counter()
+        seed_catalog(cur, args.properties, bookings_per_property=args.bookings_per_property, agents=100, seed=args.seed)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s (property_availability filled by its triggers)")
+
+        rng = random.Random(args.seed)
+        # seeded bookings average ~23 days apart; keep the stays inside the history
+        days = max(1, 23 * args.bookings_per_property)
+        stays = [random_stay(rng, days, args.limit) for _ in range(args.stays)]
+        print(f"\n{len(stays)} random stays per query")
+        print(f"{'query':<15}{'variant':<10}{'wall p50 ms':>14}{'wall mean ms':>15}{'plan ms':>10}{'exec ms':>10}")
+        for query in QUERIES:
+            # warm both variants' caches before measuring
+            for variant in FREE:
+                run(cur, query, variant, stays[:10])
+            results = {}
+            for variant in FREE:
+                walls, plans, execs, results[variant] = run(cur, query, variant, stays)
+                print(
+                    f"{query:<15}{variant:<10}{statistics.median(walls) * 1000:>14.3f}"
+                    f"{statistics.mean(walls) * 1000:>15.3f}{statistics.mean(plans):>10.3f}{statistics.mean(execs):>10.3f}"
+                )
+            print(f"{'':<15}identical results: {results['subquery'] == results['table']}")
+
+        ids = [f"bench-p{i}" for i in rng.sample(range(args.properties), min(args.inserts, args.properties))]
+        plain = time_inserts(cur, ids, with_trigger=False)
+        synced = time_inserts(cur, ids, with_trigger=True)
+        print(f"\nsingle booking insert ({len(ids)} runs)")
+        print(f"{'without availability trigger':<30}{plain:>8.3f} ms")
+        print(f"{'with availability trigger':<30}{synced:>8.3f} ms")
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import os
+import sys
+import time
+
+import psycopg2
+import psycopg2.extensions
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from main import DB_CONFIG  # noqa: E402
+from repositories import PROPERTY_LIST_SQL  # noqa: E402
+from seed import seed_catalog  # noqa: E402
+
+# bench_list_properties.py
+# Compares the old N+1 school lookup in list_all_properties with the single
+# aggregated PROPERTY_LIST_SQL. Seed rows are inserted inside one transaction
+# and rolled back at the end, so the database is left untouched.
+
+LEGACY_LIST_SQL = """
+    SELECT p.propertyid, p.type, p.description, p.price, p.availability, p.crimerate,
+           l.address, l.city, l.state, l.zipcode, l.country
+    FROM property p
+    JOIN locations l ON p.locationid = l.locationid
+    ORDER BY l.city, l.state, p.price;
+"""
+
+LEGACY_SCHOOL_SQL = """
+    SELECT s.name, pxs.distancemiles
+    FROM property_x_school pxs
+    JOIN school s ON pxs.schoolid = s.schoolid
+    WHERE pxs.propertyid = %s
+    ORDER BY pxs.distancemiles NULLS LAST, s.name;
+"""
+
+class CountingCursor(psycopg2.extensions.cursor):
+    """Cursor that counts execute() calls (one round trip each)."""
+
+    executes = 0
+
+    def execute(self, query, vars=None):
+        CountingCursor.executes += 1
+        return super().execute(query, vars)
+
+
+def legacy_listing(cur):
+    """Original shape: one listing query plus one school query per property."""
+    cur.execute(LEGACY_LIST_SQL)
+    out = []
+    for row in cur.fetchall():
+        cur.execute(LEGACY_SCHOOL_SQL, (row[0],))
+        out.append((row, cur.fetchall()))
+    return out
+
+
+def batched_listing(cur):
+    """New shape: schools aggregated into the listing query."""
+    cur.execute(PROPERTY_LIST_SQL + " ORDER BY l.city, l.state, p.price")
+    out = []
+    for row in cur.fetchall():
+        names, dists = row[-2], row[-1]
+        out.append((row[:-2], list(zip(names or [], dists or []))))
+    return out
+
+
+def measure(cur, fn, repeat):
+    timings = []
+    trips = 0
+    result = None
+    for _ in range(repeat):
+        CountingCursor.executes = 0
+        start = time.perf_counter()
+        result = fn(cur)
+        timings.append(time.perf_counter() - start)
+        trips = CountingCursor.executes
+    return min(timings), trips, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list_all_properties school lookups.")
+    parser.add_argument("--properties", type=int, default=20000)
+    parser.add_argument("--schools", type=int, default=500)
+    parser.add_argument("--schools-per-property", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+        cursor_factory=CountingCursor,
+    )
+    cur = conn.cursor()
+    try:
+        print(f"Seeding {args.properties} properties ...")
+        seed_catalog(
+            cur,
+            args.properties,
+            schools=args.schools,
+            schools_per_property=args.schools_per_property,
+            seed=args.seed,
+        )
+
+        legacy_time, legacy_trips, legacy_rows = measure(cur, legacy_listing, args.repeat)
+        batched_time, batched_trips, batched_rows = measure(cur, batched_listing, args.repeat)
+
+        # ties on (city, state, price) may come back in either order
+        same = {r[0][0]: [s[0] for s in r[1]] for r in legacy_rows} == {
+            r[0][0]: [s[0] for s in r[1]] for r in batched_rows
+        }
+        print(f"{'variant':<10}{'round trips':>14}{'wall time (s)':>16}")
+        print(f"{'N+1':<10}{legacy_trips:>14}{legacy_time:>16.3f}")
+        print(f"{'batched':<10}{batched_trips:>14}{batched_time:>16.3f}")
+        print(f"speedup: {legacy_time / batched_time:.1f}x, identical output: {same}")
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
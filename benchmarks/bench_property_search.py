@@ -0,0 +1,183 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import search  # noqa: E402
+from bench_search import explain_times, random_search  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from seed import seed_catalog  # noqa: E402
+
+# bench_property_search.py
+# Join savings of the property_search table (SQL/migrations/004). Seeds a large
+# catalog (1M properties by default, rolled back afterwards) and runs the same
+# search workload and booking listing pages against
+#   join   - property JOIN locations LEFT JOIN house / apartment (the old SQL)
+#   table  - property_search (what search.py and renter_book_property use now)
+# reporting wall time and the server's planning/execution time. Also times the
+# trigger upkeep: a batch price update with and without the refresh trigger.
+
+JOIN_SELECT = """
+    SELECT p.PropertyID,
+           p.Type,
+           p.ListingType,
+           p.Description,
+           p.Price,
+           l.City,
+           l.State,
+           COALESCE(h.NumRooms, a.NumRooms) AS Bedrooms,
+           NULL::real AS Rank
+    FROM property p
+    JOIN locations l ON p.LocationID = l.LocationID
+    LEFT JOIN house h ON p.PropertyID = h.PropertyID
+    LEFT JOIN apartment a ON p.PropertyID = a.PropertyID
+    WHERE p.Availability = 'Active'
+"""
+
+# renter_book_property page: before (join, agent looked up afterwards) and now
+BOOK_PAGE_SQL = {
+    "join": """
+        SELECT p.PropertyID, p.Type, p.Description, p.Price, l.City, l.State,
+               COALESCE(h.NumRooms, a.NumRooms) AS Bedrooms
+        FROM property p
+        JOIN locations l ON p.LocationID = l.LocationID
+        LEFT JOIN house h ON p.PropertyID = h.PropertyID
+        LEFT JOIN apartment a ON p.PropertyID = a.PropertyID
+        WHERE p.Availability = 'Active' AND p.PropertyID > %s
+        ORDER BY p.PropertyID
+        LIMIT %s
+    """,
+    "table": """
+        SELECT ps.PropertyID, ps.Type, ps.Description, ps.Price, ps.City, ps.State,
+               ps.Bedrooms, ps.AgentID
+        FROM property_search ps
+        WHERE ps.Availability = 'Active' AND ps.PropertyID > %s
+        ORDER BY ps.PropertyID
+        LIMIT %s
+    """,
+}
+
+
+def join_statement(shape):
+    """search.build_statement for a shape, rewritten onto the old join."""
+    sql = search.build_statement(shape)
+    sql = sql.replace(search.SEARCH_SELECT.format(rank=search.NO_RANK), JOIN_SELECT)
+    sql = sql.replace("ps.Bedrooms", "COALESCE(h.NumRooms, a.NumRooms)")
+    sql = sql.replace("ps.City", "l.City").replace("ps.State", "l.State")
+    return sql.replace("ps.", "p.")
+
+
+def run_searches(cur, workload, limit, variant):
+    walls, plans, execs, results = [], [], [], []
+    for filters, sort in workload:
+        shape = search.statement_shape(filters, sort)
+        sql = join_statement(shape) if variant == "join" else search.build_statement(shape)
+        params = search.statement_params(filters, shape, None, limit)
+        start = time.perf_counter()
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+        walls.append(time.perf_counter() - start)
+        results.append([r[0] for r in rows])
+        plan_ms, exec_ms = explain_times(cur, sql, params)
+        plans.append(plan_ms)
+        execs.append(exec_ms)
+    return walls, plans, execs, results
+
+
+def run_book_pages(cur, keys, limit, variant):
+    walls, plans, execs, results = [], [], [], []
+    for key in keys:
+        start = time.perf_counter()
+        cur.execute(BOOK_PAGE_SQL[variant], (key, limit))
+        rows = cur.fetchall()
+        if variant == "join" and rows:
+            # the old flow looked up the agent of the chosen property separately
+            cur.execute("SELECT AgentID FROM property WHERE PropertyID = %s", (rows[0][0],))
+            cur.fetchone()
+        walls.append(time.perf_counter() - start)
+        results.append([r[0] for r in rows])
+        plan_ms, exec_ms = explain_times(cur, BOOK_PAGE_SQL[variant], (key, limit))
+        plans.append(plan_ms)
+        execs.append(exec_ms)
+    return walls, plans, execs, results
+
+
+def time_price_update(cur, ids, with_trigger):
+    if not with_trigger:
+        cur.execute("ALTER TABLE property DISABLE TRIGGER property_search_update")
+    start = time.perf_counter()
+    cur.execute("UPDATE property SET Price = Price + 1 WHERE PropertyID = ANY (%s)", (ids,))
+    elapsed = time.perf_counter() - start
+    if not with_trigger:
+        cur.execute("ALTER TABLE property ENABLE TRIGGER property_search_update")
+    return elapsed
+
+
+def print_rows(title, variants):
+    print(f"\n{title}")
+    print(f"{'variant':<10}{'wall p50 ms':>14}{'wall mean ms':>15}{'plan ms':>10}{'exec ms':>10}")
+    for label, (walls, plans, execs, _) in variants:
+        print(
+            f"{label:<10}{statistics.median(walls) * 1000:>14.3f}{statistics.mean(walls) * 1000:>15.3f}"
+            f"{statistics.mean(plans):>10.3f}{statistics.mean(execs):>10.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark property_search against the property joins.")
+    parser.add_argument("--properties", type=int, default=1000000)
+    parser.add_argument("--bookings-per-property", type=int, default=1)
+    parser.add_argument("--searches", type=int, default=300)
+    parser.add_argument("--pages", type=int, default=200, help="booking listing pages at random offsets")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--updates", type=int, default=1000, help="properties in the price update batch")
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    try:
+        print(f"Seeding {args.properties} properties ...")
+        start = time.perf_counter()
+        seed_catalog(cur, args.properties, bookings_per_property=args.bookings_per_property, agents=100, seed=args.seed)
+        print(f"Seeded in {time.perf_counter() - start:.1f}s (property_search filled by its triggers)")
+
+        rng = random.Random(args.seed)
+        workload = [random_search(rng) for _ in range(args.searches)]
+        keys = [f"bench-p{rng.randrange(args.properties)}" for _ in range(args.pages)]
+        # warm both variants' caches before measuring
+        run_searches(cur, workload, args.limit, "join")
+        run_searches(cur, workload, args.limit, "table")
+        searches = {v: run_searches(cur, workload, args.limit, v) for v in ("join", "table")}
+        pages = {v: run_book_pages(cur, keys, args.limit, v) for v in ("join", "table")}
+
+        print_rows(f"{len(workload)} searches", searches.items())
+        print(f"identical results: {searches['join'][3] == searches['table'][3]}")
+        print_rows(f"{len(keys)} booking listing pages", pages.items())
+        print(f"identical results: {pages['join'][3] == pages['table'][3]}")
+
+        ids = [f"bench-p{i}" for i in rng.sample(range(args.properties), min(args.updates, args.properties))]
+        plain = time_price_update(cur, ids, with_trigger=False)
+        synced = time_price_update(cur, ids, with_trigger=True)
+        print(f"\nprice update of {len(ids)} properties")
+        print(f"{'without refresh trigger':<26}{plain * 1000:>10.1f} ms")
+        print(f"{'with refresh trigger':<26}{synced * 1000:>10.1f} ms")
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
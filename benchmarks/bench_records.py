@@ -0,0 +1,168 @@
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+import psycopg2
+import psycopg2.extras
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from main import DB_CONFIG  # noqa: E402
+from records import AgentBooking, record_cursor  # noqa: E402
+
+# bench_records.py
+# Python memory of fetched booking rows by representation. The server
+# generates --rows bookings shaped like manage_agent_bookings' rows (14
+# columns: ids, texts, price, dates, renter, card), nothing is written. Each
+# variant fetches them all and reports the memory the result list holds
+# (tracemalloc, so libpq's own buffer is not counted) and the fetch time:
+#   tuple  - plain cursor rows (main.py before repositories.py)
+#   dict   - RealDictCursor, one dict per row (tuple rows turned into dicts)
+#   record - records.AgentBooking NamedTuples from RecordCursor (now)
+#   slots  - the same fields as a dataclass(slots=True), for comparison
+#   stream - AgentBooking records through a named cursor, none kept: Python
+#            holds one row at a time (libpq buffers --itersize rows, untraced)
+# "overhead/row" is the memory per row beyond the tuple variant; the column
+# values themselves (str, Decimal, date objects) are the same in every variant.
+
+BOOKINGS_SQL = """
+    SELECT md5(i::text)::uuid::text AS booking_id,
+           md5((i %% 20000)::text)::uuid::text AS property_id,
+           (ARRAY['House', 'Apartment', 'CommercialBuilding', 'Land', 'VacationHome'])[1 + i %% 5] AS type,
+           'Bright ' || (1 + i %% 6) || ' bedroom place near the park' AS description,
+           (500 + i %% 4500)::numeric(10, 2) AS price,
+           (100 + i %% 9000) || ' Main St' AS address,
+           (ARRAY['Chicago', 'Houston', 'Phoenix', 'Seattle', 'Denver'])[1 + i %% 5] AS city,
+           (ARRAY['IL', 'TX', 'AZ', 'WA', 'CO'])[1 + i %% 5] AS state,
+           lpad((10000 + i %% 89999)::text, 5, '0') AS zip_code,
+           date '2025-01-01' + i %% 700 AS start_date,
+           date '2025-01-01' + i %% 700 + 1 + i %% 14 AS end_date,
+           'Renter ' || (i %% 50000) AS renter_name,
+           'renter' || (i %% 50000) || '@example.com' AS renter_email,
+           '4' || lpad((i::bigint * 7919 %% 1000000000000000)::text, 15, '0') AS card_number
+    FROM generate_series(1, %s) i
+"""
+
+
+@dataclass(slots=True)
+class SlotsBooking:
+    booking_id: str
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    start_date: date
+    end_date: date
+    renter_name: str
+    renter_email: str
+    card_number: str
+
+    @classmethod
+    def _make(cls, row):
+        return cls(*row)
+
+
+def open_cursor(conn, variant, itersize):
+    if variant == "tuple":
+        return conn.cursor()
+    if variant == "dict":
+        return conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    if variant == "record":
+        return record_cursor(conn, AgentBooking)
+    if variant == "slots":
+        return record_cursor(conn, SlotsBooking)
+    cur = record_cursor(conn, AgentBooking, name="bench_records_stream")
+    cur.itersize = itersize
+    return cur
+
+
+def fetch(conn, variant, rows, itersize, traced):
+    """(seconds, list kept or None, traced bytes kept, traced peak bytes)."""
+    cur = open_cursor(conn, variant, itersize)
+    start = time.perf_counter()
+    cur.execute(BOOKINGS_SQL, (rows,))
+    if traced:
+        # the client-side result is already in libpq memory; only the Python
+        # objects built from it are traced
+        tracemalloc.start()
+    if variant == "stream":
+        kept = None
+        count = sum(1 for _ in cur)
+        assert count == rows
+    else:
+        kept = cur.fetchall()
+    elapsed = time.perf_counter() - start
+    current = peak = 0
+    if traced:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    cur.close()
+    return elapsed, kept, current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory of booking rows: tuples, dicts and records.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--itersize", type=int, default=2000, help="rows per round trip of the stream variant")
+    parser.add_argument(
+        "--variants", nargs="+", default=["tuple", "dict", "record", "slots", "stream"],
+        choices=["tuple", "dict", "record", "slots", "stream"],
+    )
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    results = {}
+    try:
+        print(f"{args.rows} booking rows per variant")
+        for variant in args.variants:
+            # untraced run for the time (tracemalloc slows allocation down),
+            # traced run for the memory
+            elapsed, kept, _, _ = fetch(conn, variant, args.rows, args.itersize, traced=False)
+            container = 0
+            if kept:
+                container = sys.getsizeof(kept[0])
+            del kept
+            gc.collect()
+            _, kept, current, peak = fetch(conn, variant, args.rows, args.itersize, traced=True)
+            del kept
+            gc.collect()
+            results[variant] = (elapsed, current, peak, container)
+            conn.rollback()
+    finally:
+        conn.rollback()
+        conn.close()
+
+    base = results.get("tuple")
+    print(
+        f"{'variant':<9}{'fetch s':>9}{'kept MB':>10}{'peak MB':>10}{'bytes/row':>11}"
+        f"{'row object':>12}{'overhead/row':>14}"
+    )
+    for variant, (elapsed, current, peak, container) in results.items():
+        if variant == "stream":
+            per_row = container = overhead = "-"
+        else:
+            per_row = f"{current / args.rows:.0f}"
+            overhead = f"{(current - base[1]) / args.rows:+.0f}" if base else "-"
+        print(
+            f"{variant:<9}{elapsed:>9.2f}{current / 2**20:>10.1f}{peak / 2**20:>10.1f}"
+            f"{per_row:>11}{container:>12}{overhead:>14}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+
+import numpy as np
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import reports  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+
+# bench_reports.py
+# reports.py at portfolio scale. The server generates --rows bookings (default
+# 10M) in the layout of reports.BOOKING_COLUMNS_SQL over --years years from
+# 2020-01-01, spread over 30 cities in 10 states and 5 property types; nothing
+# is written. Timed:
+#   copy     - the COPY (FORMAT binary) read into BookingColumns, as
+#              load_bookings does
+#   summary  - reports.summary() per group over the whole window
+#   curve    - reports.occupancy() per period (by city)
+#   python   - the city summary row by row in Python from plain cursor tuples,
+#              the way a report over the booking views would be written;
+#              measured on --python-rows bookings and scaled to --rows
+
+BOOKINGS_SQL = """
+    SELECT s.start,
+           s.start + 1 + i %% 14,
+           (CASE WHEN i %% 11 = 0 THEN %(unknown)s ELSE s.start - i * 13 %% 181 END)::int4,
+           (5000 + i::int8 * 104729 %% 500000)::int8,
+           (i * 37 %% 30)::int4,
+           (i / 30 %% 5)::int4
+    FROM generate_series(1, %(rows)s) i
+    CROSS JOIN LATERAL (SELECT (%(first)s + i::int8 * 7919 %% %(days)s)::int4 AS start) s
+"""
+
+CITIES = [(f"City {i}", f"S{i % 10}") for i in range(30)]
+TYPES = ["Apartment", "CommercialBuilding", "House", "Land", "VacationHome"]
+BOOKINGS_PER_PROPERTY = 40
+
+
+def connect():
+    return psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+
+
+def bookings_sql(cur, rows, start, end):
+    params = {
+        "unknown": int(reports.UNKNOWN_DAY),
+        "rows": rows,
+        "first": reports.day_number(start),
+        "days": (end - start).days - 14,  # every stay ends inside the window
+    }
+    return cur.mogrify(BOOKINGS_SQL, params).decode()
+
+
+def python_summary(cur, lo, hi):
+    """The city summary of reports.summary(), one booking tuple at a time."""
+    nights = defaultdict(int)
+    revenue = defaultdict(int)
+    stays = defaultdict(list)
+    leads = defaultdict(list)
+    for start, end, booked, price, city, _ in cur:
+        first, last = min(max(start, lo), hi), min(max(end, lo), hi)
+        nights[city] += last - first
+        revenue[city] += price * (last - first)
+        if lo <= start < hi:
+            stays[city].append(end - start)
+            if booked != reports.UNKNOWN_DAY:
+                leads[city].append(start - booked)
+    return {
+        city: (nights[city], revenue[city], statistics.mean(stays[city]), statistics.median(stays[city]),
+               statistics.mean(leads[city]), statistics.median(leads[city]))
+        for city in stays
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reports.py occupancy and revenue reports.")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--python-rows", type=int, default=1000000, help="bookings of the row-by-row baseline")
+    args = parser.parse_args()
+
+    start = date(2020, 1, 1)
+    end = date(2020 + args.years, 1, 1)
+    properties = np.full((len(CITIES), len(TYPES)), args.rows // BOOKINGS_PER_PROPERTY // (len(CITIES) * len(TYPES)))
+
+    conn = connect()
+    timings = []
+    try:
+        with conn.cursor() as cur:
+            sql = f"COPY ({bookings_sql(cur, args.rows, start, end)}) TO STDOUT (FORMAT binary)"
+            copy_s, rows = timed(reports.copy_rows, cur, sql, reports.COPY_ROW)
+            size = rows.nbytes
+            convert_s, cols = timed(reports.booking_columns, rows, CITIES, TYPES, properties)
+            del rows
+        conn.rollback()
+        timings.append(("copy", copy_s + convert_s, args.rows))
+        print(f"{args.rows} bookings, {size / 2**20:.0f} MB of COPY data, "
+              f"{sum(a.nbytes for a in cols[:6]) / 2**20:.0f} MB of columns")
+
+        for group in reports.GROUPS:
+            elapsed, result = timed(reports.summary, cols, start, end, group)
+            timings.append((f"summary {group}", elapsed, args.rows))
+        nights = sum(row["nights"] for row in result)
+        print(f"{nights} nights, {int(properties.sum())} properties, "
+              f"occupancy {reports.percent(nights, properties.sum() * (end - start).days)}%")
+        for period in reports.PERIODS:
+            elapsed, result = timed(reports.occupancy, cols, start, end, period, "city")
+            timings.append((f"curve {period}", elapsed, args.rows))
+        del cols
+
+        if args.python_rows:
+            with conn.cursor() as cur:
+                cur.execute(bookings_sql(cur, args.python_rows, start, end))
+                lo, hi = reports.day_number(start), reports.day_number(end)
+                elapsed, _ = timed(python_summary, cur, lo, hi)
+            conn.rollback()
+            # fetch (already done by execute) is not counted, only the loop
+            timings.append(("python city", elapsed * args.rows / args.python_rows, args.python_rows))
+    finally:
+        conn.rollback()
+        conn.close()
+
+    print(f"{'step':<16}{'seconds':>10}{'bookings/s':>14}")
+    for name, elapsed, measured in timings:
+        scaled = f" (from {measured})" if measured != args.rows else ""
+        print(f"{name:<16}{elapsed:>10.2f}{args.rows / elapsed:>14,.0f}{scaled}")
+
+
+if __name__ == "__main__":
+    main()
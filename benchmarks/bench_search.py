@@ -0,0 +1,158 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import search  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from seed import CITIES, TYPES, seed_catalog  # noqa: E402
+
+# bench_search.py
+# Micro-benchmark of search_properties: the old per-search SQL text versus the
+# canonical statement shapes of search.py. Reports client wall time and the
+# server's planning/execution time (EXPLAIN ANALYZE) per search.
+
+
+def legacy_sql(filters, sort, limit):
+    """The pre-search.py statement: SQL text concatenated per filter combination."""
+    query = search.SEARCH_SELECT.format(rank=search.NO_RANK)
+    params = []
+    if filters["city"]:
+        query += " AND ps.City = %s"
+        params.append(filters["city"])
+    if filters["state"]:
+        query += " AND ps.State = %s"
+        params.append(filters["state"])
+    if filters["type"]:
+        query += " AND ps.Type = %s"
+        params.append(filters["type"])
+    if filters["listing_type"]:
+        query += " AND ps.ListingType = %s"
+        params.append(filters["listing_type"])
+    if filters["min_price"] is not None:
+        query += " AND ps.Price >= %s"
+        params.append(filters["min_price"])
+    if filters["max_price"] is not None:
+        query += " AND ps.Price <= %s"
+        params.append(filters["max_price"])
+    if filters["min_bedrooms"] is not None:
+        query += " AND ps.Bedrooms >= %s"
+        params.append(filters["min_bedrooms"])
+    if filters["stay"] is not None:
+        query += """
+            AND NOT EXISTS (
+                SELECT 1 FROM booking b
+                WHERE b.PropertyID = ps.PropertyID
+                  AND b.StartDate <= %s AND b.EndDate >= %s
+            )
+        """
+        params.extend([filters["stay"].upper, filters["stay"].lower])
+    keys = search.SORT_KEYS[sort][0]
+    query += " ORDER BY " + ", ".join(keys) + " LIMIT %s"
+    params.append(limit)
+    return query, params
+
+
+def random_search(rng):
+    def maybe(value, p=0.5):
+        return value if rng.random() < p else None
+
+    city, state = rng.choice(CITIES)
+    low = rng.choice([None, 500, 1000, 2000])
+    check_in = maybe(date(2025, 1, 1) + timedelta(days=rng.randint(0, 120)), 0.3)
+    filters = search.normalize_filters(
+        city=maybe(city, 0.7),
+        state=maybe(state, 0.3),
+        prop_type=maybe(rng.choice(TYPES), 0.3),
+        listing_type=maybe(rng.choice(["Rent", "Sale"])),
+        min_price=low,
+        max_price=maybe(rng.choice([2500, 3500, 5000])),
+        min_bedrooms=maybe(rng.randint(1, 4), 0.3),
+        check_in=check_in,
+        check_out=check_in + timedelta(days=rng.randint(0, 7)) if check_in else None,
+    )
+    return filters, rng.choice(["price", "bedrooms", "none"])
+
+
+def explain_times(cur, sql, params):
+    cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, params)
+    plan = cur.fetchone()[0][0]
+    return plan["Planning Time"], plan["Execution Time"]
+
+
+def run(cur, conn, workload, limit, shapes):
+    walls, plans, execs, results = [], [], [], []
+    for filters, sort in workload:
+        start = time.perf_counter()
+        if shapes:
+            rows = search.execute_search(conn, filters, sort, limit=limit)
+        else:
+            sql, params = legacy_sql(filters, sort, limit)
+            cur.execute(sql, params)
+            rows = cur.fetchall()
+        walls.append(time.perf_counter() - start)
+        results.append([r[0] for r in rows])
+
+        if shapes:
+            sql, params, _ = search.search_statement(filters, sort, limit=limit)
+        else:
+            sql, params = legacy_sql(filters, sort, limit)
+        plan_ms, exec_ms = explain_times(cur, sql, params)
+        plans.append(plan_ms)
+        execs.append(exec_ms)
+    return walls, plans, execs, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search_properties statements.")
+    parser.add_argument("--properties", type=int, default=50000)
+    parser.add_argument("--bookings-per-property", type=int, default=3)
+    parser.add_argument("--searches", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured rounds")
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    try:
+        print(f"Seeding {args.properties} properties ...")
+        seed_catalog(cur, args.properties, bookings_per_property=args.bookings_per_property, seed=args.seed)
+        rng = random.Random(args.seed)
+        workload = [random_search(rng) for _ in range(args.searches)]
+
+        for _ in range(args.warmup):
+            run(cur, conn, workload, args.limit, shapes=False)
+            run(cur, conn, workload, args.limit, shapes=True)
+        legacy = run(cur, conn, workload, args.limit, shapes=False)
+        canonical = run(cur, conn, workload, args.limit, shapes=True)
+
+        shapes = {search.statement_shape(f, s) for f, s in workload}
+        print(f"{len(workload)} searches, {len(shapes)} statement shapes")
+        print(f"{'variant':<10}{'wall p50 ms':>14}{'wall mean ms':>15}{'plan ms':>10}{'exec ms':>10}")
+        for label, (walls, plans, execs, _) in (("concat", legacy), ("shapes", canonical)):
+            print(
+                f"{label:<10}{statistics.median(walls) * 1000:>14.3f}{statistics.mean(walls) * 1000:>15.3f}"
+                f"{statistics.mean(plans):>10.3f}{statistics.mean(execs):>10.3f}"
+            )
+        print(f"identical results: {legacy[3] == canonical[3]}")
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import db_pool  # noqa: E402
+import main as app  # noqa: E402
+import query_stats  # noqa: E402
+
+# bench_workflows.py
+# End-to-end benchmark of the interactive workflows in main.py. Each workflow is
+# driven by scripted input() answers with stdout captured, against whatever the
+# configured database holds (seed it with generate_data.py first). Reports
+# p50/p95/p99 latency, statements executed and rows fetched per run as JSON.
+#
+# renter_book_property commits real bookings; they are dated from 2040 on and
+# deleted at the end, and the renters' rewards points are restored.
+#
+# Example:
+#   python generate_data.py --properties 100K --truncate
+#   python benchmarks/bench_workflows.py --runs 200 --output before.json
+#   python benchmarks/bench_workflows.py --runs 200 --baseline before.json
+
+BOOKING_EPOCH = date(2040, 1, 1)
+PAGER_PROMPT = "Select an option (blank when done): "
+ERROR_LINE = re.compile(r"error:", re.IGNORECASE)
+
+
+class ScriptedInput:
+    """Stand-in for input(): answers come from a script, pager prompts from pages."""
+
+    def __init__(self, answers, pages=()):
+        self.answers = list(answers)
+        self.pages = list(pages)
+
+    def __call__(self, prompt=""):
+        if prompt == PAGER_PROMPT:
+            return self.pages.pop(0) if self.pages else ""
+        if not self.answers:
+            raise RuntimeError(f"script ran out of answers at prompt {prompt!r}")
+        return self.answers.pop(0)
+
+
+def direct_connection():
+    return psycopg2.connect(
+        host=app.DB_CONFIG["host"],
+        database=app.DB_CONFIG["dbname"],
+        user=app.DB_CONFIG["user"],
+        password=app.DB_CONFIG["password"],
+        port=app.DB_CONFIG["port"],
+    )
+
+
+def load_fixtures(cur, rng, sample=500):
+    """Users, agents, cities and zip codes the scripted workflows pick from."""
+    cur.execute(
+        """
+        SELECT u.Email, r.RenterID
+        FROM users u
+        JOIN renter r ON r.UserID = u.UserID
+        WHERE EXISTS (SELECT 1 FROM card c WHERE c.RenterID = r.RenterID)
+        ORDER BY u.UserID
+        LIMIT %s
+        """,
+        (sample,),
+    )
+    renters = cur.fetchall()
+    cur.execute(
+        """
+        SELECT u.Email
+        FROM users u
+        JOIN agent a ON a.UserID = u.UserID
+        WHERE EXISTS (
+            SELECT 1 FROM property p JOIN booking b ON b.PropertyID = p.PropertyID
+            WHERE p.AgentID = a.AgentID
+        )
+        ORDER BY u.UserID
+        LIMIT %s
+        """,
+        (sample,),
+    )
+    agents = [r[0] for r in cur.fetchall()]
+    cur.execute(
+        "SELECT DISTINCT l.City, l.State FROM property p JOIN locations l ON p.LocationID = l.LocationID"
+    )
+    cities = cur.fetchall()
+    cur.execute("SELECT ZipCode FROM geocode_zip ORDER BY ZipCode LIMIT %s", (sample,))
+    zips = [r[0] for r in cur.fetchall()]
+    if not renters or not agents or not cities:
+        raise SystemExit("Database needs renters with cards, agents with bookings and properties.")
+    rng.shuffle(renters)
+    rng.shuffle(agents)
+    return {"renters": renters, "agents": agents, "cities": cities, "zips": zips}
+
+
+def search_answers(rng, fixtures):
+    def maybe(value, p=0.5):
+        return str(value) if rng.random() < p else ""
+
+    city, state = rng.choice(fixtures["cities"])
+    low = rng.choice([0, 500, 1000, 100000])
+    near = maybe(rng.choice(fixtures["zips"]), 0.2) if fixtures["zips"] else ""
+    check_in = maybe(date(2025, 1, 1) + timedelta(days=rng.randrange(730)), 0.2)
+    return [
+        maybe(city, 0.6),
+        maybe(state, 0.4),
+        maybe(rng.choice(["House", "Apartment", "CommercialBuilding", "Land", "VacationHome"]), 0.4),
+        maybe(rng.choice(["Rent", "Sale"]), 0.5),
+        maybe(low, 0.4),
+        maybe(low * 5 + 5000, 0.3),
+        maybe(rng.randint(1, 4), 0.3),
+        check_in,
+    ] + ([maybe(date.fromisoformat(check_in) + timedelta(days=rng.randint(1, 7)), 0.7)] if check_in else []) + [
+        maybe(rng.choice(["live", "rent", "fun place", "relax"]), 0.2),
+        near,
+    ] + ([str(rng.choice([2, 5, 25]))] if near else []) + [
+        rng.choice(["price", "bedrooms", "relevance", "none"]),
+    ]
+
+
+def book_answers(rng):
+    start = BOOKING_EPOCH + timedelta(days=rng.randrange(36500))
+    end = start + timedelta(days=rng.randint(1, 7))
+    return [str(rng.randint(1, app.PAGE_SIZE)), str(start), str(end), "1", "y"]
+
+
+# workflow -> (login pool, scripted answers, pager answers) for one run
+WORKFLOWS = {
+    "login": lambda rng, fx: (None, [rng.choice(fx["renters"] + [(a,) for a in fx["agents"]])[0]], []),
+    "search_properties": lambda rng, fx: (None, search_answers(rng, fx), ["n", ""]),
+    "list_all_properties": lambda rng, fx: (None, [], ["n", ""]),
+    "renter_book_property": lambda rng, fx: ("renters", book_answers(rng), []),
+    "renter_manage_bookings": lambda rng, fx: ("renters", ["1", "0"], []),
+    "manage_agent_bookings": lambda rng, fx: ("agents", ["0"], []),
+    "agent_dashboard": lambda rng, fx: ("agents", ["1", "2", "3", "0"], []),
+}
+
+
+def log_in(email):
+    builtins.input = ScriptedInput([email])
+    with contextlib.redirect_stdout(io.StringIO()):
+        if not app.login():
+            raise SystemExit(f"Could not log in as {email}")
+
+
+def run_workflow(name, rng, fixtures):
+    """One scripted run; returns (seconds, statements, rows, output)."""
+    role, answers, pages = WORKFLOWS[name](rng, fixtures)
+    app.current_session = None
+    if role == "renters":
+        log_in(rng.choice(fixtures["renters"])[0])
+    elif role == "agents":
+        log_in(rng.choice(fixtures["agents"]))
+
+    builtins.input = ScriptedInput(answers, pages)
+    out = io.StringIO()
+    before = query_stats.STATS.totals()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(out):
+        getattr(app, name)()
+    elapsed = time.perf_counter() - started
+    after = query_stats.STATS.totals()
+    statements = after["statements"] - before["statements"]
+    return elapsed, statements, after["rows"] - before["rows"], out.getvalue()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, -(-len(sorted_values) * pct // 100) - 1)
+    return sorted_values[int(index)]
+
+
+def summarize(samples):
+    times = sorted(s[0] * 1000 for s in samples)
+    return {
+        "runs": len(samples),
+        "p50_ms": round(percentile(times, 50), 3),
+        "p95_ms": round(percentile(times, 95), 3),
+        "p99_ms": round(percentile(times, 99), 3),
+        "mean_ms": round(sum(times) / len(times), 3),
+        "queries_per_run": round(sum(s[1] for s in samples) / len(samples), 2),
+        "rows_per_run": round(sum(s[2] for s in samples) / len(samples), 2),
+        "errors": sum(1 for s in samples if ERROR_LINE.search(s[3])),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(report, baseline):
+    print(f"{'workflow':<26}{'p50 ms':>18}{'p95 ms':>18}{'queries':>16}", file=sys.stderr)
+    for name, now in report["workflows"].items():
+        before = baseline.get("workflows", {}).get(name)
+        if before is None:
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "queries_per_run"):
+            change = (now[key] / before[key] - 1) * 100 if before[key] else 0.0
+            cells.append(f"{now[key]:>9.2f} ({change:+5.0f}%)")
+        print(f"{name:<26}" + "".join(f"{c:>18}" for c in cells), file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the interactive workflows in main.py.")
+    parser.add_argument("--runs", type=int, default=100, help="measured runs per workflow")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured runs per workflow")
+    parser.add_argument("--workflows", nargs="+", choices=list(WORKFLOWS), default=list(WORKFLOWS))
+    parser.add_argument("--seed", type=int, default=425)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = direct_connection()
+    cur = conn.cursor()
+    fixtures = load_fixtures(cur, rng)
+    renter_ids = [r[1] for r in fixtures["renters"]]
+    cur.execute("SELECT RenterID, Points FROM rewards_member WHERE RenterID = ANY(%s)", (renter_ids,))
+    points = cur.fetchall()
+    cur.execute("SELECT COUNT(*) FROM property")
+    properties = cur.fetchone()[0]
+    cur.execute("SELECT COUNT(*) FROM booking")
+    bookings = cur.fetchone()[0]
+    conn.commit()
+
+    db_pool.set_pool(db_pool.ConnectionPool.from_config(app.DB_CONFIG, connection_factory=query_stats.InstrumentedConnection))
+    real_input = builtins.input
+    results = {}
+    try:
+        for name in args.workflows:
+            for _ in range(args.warmup):
+                run_workflow(name, rng, fixtures)
+            results[name] = summarize([run_workflow(name, rng, fixtures) for _ in range(args.runs)])
+            print(f"{name}: p50 {results[name]['p50_ms']} ms", file=sys.stderr)
+    finally:
+        builtins.input = real_input
+        app.current_session = None
+        cur.execute("DELETE FROM booking WHERE StartDate >= %s", (BOOKING_EPOCH,))
+        for renter_id, renter_points in points:
+            cur.execute("UPDATE rewards_member SET Points = %s WHERE RenterID = %s", (renter_points, renter_id))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "database": {"properties": properties, "bookings": bookings},
+        "page_size": app.PAGE_SIZE,
+        "seed": args.seed,
+        "workflows": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.baseline:
+        with open(args.baseline) as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+import psycopg2
+import psycopg2.errors
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import query_stats  # noqa: E402
+from bench_workflows import percentile  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from records import BookingReceipt  # noqa: E402
+from repositories import BookingRepository, PropertyRepository  # noqa: E402
+from seed import delete_bench_rows, seed_catalog  # noqa: E402
+
+# booking_stress.py
+# Concurrency stress test for renter_book_property's INSERT. Many bookers, each
+# on its own connection, hammer a few properties with random overlapping stays.
+# Afterwards no two bookings of one property may overlap. --legacy runs the old
+# COUNT(*) check + INSERT instead and reports how often the check was raced.
+# --book runs whole bookings (agent and price lookup, INSERT, rewards points)
+# by renters who are all rewards members: "statement" is BookingRepository.book
+# (one statement), "steps" the earlier bookable() lookup + INSERT + rewards
+# SELECT + UPDATE. Both report latency percentiles and round trips per attempt.
+# Rows are committed (bookers need separate transactions) and deleted at the end.
+#
+# Example:
+#   python benchmarks/booking_stress.py --book steps --properties 200
+#   python benchmarks/booking_stress.py --book statement --properties 200
+
+OVERLAPS_SQL = """
+    SELECT COUNT(*)
+    FROM booking a
+    JOIN booking b ON a.PropertyID = b.PropertyID AND a.BookingID < b.BookingID
+    WHERE a.PropertyID LIKE 'bench-%%'
+      AND NOT (a.EndDate < b.StartDate OR a.StartDate > b.EndDate)
+"""
+
+
+def connect(connection_factory=None):
+    return psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+        connection_factory=connection_factory,
+    )
+
+
+def legacy_book(cur, card_id, renter_id, prop_id, start, end):
+    """The pre-constraint flow: overlap check, then INSERT. False if the check saw a conflict."""
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM booking
+        WHERE PropertyID = %s
+          AND NOT (EndDate < %s OR StartDate > %s)
+        """,
+        (prop_id, start, end),
+    )
+    if cur.fetchone()[0] > 0:
+        return False
+    BookingRepository(cur.connection).insert(card_id, renter_id, None, prop_id, start, end)
+    return True
+
+
+def stepwise_book(conn, renter_id, card_id, prop_id, start, end):
+    """The booking flow before BOOK_SQL: property lookup, INSERT, rewards SELECT and UPDATE."""
+    prop = PropertyRepository(conn).bookable(prop_id)
+    if prop is None:
+        return None
+    bookings = BookingRepository(conn)
+    booking_id = bookings.insert(card_id, renter_id, prop.agent_id, prop_id, start, end)
+    total_cost = float(prop.price) * (end - start).days
+    points_earned = None
+    if bookings.scalar("SELECT points FROM rewards_member WHERE renterid = %s", (renter_id,)) is not None:
+        points_earned = int(total_cost)
+        bookings.execute(
+            "UPDATE rewards_member SET points = points + %s WHERE renterid = %s", (points_earned, renter_id)
+        )
+    return BookingReceipt(booking_id, total_cost, points_earned)
+
+
+def booker(n, args, barrier, results):
+    rng = random.Random(args.seed + n)
+    stats = {"booked": 0, "conflicts": 0, "raced": 0, "errors": 0, "seconds": []}
+    conn = connect(query_stats.InstrumentedConnection)
+    cur = conn.cursor()
+    bookings = BookingRepository(conn)
+    card_id, renter_id = f"bench-card{n}", f"bench-r{n}"
+    base = date(2030, 1, 1)
+    barrier.wait()
+    try:
+        for _ in range(args.attempts):
+            prop_id = f"bench-p{rng.randrange(args.properties)}"
+            start = base + timedelta(days=rng.randrange(args.days))
+            end = start + timedelta(days=rng.randint(1, args.max_stay))
+            started = time.perf_counter()
+            try:
+                if args.book == "statement":
+                    bookings.book(renter_id, card_id, prop_id, start, end)
+                elif args.book == "steps":
+                    stepwise_book(conn, renter_id, card_id, prop_id, start, end)
+                elif args.legacy:
+                    if not legacy_book(cur, card_id, renter_id, prop_id, start, end):
+                        conn.rollback()
+                        stats["conflicts"] += 1
+                        continue
+                else:
+                    bookings.insert(card_id, renter_id, None, prop_id, start, end)
+                conn.commit()
+                stats["booked"] += 1
+            except psycopg2.errors.ExclusionViolation:
+                # with --legacy this means the COUNT(*) check was raced
+                conn.rollback()
+                stats["raced" if args.legacy else "conflicts"] += 1
+            except (Exception, psycopg2.DatabaseError) as error:
+                conn.rollback()
+                stats["errors"] += 1
+                print(f"booker {n}: {error}")
+            stats["seconds"].append(time.perf_counter() - started)
+    finally:
+        cur.close()
+        conn.close()
+        results[n] = stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test.")
+    parser.add_argument("--bookers", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=50, help="booking attempts per booker")
+    parser.add_argument("--properties", type=int, default=4)
+    parser.add_argument("--days", type=int, default=120, help="window the stays start in")
+    parser.add_argument("--max-stay", type=int, default=7)
+    parser.add_argument("--legacy", action="store_true", help="use the old COUNT(*) check + INSERT")
+    parser.add_argument(
+        "--book", choices=["statement", "steps"], help="run whole bookings with rewards, in one statement or in steps"
+    )
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    failed = True
+    conn = connect()
+    cur = conn.cursor()
+    try:
+        delete_bench_rows(cur)
+        seed_catalog(cur, args.properties, renters=args.bookers, agents=1, seed=args.seed)
+        if args.book:
+            cur.execute("UPDATE property SET Availability = 'Active' WHERE PropertyID LIKE 'bench-%'")
+            cur.execute(
+                "INSERT INTO rewards_member (RenterID) SELECT RenterID FROM renter WHERE RenterID LIKE 'bench-%'"
+            )
+        conn.commit()
+        query_stats.STATS.reset()
+
+        barrier = threading.Barrier(args.bookers)
+        results = [None] * args.bookers
+        threads = [
+            threading.Thread(target=booker, args=(n, args, barrier, results)) for n in range(args.bookers)
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        statements = query_stats.STATS.totals()["statements"]
+        seconds = sorted(t * 1000 for r in results for t in r.pop("seconds"))
+        totals = {k: sum(r[k] for r in results) for k in results[0]}
+        cur.execute(OVERLAPS_SQL)
+        overlaps = cur.fetchone()[0]
+        attempts = args.bookers * args.attempts
+        if args.book:
+            mode = f"whole booking ({args.book})"
+        else:
+            mode = "legacy COUNT(*) + INSERT" if args.legacy else "INSERT + booking_no_overlap"
+        print(f"mode: {mode}")
+        print(f"{args.bookers} bookers x {args.attempts} attempts on {args.properties} properties")
+        print(f"{attempts / elapsed:.0f} attempts/s ({elapsed:.2f}s)")
+        print(
+            f"latency per attempt: p50 {percentile(seconds, 50):.2f} ms, p95 {percentile(seconds, 95):.2f} ms, "
+            f"p99 {percentile(seconds, 99):.2f} ms"
+        )
+        # every attempt also ends with one COMMIT or ROLLBACK
+        print(f"round trips per attempt: {statements / attempts + 1:.2f}")
+        print(f"booked {totals['booked']}, conflicts {totals['conflicts']}, errors {totals['errors']}")
+        if args.legacy:
+            print(f"check raced (caught by the constraint) {totals['raced']}")
+        print(f"overlapping booking pairs: {overlaps}")
+        failed = overlaps > 0 or totals["errors"] > 0
+    finally:
+        conn.rollback()
+        delete_bench_rows(cur)
+        conn.commit()
+        cur.close()
+        conn.close()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
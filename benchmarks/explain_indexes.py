@@ -0,0 +1,287 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+import psycopg2
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import search  # noqa: E402
+from main import DB_CONFIG  # noqa: E402
+from seed import seed_catalog  # noqa: E402
+
+# explain_indexes.py
+# Seeds a large synthetic dataset (rolled back afterwards), then EXPLAINs each
+# hot query in main.py and checks that it is served by the expected index and
+# does not sequentially scan the big tables. Exits 1 if any check fails.
+# Run after run.py so the SQL/migrations indexes and property_search exist.
+
+BIG_TABLES = {
+    "property",
+    "property_search",
+    "property_availability",
+    "locations",
+    "booking",
+    "card",
+    "renter",
+    "users",
+    "user_x_address",
+}
+
+# (label, SQL, params, indexes that must appear in the plan)
+QUERY_CHECKS = [
+    (
+        "login: user by email",
+        "SELECT UserID, Name, Email, Type FROM users WHERE Email = %s",
+        ("renter42@bench.example",),
+        ["users_email_key"],
+    ),
+    (
+        "login: renter of user",
+        "SELECT RenterID FROM renter WHERE UserID = %s",
+        ("bench-u-r42",),
+        ["idx_renter_user"],
+    ),
+    (
+        "login: agent of user",
+        "SELECT AgentID FROM agent WHERE UserID = %s",
+        ("bench-u-ag7",),
+        ["idx_agent_user"],
+    ),
+    (
+        "payment: cards of renter",
+        "SELECT CardID, CardNumber, ExpirationDate, CVV, AddressID FROM card WHERE RenterID = %s",
+        ("bench-r42",),
+        ["idx_card_renter"],
+    ),
+    (
+        "payment: active bookings on card",
+        "SELECT COUNT(*) FROM booking WHERE CardID = %s AND EndDate >= CURRENT_DATE",
+        ("bench-card42",),
+        ["idx_booking_card_end"],
+    ),
+    (
+        "addresses: addresses of user",
+        "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
+        "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
+        "WHERE ua.UserID = %s",
+        ("bench-u-r42",),
+        ["idx_user_x_address_user", "locations_pkey"],
+    ),
+    (
+        "addresses: cards on address",
+        "SELECT COUNT(*) FROM card WHERE AddressID = %s",
+        ("bench-lr42",),
+        ["idx_card_address"],
+    ),
+    (
+        "bookings: renter bookings",
+        """
+        SELECT b.BookingID, p.PropertyID, p.Type, p.Description, p.Price,
+               b.StartDate, b.EndDate, l.City, l.State, c.CardNumber
+        FROM booking b
+        JOIN property p ON b.PropertyID = p.PropertyID
+        JOIN locations l ON p.LocationID = l.LocationID
+        JOIN card c ON b.CardID = c.CardID
+        WHERE b.RenterID = %s
+        """,
+        ("bench-r42",),
+        ["idx_booking_renter", "property_pkey", "locations_pkey"],
+    ),
+    (
+        "bookings: agent bookings",
+        """
+        SELECT b.bookingid, p.propertyid, p.type, p.description, p.price,
+               l.address, l.city, l.state, l.zipcode, b.startdate, b.enddate,
+               u.name, u.email, c.cardnumber
+        FROM booking b
+        JOIN property p ON b.propertyid = p.propertyid
+        JOIN locations l ON p.locationid = l.locationid
+        JOIN renter r ON b.renterid = r.renterid
+        JOIN users u ON r.userid = u.userid
+        JOIN card c ON b.cardid = c.cardid
+        WHERE p.agentid = %s
+        ORDER BY b.startdate DESC
+        """,
+        ("bench-ag7",),
+        ["idx_property_agent", "idx_booking_property_dates"],
+    ),
+    (
+        "booking: active listing page",
+        """
+        SELECT ps.PropertyID, ps.Type, ps.Description, ps.Price, ps.City, ps.State,
+               ps.Bedrooms, ps.AgentID
+        FROM property_search ps
+        WHERE ps.Availability = 'Active' AND ps.PropertyID > %s
+        ORDER BY ps.PropertyID
+        LIMIT 20
+        """,
+        ("bench-p4242",),
+        ["property_search_pkey"],
+    ),
+    (
+        "delete property: existing bookings",
+        "SELECT COUNT(*) FROM booking WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_booking_property_dates"],
+    ),
+    (
+        "delete property: house row",
+        "DELETE FROM house WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_house_property"],
+    ),
+    (
+        "delete property: apartment row",
+        "DELETE FROM apartment WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_apartment_property"],
+    ),
+    (
+        "delete property: commercial row",
+        "DELETE FROM commercialbuilding WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_commercialbuilding_property"],
+    ),
+    (
+        "delete property: land row",
+        "DELETE FROM land WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_land_property"],
+    ),
+    (
+        "delete property: vacation home row",
+        "DELETE FROM vacationhome WHERE propertyid = %s",
+        ("bench-p4242",),
+        ["idx_vacationhome_property"],
+    ),
+]
+
+# (label, search filters, sort, indexes that must appear in the generic plan)
+SEARCH_CHECKS = [
+    (
+        "search: city and state",
+        {"city": "Bench Town 17", "state": "FL"},
+        "none",
+        ["idx_property_search_active_city"],
+    ),
+    (
+        "search: city, bedrooms, sorted by price",
+        {"city": "Bench Town 17", "min_bedrooms": "3"},
+        "price",
+        ["idx_property_search_active_city"],
+    ),
+    (
+        "search: narrow price range",
+        {"min_price": "1000", "max_price": "1010"},
+        "price",
+        ["idx_property_search_active_price"],
+    ),
+    (
+        "search: city free for a stay",
+        {"city": "Bench Town 17", "check_in": date(2025, 2, 1), "check_out": date(2025, 2, 7)},
+        "none",
+        # LIMIT 20 in PropertyID order, semi-join probes the free intervals
+        ["property_search_pkey", "property_availability_pkey"],
+    ),
+    (
+        "search: keyword in a city",
+        {"city": "Bench Town 17", "keyword": "listing"},
+        "relevance",
+        ["idx_property_search_active_city"],
+    ),
+    (
+        "search: within 10 miles of a point",
+        {"near": (41.88, -87.63), "within_miles": "10"},
+        "price",
+        ["idx_property_search_active_geo_cell"],
+    ),
+    (
+        "search: rare keyword",
+        {"keyword": "penthouse"},
+        "relevance",
+        ["idx_property_search_fts"],
+    ),
+]
+
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def check_plan(cur, explain_sql, params, expected):
+    cur.execute("EXPLAIN (FORMAT JSON) " + explain_sql, params)
+    nodes = list(plan_nodes(cur.fetchone()[0][0]["Plan"]))
+    used = {n["Index Name"] for n in nodes if "Index Name" in n}
+    seq = {n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"} & BIG_TABLES
+    missing = [i for i in expected if i not in used]
+    return not missing and not seq, used, missing, seq
+
+
+def report(label, ok, used, missing, seq):
+    print(f"[{'PASS' if ok else 'FAIL'}] {label}: indexes {', '.join(sorted(used)) or '-'}")
+    if missing:
+        print(f"       missing index: {', '.join(missing)}")
+    if seq:
+        print(f"       seq scan on: {', '.join(sorted(seq))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN the hot queries of main.py on a seeded dataset.")
+    parser.add_argument("--properties", type=int, default=1000000)
+    parser.add_argument("--renters", type=int, default=100000)
+    parser.add_argument("--agents", type=int, default=2000)
+    parser.add_argument("--bookings-per-property", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=425)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    failures = 0
+    try:
+        print(f"Seeding {args.properties} properties ...")
+        start = time.perf_counter()
+        seed_catalog(
+            cur,
+            args.properties,
+            schools=100,
+            schools_per_property=1,
+            bookings_per_property=args.bookings_per_property,
+            renters=args.renters,
+            agents=args.agents,
+            seed=args.seed,
+        )
+        print(f"Seeded in {time.perf_counter() - start:.1f}s\n")
+
+        for label, sql, params, expected in QUERY_CHECKS:
+            ok, used, missing, seq = check_plan(cur, sql, params, expected)
+            report(label, ok, used, missing, seq)
+            failures += not ok
+
+        for label, raw_filters, sort, expected in SEARCH_CHECKS:
+            filters = search.normalize_filters(**raw_filters)
+            sql, params, _ = search.search_statement(filters, sort)
+            ok, used, missing, seq = check_plan(cur, sql, params, expected)
+            report(label, ok, used, missing, seq)
+            failures += not ok
+    finally:
+        conn.rollback()
+        cur.close()
+        conn.close()
+
+    total = len(QUERY_CHECKS) + len(SEARCH_CHECKS)
+    print(f"\n{total - failures}/{total} hot queries use their indexes")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
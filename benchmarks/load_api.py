@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_workflows import BOOKING_EPOCH, direct_connection, git_commit, load_fixtures, percentile  # noqa: E402
+
+# load_api.py
+# Load test of the HTTP API (api.py). --users virtual users run concurrently
+# for --duration seconds, each as one renter or agent from the configured
+# database (seed it with generate_data.py first), and pick requests from a
+# mix: renters mostly search, and also list bookings and cards, page through
+# results and book then cancel a stay; agents list properties and bookings.
+# Reports requests/second and p50/p95/p99 latency per request type as JSON.
+#
+# Bookings are dated from 2040 on and deleted at the end, and the renters'
+# rewards points are restored.
+#
+# Example:
+#   python api.py --port 8080 &
+#   python benchmarks/load_api.py --url http://127.0.0.1:8080 --users 200 --duration 60
+
+RENTER_MIX = [
+    ("search", 60),
+    ("search_next_page", 10),
+    ("renter_bookings", 10),
+    ("cards", 10),
+    ("book_and_cancel", 10),
+]
+AGENT_MIX = [
+    ("properties", 50),
+    ("agent_bookings", 50),
+]
+STAY_DAYS = 2000  # days of bookings per virtual user (stays of up to 8 days)
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        self.samples.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, elapsed):
+        report = {}
+        for name, samples in sorted(self.samples.items()):
+            times = sorted(s * 1000 for s in samples)
+            report[name] = {
+                "requests": len(times),
+                "per_second": round(len(times) / elapsed, 1),
+                "p50_ms": round(percentile(times, 50), 3),
+                "p95_ms": round(percentile(times, 95), 3),
+                "p99_ms": round(percentile(times, 99), 3),
+                "errors": self.errors.get(name, 0),
+            }
+        return report
+
+
+async def request(session, recorder, name, method, path, email, **kwargs):
+    """JSON body of one timed request (None when it failed)."""
+    start = time.perf_counter()
+    try:
+        async with session.request(method, path, headers={"X-User-Email": email}, **kwargs) as response:
+            body = await response.json(content_type=None)
+            ok = response.status < 400
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        body, ok = None, False
+    recorder.add(name, time.perf_counter() - start, ok)
+    return body if ok else None
+
+
+def search_params(rng, fixtures):
+    city, state = rng.choice(fixtures["cities"])
+    params = {"sort": rng.choice(["none", "price", "bedrooms"])}
+    if rng.random() < 0.6:
+        params["city"] = city
+    if rng.random() < 0.4:
+        params["state"] = state
+    if rng.random() < 0.4:
+        params["type"] = rng.choice(["House", "Apartment", "CommercialBuilding", "Land", "VacationHome"])
+    if rng.random() < 0.4:
+        params["max_price"] = str(rng.choice([1000, 2000, 5000]))
+    if rng.random() < 0.2:
+        params["check_in"] = str(date(2025, 1, 1) + timedelta(days=rng.randrange(730)))
+    if rng.random() < 0.1 and fixtures["zips"]:
+        params["near"] = rng.choice(fixtures["zips"])
+    return params
+
+
+async def renter_action(session, recorder, rng, fixtures, email, action, stay, card):
+    if action in ("search", "search_next_page"):
+        params = search_params(rng, fixtures)
+        body = await request(session, recorder, "search", "GET", "/search", email, params=params)
+        if action == "search_next_page" and body and body["next"]:
+            params["after"] = json.dumps(body["next"])
+            await request(session, recorder, "search_next_page", "GET", "/search", email, params=params)
+    elif action == "renter_bookings":
+        await request(session, recorder, action, "GET", "/bookings", email)
+    elif action == "cards":
+        await request(session, recorder, action, "GET", "/cards", email)
+    elif action == "book_and_cancel" and card:
+        found = await request(session, recorder, "search", "GET", "/search", email, params={"limit": "20"})
+        if not found or not found["results"]:
+            return
+        start = BOOKING_EPOCH + timedelta(days=stay)
+        booking = await request(
+            session,
+            recorder,
+            "book",
+            "POST",
+            "/bookings",
+            email,
+            json={
+                "property_id": rng.choice(found["results"])["property_id"],
+                "start": str(start),
+                "end": str(start + timedelta(days=1 + rng.randrange(7))),
+                "card": card,
+            },
+        )
+        if booking:
+            await request(session, recorder, "cancel", "DELETE", f"/bookings/{booking['booking_id']}", email)
+
+
+async def agent_action(session, recorder, email, action):
+    if action == "properties":
+        await request(session, recorder, action, "GET", "/properties", email)
+    else:
+        await request(session, recorder, action, "GET", "/bookings", email)
+
+
+async def virtual_user(number, session, recorder, fixtures, deadline, seed):
+    rng = random.Random(seed + number)
+    is_agent = number % 10 == 9
+    if is_agent:
+        email = fixtures["agents"][number % len(fixtures["agents"])]
+        actions, weights = zip(*AGENT_MIX)
+    else:
+        email = fixtures["renters"][number % len(fixtures["renters"])][0]
+        actions, weights = zip(*RENTER_MIX)
+        cards = await request(session, recorder, "cards", "GET", "/cards", email)
+        card = cards["results"][0]["card_id"] if cards and cards["results"] else None
+    # each user books within its own STAY_DAYS days so users do not collide
+    stays = 0
+    while time.monotonic() < deadline:
+        action = rng.choices(actions, weights)[0]
+        if is_agent:
+            await agent_action(session, recorder, email, action)
+        else:
+            stay = number * STAY_DAYS + stays * 8 % STAY_DAYS
+            await renter_action(session, recorder, rng, fixtures, email, action, stay, card)
+            stays += 1
+
+
+async def run_load(args, fixtures):
+    recorder = Recorder()
+    connector = aiohttp.TCPConnector(limit=args.users)
+    timeout = aiohttp.ClientTimeout(total=args.timeout)
+    async with aiohttp.ClientSession(args.url, connector=connector, timeout=timeout) as session:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(
+            *(virtual_user(n, session, recorder, fixtures, deadline, args.seed) for n in range(args.users))
+        )
+        elapsed = time.monotonic() - started
+    return recorder.summary(elapsed), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP API (api.py) with concurrent users.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--timeout", type=float, default=30, help="seconds before a request fails")
+    parser.add_argument("--seed", type=int, default=425)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    conn = direct_connection()
+    cur = conn.cursor()
+    fixtures = load_fixtures(cur, rng)
+    renter_ids = [r[1] for r in fixtures["renters"]]
+    cur.execute("SELECT RenterID, Points FROM rewards_member WHERE RenterID = ANY(%s)", (renter_ids,))
+    points = cur.fetchall()
+    conn.commit()
+
+    try:
+        results, elapsed = asyncio.run(run_load(args, fixtures))
+    finally:
+        cur.execute("DELETE FROM booking WHERE StartDate >= %s", (BOOKING_EPOCH,))
+        for renter_id, renter_points in points:
+            cur.execute("UPDATE rewards_member SET Points = %s WHERE RenterID = %s", (renter_points, renter_id))
+        conn.commit()
+        cur.close()
+        conn.close()
+
+    total = sum(r["requests"] for r in results.values())
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": args.url,
+        "users": args.users,
+        "seconds": round(elapsed, 1),
+        "requests_per_second": round(total / elapsed, 1),
+        "requests": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import random
+from datetime import date, timedelta
+
+from psycopg2.extras import execute_values
+
+# seed.py
+# Synthetic data shared by the benchmark scripts. Everything is keyed with a
+# "bench-" prefix and is meant to be inserted inside a transaction that the
+# benchmark rolls back when it is done.
+
+CITIES = [
+    ("Chicago", "IL"),
+    ("St. Louis", "MO"),
+    ("Orlando", "FL"),
+    ("Austin", "TX"),
+    ("Denver", "CO"),
+    ("Seattle", "WA"),
+    ("Boston", "MA"),
+    ("Phoenix", "AZ"),
+]
+# a long tail of smaller towns so city filters are as selective as in real data
+CITIES += [(f"Bench Town {i}", CITIES[i % len(CITIES)][1]) for i in range(192)]
+TYPES = ["House", "Apartment", "CommercialBuilding", "Land", "VacationHome"]
+
+
+def seed_catalog(
+    cur,
+    properties,
+    schools=0,
+    schools_per_property=0,
+    bookings_per_property=0,
+    renters=0,
+    agents=0,
+    seed=425,
+):
+    """Insert bench- users, locations, properties (+ subtype rows), schools, cards and bookings."""
+    rng = random.Random(seed)
+    users, agent_rows, renter_rows, user_addresses, cards = [], [], [], [], []
+    locations, props = [], []
+    for i in range(agents):
+        users.append((f"bench-u-ag{i}", f"Agent {i}", f"agent{i}@bench.example", "Agent"))
+        agent_rows.append((f"bench-ag{i}", f"bench-u-ag{i}", "Agent", "Bench Realty", f"555-{i:07d}"))
+    for i in range(renters):
+        users.append((f"bench-u-r{i}", f"Renter {i}", f"renter{i}@bench.example", "Renter"))
+        renter_rows.append((f"bench-r{i}", f"bench-u-r{i}", date(2025, 1, 1), None, 2500))
+        city, state = rng.choice(CITIES)
+        locations.append((f"bench-lr{i}", f"{i} Renter Ave", city, state, "00000", "United States"))
+        user_addresses.append((f"bench-ua{i}", f"bench-u-r{i}", f"bench-lr{i}"))
+        cards.append(
+            (f"bench-card{i}", f"bench-r{i}", f"bench-lr{i}", f"{4000000000000000 + i}", date(2030, 1, 1), "123")
+        )
+    houses, apartments, commercial, land, vacation = [], [], [], [], []
+    for i in range(properties):
+        city, state = rng.choice(CITIES)
+        ptype = rng.choice(TYPES)
+        pid = f"bench-p{i}"
+        locations.append((f"bench-l{i}", f"{i} Bench St", city, state, "00000", "United States"))
+        props.append(
+            (
+                pid,
+                ptype,
+                f"bench-l{i}",
+                f"bench-ag{rng.randrange(agents)}" if agents else None,
+                rng.choice(["Rent", "Sale"]),
+                "Bench listing",
+                rng.randint(500, 5000),
+                "Active" if rng.random() < 0.9 else "Inactive",
+                "0.01",
+            )
+        )
+        if ptype == "House":
+            houses.append((f"bench-h{i}", pid, rng.randint(1, 6), rng.randint(600, 4000)))
+        elif ptype == "Apartment":
+            apartments.append(
+                (f"bench-a{i}", pid, "HighRise", rng.randint(1, 40), rng.randint(1, 4), rng.randint(400, 2000))
+            )
+        elif ptype == "CommercialBuilding":
+            commercial.append((f"bench-c{i}", pid, rng.randint(1000, 20000), "Retail"))
+        elif ptype == "Land":
+            land.append((f"bench-n{i}", pid))
+        else:
+            vacation.append((f"bench-v{i}", pid))
+
+    inserts = [
+        ("users (UserID, Name, Email, Type)", users),
+        ("agent (AgentID, UserID, JobTitle, Agency, ContactInfo)", agent_rows),
+        ("renter (RenterID, UserID, MoveInDate, PreferedLocations, Budget)", renter_rows),
+        ("locations (LocationID, Address, City, State, ZipCode, Country)", locations),
+        ("user_x_address (UserAddressID, UserID, LocationID)", user_addresses),
+        ("card (CardID, RenterID, AddressID, CardNumber, ExpirationDate, CVV)", cards),
+        (
+            "property (PropertyID, Type, LocationID, AgentID, ListingType, Description, Price, Availability, CrimeRate)",
+            props,
+        ),
+        ("house (HouseID, PropertyID, NumRooms, SquareFeet)", houses),
+        ("apartment (ApartmentID, PropertyID, BuildingType, Floor, NumRooms, SquareFeet)", apartments),
+        ("commercialBuilding (CommercialBuildingID, PropertyID, SquareFeet, BusinessType)", commercial),
+        ("land (LandID, PropertyID)", land),
+        ("vacationHome (VacationHomeID, PropertyID)", vacation),
+        ("school (SchoolID, Name)", [(f"bench-s{i}", f"Bench School {i}") for i in range(schools)]),
+    ]
+
+    links = []
+    for i in range(properties):
+        for j, s in enumerate(rng.sample(range(schools), min(schools_per_property, schools))):
+            links.append((f"bench-x{i}-{j}", f"bench-p{i}", f"bench-s{s}", round(rng.uniform(0.1, 10), 2)))
+    inserts.append(("property_x_school (PropertySchoolID, PropertyID, SchoolID, DistanceMiles)", links))
+
+    bookings = []
+    base = date(2025, 1, 1)
+    for i in range(properties):
+        start = base + timedelta(days=rng.randint(0, 30))
+        for j in range(bookings_per_property):
+            end = start + timedelta(days=rng.randint(1, 14))
+            agent_id = props[i][3]
+            if renters:
+                r = rng.randrange(renters)
+                bookings.append((f"bench-b{i}-{j}", f"bench-card{r}", f"bench-r{r}", agent_id, f"bench-p{i}", start, end))
+            else:
+                bookings.append((f"bench-b{i}-{j}", None, None, agent_id, f"bench-p{i}", start, end))
+            start = end + timedelta(days=rng.randint(1, 30))
+    inserts.append(
+        ("booking (BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate)", bookings)
+    )
+
+    for target, rows in inserts:
+        if rows:
+            execute_values(cur, f"INSERT INTO {target} VALUES %s", rows, page_size=5000)
+    cur.execute("ANALYZE")
+
+
+# child tables first; each entry is (table, primary key column)
+BENCH_TABLES = [
+    ("booking", "PropertyID"),  # booked through BookingRepository.insert (uuid ids)
+    ("property_x_school", "PropertySchoolID"),
+    ("school", "SchoolID"),
+    ("house", "HouseID"),
+    ("apartment", "ApartmentID"),
+    ("commercialBuilding", "CommercialBuildingID"),
+    ("land", "LandID"),
+    ("vacationHome", "VacationHomeID"),
+    ("property", "PropertyID"),
+    ("card", "CardID"),
+    ("user_x_address", "UserAddressID"),
+    ("renter", "RenterID"),
+    ("agent", "AgentID"),
+    ("locations", "LocationID"),
+    ("users", "UserID"),
+]
+
+
+def delete_bench_rows(cur):
+    """Remove committed bench- rows (for benchmarks that cannot run in one transaction)."""
+    for table, key in BENCH_TABLES:
+        cur.execute(f"DELETE FROM {table} WHERE {key} LIKE 'bench-%'")
@@ -0,0 +1,392 @@
+import argparse
+import csv
+import json
+import shlex
+import sys
+from datetime import datetime
+
+import psycopg2
+import psycopg2.errors
+
+import main as app
+import search
+from records import ImportedBooking
+from repositories import BookingRepository, PaymentRepository, UserRepository
+
+# cli.py
+# Command mode of main.py: `python main.py <command> [options]` runs the same
+# search and booking logic as the menus, without prompts, and prints JSON.
+# - search: one page (or --all) of search_properties results; --format csv
+# - book: books a property for a renter like renter_book_property
+# - batch: runs the commands of a file (one command line per line, # comments)
+#   on one connection in one transaction and prints a JSON line per command.
+#   A failed command is rolled back to its savepoint and the batch goes on;
+#   --atomic rolls back the whole batch instead, --dry-run always does.
+# - import: books a file of bookings (CSV with a header row, or JSON lines)
+#   for an agent's properties in one transaction: the rows are COPYed to the
+#   database and checked together (BookingRepository.import_bookings), and a
+#   JSON line per row tells whether it was booked. Columns: renter_email,
+#   property_id, start, end and optional card (CardID or last 4 digits).
+#   Rejected rows are skipped; --atomic books nothing if any is rejected.
+# - report: portfolio reports over the bookings of a date range (reports.py,
+#   needs NumPy): summary per city, state or type (bookings, nights,
+#   occupancy, revenue, stay length, lead time) or the occupancy curve per
+#   day, week or month; JSON or --format csv
+#
+# Examples:
+#   python main.py search --city Chicago --max-price 2000 --sort price
+#   python main.py book --email renter@example.com --property <id> --start 2026-06-01 --end 2026-06-05
+#   python main.py batch bookings.txt --atomic
+#   python main.py import bookings.csv --email agent@example.com
+#   python main.py report summary --from 2024-01-01 --to 2025-01-01 --group city --format csv
+
+IMPORT_COLUMNS = ["renter_email", "property_id", "start", "end", "card"]
+SEARCH_COLUMNS = ["property_id", "type", "listing_type", "description", "price", "city", "state", "bedrooms", "rank"]
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date {value!r}, use YYYY-MM-DD")
+
+
+class ArgumentParser(argparse.ArgumentParser):
+    """Raises ValueError on bad arguments so a batch line fails on its own."""
+
+    def error(self, message):
+        raise ValueError(f"{self.prog}: {message}")
+
+
+class BatchArgumentParser(ArgumentParser):
+    """Parser of batch lines: no -h/--help, and nothing may exit the batch."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **dict(kwargs, add_help=False))
+
+    def exit(self, status=0, message=None):
+        raise ValueError(message or f"{self.prog}: exit {status}")
+
+
+def build_parser(parser_class=ArgumentParser):
+    parser = parser_class(prog="main.py", description="Run real estate operations without the menus.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("search", help="search active properties")
+    p.add_argument("--city")
+    p.add_argument("--state")
+    p.add_argument("--type", dest="prop_type", help="House, Apartment, ...")
+    p.add_argument("--listing-type", help="Rent or Sale")
+    p.add_argument("--min-price")
+    p.add_argument("--max-price")
+    p.add_argument("--min-bedrooms")
+    p.add_argument("--check-in", type=parse_date, help="free from this date (YYYY-MM-DD)")
+    p.add_argument("--check-out", type=parse_date, help="through this date (default: check-in)")
+    p.add_argument("--keyword", help="words in the description")
+    p.add_argument("--near", help="zip code or lat,lon")
+    p.add_argument("--within-miles", help=f"radius around --near (default {search.DEFAULT_RADIUS_MILES})")
+    p.add_argument("--sort", choices=sorted(search.SORT_KEYS), default="none")
+    p.add_argument("--limit", type=int, default=app.PAGE_SIZE, help="rows to return (default: page size)")
+    p.add_argument("--all", action="store_true", help="return every match instead of one page")
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+
+    p = commands.add_parser("book", help="book a property for a renter")
+    who = p.add_mutually_exclusive_group(required=True)
+    who.add_argument("--email", help="renter's login email")
+    who.add_argument("--renter-id")
+    p.add_argument("--property", required=True, dest="property_id")
+    p.add_argument("--start", required=True, type=parse_date)
+    p.add_argument("--end", required=True, type=parse_date)
+    p.add_argument("--card", help="CardID or last 4 digits (default: the renter's only card)")
+
+    p = commands.add_parser("batch", help="run a file of commands in one transaction")
+    p.add_argument("file", help="command file, - for stdin")
+    p.add_argument("--atomic", action="store_true", help="roll back everything if any command fails")
+    p.add_argument("--dry-run", action="store_true", help="roll back at the end")
+
+    p = commands.add_parser("import", help="book a file of bookings for an agent's properties")
+    p.add_argument("file", help="CSV with a header row or JSON lines, - for stdin")
+    p.add_argument("--email", required=True, help="agent's login email")
+    p.add_argument("--format", choices=["csv", "jsonl"], help="default: jsonl for .jsonl files, else csv")
+    p.add_argument("--atomic", action="store_true", help="book nothing if any row is rejected")
+    p.add_argument("--dry-run", action="store_true", help="roll back at the end")
+
+    p = commands.add_parser("report", help="occupancy and revenue reports over a date range")
+    p.add_argument("kind", choices=["summary", "occupancy"])
+    p.add_argument("--from", dest="start", required=True, type=parse_date, help="first day (YYYY-MM-DD)")
+    p.add_argument("--to", dest="end", required=True, type=parse_date, help="day after the last (YYYY-MM-DD)")
+    p.add_argument("--group", choices=["none", "city", "state", "type"], default="none")
+    p.add_argument("--period", choices=["day", "week", "month"], default="month", help="occupancy curve step")
+    p.add_argument("--format", choices=["json", "csv"], default="json")
+    return parser
+
+
+def run_search(conn, args):
+    near = search.locate(conn, args.near) if args.near else None
+    filters = search.normalize_filters(
+        args.city,
+        args.state,
+        args.prop_type,
+        args.listing_type,
+        args.min_price,
+        args.max_price,
+        args.min_bedrooms,
+        args.check_in,
+        args.check_out,
+        args.keyword,
+        near,
+        args.within_miles,
+    )
+    pager = search.SearchPager(conn, filters, args.sort, args.limit, app.STREAM_ITERSIZE)
+    if not pager.first() and filters["keyword"] and search.trigram_available(conn):
+        filters = search.fuzzy_filters(filters)
+        pager = search.SearchPager(conn, filters, args.sort, args.limit, app.STREAM_ITERSIZE)
+        pager.first()
+    rows = list(pager.rows)
+    if args.all and pager.has_next:
+        rows.extend(pager.stream_rest())
+    return {
+        "fuzzy": filters["fuzzy_keyword"] is not None,
+        "count": len(rows),
+        "more": pager.has_next and not args.all,
+        "results": [dict(zip(SEARCH_COLUMNS, row)) for row in rows],
+    }
+
+
+def renter_of(conn, args, renters):
+    """(renter_id, cards) of the --email/--renter-id renter, cached per run."""
+    who = args.email or args.renter_id
+    if who not in renters:
+        users = UserRepository(conn)
+        if args.email:
+            user = users.find_by_email(args.email)
+            renter_id = user.renter_id if user else None
+        else:
+            renter_id = args.renter_id if users.renter_exists(args.renter_id) else None
+        if renter_id is None:
+            raise ValueError(f"No renter found for {who}")
+        renters[who] = (str(renter_id), PaymentRepository(conn).list_cards(renter_id))
+    return renters[who]
+
+
+def run_book(conn, args, renters):
+    if args.end <= args.start:
+        raise ValueError("End date must be after start date")
+    renter_id, cards = renter_of(conn, args, renters)
+    if args.card:
+        cards = [c for c in cards if args.card in (str(c.card_id), str(c.card_number)[-4:])]
+    if len(cards) != 1:
+        raise ValueError("Pick one of the renter's cards with --card" if cards else "No matching card")
+    card_id = cards[0].card_id
+
+    try:
+        receipt = BookingRepository(conn).book(renter_id, card_id, args.property_id, args.start, args.end)
+    except psycopg2.errors.ExclusionViolation:
+        raise ValueError("Property already booked for that period")
+    if receipt is None:
+        raise ValueError(f"No active property {args.property_id}")
+    return {
+        "booking_id": receipt.booking_id,
+        "property_id": args.property_id,
+        "renter_id": renter_id,
+        "card_id": card_id,
+        "start": args.start,
+        "end": args.end,
+        "total_cost": receipt.total_cost,
+        "points_earned": receipt.points_earned,
+    }
+
+
+def execute(conn, args, renters):
+    if args.command == "search":
+        return run_search(conn, args)
+    if args.command == "book":
+        return run_book(conn, args, renters)
+    raise ValueError(f"{args.command} cannot run inside a batch")
+
+
+def to_json(result):
+    return json.dumps(result, default=str)
+
+
+def write_csv(rows, columns=SEARCH_COLUMNS):
+    writer = csv.writer(sys.stdout)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])
+
+
+def read_commands(path):
+    """(line number, argv) of each command in a batch file."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for number, line in enumerate(f, start=1):
+            argv = shlex.split(line, comments=True)
+            if argv:
+                yield number, argv
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def read_import(path, fmt):
+    """(line number, dict of IMPORT_COLUMNS, or the error) of each row of an import file."""
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    try:
+        if fmt == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    yield number, "Invalid JSON"
+                    continue
+                yield number, record if isinstance(record, dict) else "Each line must be a JSON object"
+        else:
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, record
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def import_row(number, record):
+    """(line, renter email, property id, start, end, card) of a row. Raises ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError(record)
+    values = {c: str(record.get(c) or "").strip() or None for c in IMPORT_COLUMNS}
+    missing = [c for c in IMPORT_COLUMNS[:4] if values[c] is None]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    try:
+        start, end = (datetime.strptime(values[c], "%Y-%m-%d").date() for c in ("start", "end"))
+    except ValueError:
+        raise ValueError("Invalid date format, use YYYY-MM-DD")
+    if end <= start:
+        raise ValueError("End date must be after start date")
+    return number, values["renter_email"], values["property_id"], start, end, values["card"]
+
+
+def run_import(conn, args):
+    """Book the rows of the file; returns the number rejected."""
+    user = UserRepository(conn).find_by_email(args.email)
+    if user is None or user.agent_id is None:
+        raise ValueError(f"No agent found for {args.email}")
+    fmt = args.format or ("jsonl" if args.file.endswith(".jsonl") else "csv")
+    rows, results = [], []
+    for number, record in read_import(args.file, fmt):
+        try:
+            rows.append(import_row(number, record))
+        except ValueError as error:
+            results.append(ImportedBooking(number, None, str(error), None, None))
+    try:
+        results.extend(BookingRepository(conn).import_bookings(str(user.agent_id), rows))
+    except psycopg2.errors.ExclusionViolation:
+        raise ValueError("A booking made during the import overlaps it; nothing was booked")
+
+    rejected = 0
+    for result in sorted(results):
+        if result.reason is None:
+            print(
+                to_json(
+                    {
+                        "line": result.line,
+                        "ok": True,
+                        "booking_id": result.booking_id,
+                        "total_cost": result.total_cost,
+                        "points_earned": result.points_earned,
+                    }
+                )
+            )
+        else:
+            rejected += 1
+            print(to_json({"line": result.line, "ok": False, "error": result.reason}))
+    if rejected and args.atomic or args.dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    booked = 0 if rejected and args.atomic else len(results) - rejected
+    print(f"{booked} booked, {rejected} rejected", file=sys.stderr)
+    return rejected
+
+
+def run_report(conn, args):
+    """Print a summary or occupancy report of [--from, --to)."""
+    import reports  # NumPy is only needed for reports
+
+    if args.end <= args.start:
+        raise ValueError("--to must be after --from")
+    cols = reports.load_bookings(conn, args.start, args.end)
+    conn.rollback()  # read-only snapshot
+    if args.kind == "summary":
+        rows, columns = reports.summary(cols, args.start, args.end, args.group), reports.SUMMARY_COLUMNS
+    else:
+        rows = reports.occupancy(cols, args.start, args.end, args.period, args.group)
+        columns = reports.OCCUPANCY_COLUMNS
+    if args.format == "csv":
+        write_csv(rows, columns)
+    else:
+        print(to_json({"ok": True, "report": args.kind, "bookings": len(cols.start), "count": len(rows), "results": rows}))
+
+
+def run_batch(conn, parser, args):
+    """Run every command of the file; returns the number that failed."""
+    renters = {}
+    failed = 0
+    with conn.cursor() as cur:
+        for number, argv in read_commands(args.file):
+            cur.execute("SAVEPOINT batch_command")
+            try:
+                result = dict(ok=True, **execute(conn, parser.parse_args(argv), renters))
+                cur.execute("RELEASE SAVEPOINT batch_command")
+            except (Exception, psycopg2.DatabaseError) as error:
+                cur.execute("ROLLBACK TO SAVEPOINT batch_command")
+                result = {"ok": False, "error": str(error).strip()}
+                failed += 1
+            print(to_json(dict(line=number, command=argv[0], **result)))
+            if failed and args.atomic:
+                break
+    if failed and args.atomic or args.dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    print(f"{failed} command(s) failed" if failed else "batch ok", file=sys.stderr)
+    return failed
+
+
+def main(argv):
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except ValueError as error:
+        parser.print_usage(sys.stderr)
+        print(error, file=sys.stderr)
+        return 2
+
+    conn, cur = app.get_connection()
+    if conn is None:
+        return 1
+    try:
+        if args.command == "batch":
+            return 1 if run_batch(conn, build_parser(BatchArgumentParser), args) else 0
+        if args.command == "import":
+            return 1 if run_import(conn, args) else 0
+        if args.command == "report":
+            run_report(conn, args)
+            return 0
+        result = execute(conn, args, {})
+        conn.commit()
+    except (Exception, psycopg2.DatabaseError) as error:
+        conn.rollback()
+        print(to_json({"ok": False, "error": str(error).strip()}))
+        return 1
+    finally:
+        app.release_connection(conn, cur)
+
+    if args.command == "search" and args.format == "csv":
+        write_csv(result["results"])
+    else:
+        print(to_json(dict(ok=True, **result)))
+    return 0
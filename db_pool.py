@@ -0,0 +1,218 @@
+import atexit
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
+
+# db_pool.py
+# Process-wide PostgreSQL connection pool used by main.py.
+# - bounded size (pool_max_size), with a warm floor (pool_min_size)
+# - health check (SELECT 1) on connections that sat idle for a while
+# - idle eviction of connections above the floor
+# - context-manager checkout/return via pool.connection()
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers when it was last returned to the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool of PooledConnection objects."""
+
+    def __init__(
+        self,
+        conn_kwargs,
+        min_size=1,
+        max_size=5,
+        timeout=30.0,
+        idle_timeout=300.0,
+        health_check_interval=30.0,
+        connection_factory=PooledConnection,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+
+        self.conn_kwargs = conn_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.connection_factory = connection_factory
+
+        self._idle = []  # LIFO stack of idle connections
+        self._size = 0  # idle + checked out + being opened
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config, connection_factory=PooledConnection):
+        """Build a pool from a DB_CONFIG style dict (values come from env vars)."""
+        return cls(
+            {
+                "host": config["host"],
+                "database": config["dbname"],
+                "user": config["user"],
+                "password": config["password"],
+                "port": config["port"],
+            },
+            min_size=int(config.get("pool_min_size") or 1),
+            max_size=int(config.get("pool_max_size") or 5),
+            timeout=float(config.get("pool_timeout") or 30),
+            idle_timeout=float(config.get("pool_idle_timeout") or 300),
+            health_check_interval=float(config.get("pool_health_check") or 30),
+            connection_factory=connection_factory,
+        )
+
+    def _connect(self):
+        return psycopg2.connect(connection_factory=self.connection_factory, **self.conn_kwargs)
+
+    def _discard(self, conn):
+        """Close a connection and free its slot. Caller must hold the lock."""
+        self._size -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._cond.notify()
+
+    def _evict_idle(self):
+        """Close idle connections past idle_timeout, keeping min_size. Caller holds the lock."""
+        now = time.monotonic()
+        keep = []
+        # oldest connections sit at the bottom of the stack
+        for conn in self._idle:
+            expired = now - conn.last_used > self.idle_timeout
+            if (expired or conn.closed) and self._size > self.min_size:
+                self._discard(conn)
+            else:
+                keep.append(conn)
+        self._idle = keep
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.health_check_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except (Exception, psycopg2.DatabaseError):
+            return False
+
+    def getconn(self):
+        """Check out a connection, opening one if the pool is below max_size."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.pool.PoolError("connection pool is closed")
+                self._evict_idle()
+                conn = None
+                if self._idle:
+                    conn = self._idle.pop()
+                elif self._size < self.max_size:
+                    self._size += 1  # reserve the slot, connect outside the lock
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise psycopg2.pool.PoolError(
+                            f"connection pool exhausted ({self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if conn is None:
+                try:
+                    return self._connect()
+                except BaseException:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+
+            if self._is_healthy(conn):
+                return conn
+            with self._cond:
+                self._discard(conn)
+
+    def putconn(self, conn, discard=False):
+        """Return a connection. Open transactions are rolled back first."""
+        if not discard and not conn.closed:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except (Exception, psycopg2.DatabaseError):
+                discard = True
+
+        with self._cond:
+            if discard or conn.closed or self._closed:
+                self._discard(conn)
+                return
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+            self._evict_idle()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Context manager: check out a connection and always hand it back."""
+        conn = self.getconn()
+        try:
+            yield conn
+        finally:
+            self.putconn(conn)
+
+    def closeall(self):
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                self._discard(conn)
+            self._idle = []
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "max_size": self.max_size}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(config, connection_factory=PooledConnection):
+    """Return the process-wide pool, creating it from config on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool.from_config(config, connection_factory)
+    return _pool
+
+
+def set_pool(pool):
+    """Replace the process-wide pool, closing the old one (e.g. with an instrumented pool)."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, pool
+    if old is not None:
+        old.closeall()
+
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+atexit.register(close_pool)
@@ -0,0 +1,483 @@
+import argparse
+import io
+import math
+import random
+import time
+import uuid
+from datetime import date, timedelta
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from run import DB_CONFIG
+
+# generate_data.py
+# Synthetic data generator for measuring main.py at scale.
+# - users, agents, renters (+ addresses, cards, rewards), schools, properties in
+#   all five subtype tables, property/school links and bookings
+# - locations get coordinates near their zip code's centroid (geocode_zip is
+#   filled for every generated zip code); properties link to schools in the
+#   same city with the computed distance
+# - rows are streamed to PostgreSQL with COPY FROM STDIN, chunk_rows at a time
+# - deterministic: the same --seed and counts always produce the same rows/IDs
+#
+# Example: python generate_data.py --properties 1M --truncate
+
+# city, state, zip code prefix, city center latitude / longitude
+CITIES = [
+    ("Chicago", "IL", "606", 41.88, -87.63),
+    ("St. Louis", "MO", "631", 38.63, -90.2),
+    ("Orlando", "FL", "328", 28.54, -81.38),
+    ("Austin", "TX", "787", 30.27, -97.74),
+    ("Denver", "CO", "802", 39.74, -104.99),
+    ("Seattle", "WA", "981", 47.61, -122.33),
+    ("Boston", "MA", "021", 42.36, -71.06),
+    ("Phoenix", "AZ", "850", 33.45, -112.07),
+    ("Atlanta", "GA", "303", 33.75, -84.39),
+    ("Nashville", "TN", "372", 36.16, -86.78),
+    ("Portland", "OR", "972", 45.52, -122.68),
+    ("Minneapolis", "MN", "554", 44.98, -93.27),
+    ("San Diego", "CA", "921", 32.72, -117.16),
+    ("Los Angeles", "CA", "900", 34.05, -118.24),
+    ("New York", "NY", "100", 40.71, -74.01),
+    ("Miami", "FL", "331", 25.76, -80.19),
+    ("Dallas", "TX", "752", 32.78, -96.8),
+    ("Houston", "TX", "770", 29.76, -95.37),
+    ("Kansas City", "MO", "641", 39.1, -94.58),
+    ("Milwaukee", "WI", "532", 43.04, -87.91),
+    ("Detroit", "MI", "482", 42.33, -83.05),
+    ("Columbus", "OH", "432", 39.96, -83.0),
+    ("Pittsburgh", "PA", "152", 40.44, -79.99),
+    ("Philadelphia", "PA", "191", 39.95, -75.17),
+    ("Charlotte", "NC", "282", 35.23, -80.84),
+    ("Raleigh", "NC", "276", 35.78, -78.64),
+    ("Salt Lake City", "UT", "841", 40.76, -111.89),
+    ("Las Vegas", "NV", "891", 36.17, -115.14),
+    ("New Orleans", "LA", "701", 29.95, -90.07),
+    ("Madison", "WI", "537", 43.07, -89.4),
+]
+STREETS = [
+    "State St", "Elm St", "Oak St", "Lake Shore Dr", "Market St", "Main St",
+    "Maple Ave", "Cedar Ln", "Park Ave", "Washington Blvd", "Lincoln Way",
+    "Honeygrove Ct", "Sunset Blvd", "River Rd", "Hill St", "Pine St",
+]
+FIRST_NAMES = [
+    "Tim", "Aidan", "Yousef", "Emily", "Maria", "James", "Priya", "Wei", "Sofia",
+    "Daniel", "Aisha", "Lucas", "Hannah", "Omar", "Grace", "Mateo", "Chloe",
+    "Noah", "Fatima", "Ethan", "Olivia", "Ravi", "Isabel", "Kenji",
+]
+LAST_NAMES = [
+    "Smith", "Garcia", "Nguyen", "Patel", "Johnson", "Kim", "Brown", "Lopez",
+    "Baros", "Khan", "Miller", "Davis", "Chen", "Wilson", "Moore", "Taylor",
+    "Anderson", "Thomas", "Martin", "Clark",
+]
+AGENCIES = ["Star Realtors", "Moon Realtors", "Sun Realty", "Harbor Homes", "Keystone Properties"]
+JOB_TITLES = ["Agent", "Senior Agent", "Broker", "Listing Agent"]
+BUILDING_TYPES = ["Studio", "Condo", "Penthouse", "Loft", "HighRise"]
+BUSINESS_TYPES = ["Bank", "Retail", "Office", "Restaurant", "Warehouse"]
+SCHOOL_SUFFIXES = ["Elementary", "Middle School", "High School", "Academy"]
+
+# property type -> (share of listings, description, rent range, sale range)
+PROPERTY_TYPES = {
+    "House": (0.35, "A fun place to live", (1200, 6000), (150000, 1500000)),
+    "Apartment": (0.35, "A fun place to rent", (600, 5000), (90000, 900000)),
+    "CommercialBuilding": (0.1, "A fun place to work", (3000, 40000), (250000, 5000000)),
+    "Land": (0.1, "A fun place to build", (500, 5000), (20000, 2000000)),
+    "VacationHome": (0.1, "A fun place to relax", (1500, 12000), (200000, 3000000)),
+}
+
+# COPY order: every table only references tables earlier in the list
+TABLES = [
+    ("users", "UserID, Name, Email, Type"),
+    ("locations", "LocationID, Address, City, State, ZipCode, Country, Latitude, Longitude"),
+    ("user_x_address", "UserAddressID, UserID, LocationID"),
+    ("agent", "AgentID, UserID, JobTitle, Agency, ContactInfo"),
+    ("renter", "RenterID, UserID, MoveInDate, PreferedLocations, Budget"),
+    ("card", "CardID, RenterID, AddressID, CardNumber, ExpirationDate, CVV"),
+    ("rewards_member", "RenterID, Points, JoinedAt"),
+    ("school", "SchoolID, Name, AddressID"),
+    (
+        "property",
+        "PropertyID, Type, LocationID, AgentID, ListingType, Description, Price, Availability, CrimeRate",
+    ),
+    ("house", "HouseID, PropertyID, NumRooms, SquareFeet"),
+    ("apartment", "ApartmentID, PropertyID, BuildingType, Floor, NumRooms, SquareFeet"),
+    ("commercialBuilding", "CommercialBuildingID, PropertyID, SquareFeet, BusinessType"),
+    ("land", "LandID, PropertyID"),
+    ("vacationHome", "VacationHomeID, PropertyID"),
+    ("property_x_school", "PropertySchoolID, PropertyID, SchoolID, DistanceMiles"),
+    ("booking", "BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate, BookedAt"),
+]
+
+# one code per ID namespace, mixed into the generated UUIDs
+ID_KINDS = {
+    kind: code
+    for code, kind in enumerate(
+        [
+            "user", "location", "user_address", "agent", "renter", "card", "school",
+            "property", "house", "apartment", "commercial", "land", "vacation",
+            "property_school", "booking",
+        ]
+    )
+}
+
+
+def parse_count(value):
+    """Parse 1000, 1K, 2.5M, ... into an int."""
+    value = value.strip().upper().replace("_", "")
+    scale = {"K": 1_000, "M": 1_000_000}.get(value[-1:], 1)
+    if scale != 1:
+        value = value[:-1]
+    try:
+        count = int(float(value) * scale)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid count: {value}")
+    if count < 0:
+        raise argparse.ArgumentTypeError(f"Invalid count: {value}")
+    return count
+
+
+class Loader:
+    """Buffers COPY text rows per table and streams them in chunks.
+
+    Tables are always flushed in TABLES order, so foreign keys only point at
+    rows that were copied earlier. Generated text never contains tabs,
+    newlines or backslashes, so rows are written without COPY escaping.
+    """
+
+    def __init__(self, cur, seed, chunk_rows=50000):
+        self.cur = cur
+        self.chunk_rows = chunk_rows
+        self.seed_bits = (seed & 0xFFFFFFFFFFFF) << 80
+        self.buffers = {table: [] for table, _ in TABLES}
+        self.counts = {table: 0 for table, _ in TABLES}
+        self.pending = 0
+
+    def make_id(self, kind, i):
+        """Deterministic UUID for row i of an ID namespace."""
+        return str(uuid.UUID(int=self.seed_bits | ID_KINDS[kind] << 52 | i, version=4))
+
+    def add(self, table, *values):
+        self.buffers[table].append(
+            "\t".join("\\N" if v is None else str(v) for v in values) + "\n"
+        )
+        self.pending += 1
+        if self.pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        for table, columns in TABLES:
+            rows = self.buffers[table]
+            if rows:
+                self.cur.copy_expert(
+                    f"COPY {table} ({columns}) FROM STDIN", io.StringIO("".join(rows))
+                )
+                self.counts[table] += len(rows)
+                self.buffers[table] = []
+        self.pending = 0
+
+
+def zip_centroid(city_index, n):
+    """Centroid of zip code n of a city: a 10 x 10 grid around the city center."""
+    _, _, _, lat, lon = CITIES[city_index]
+    return round(lat + (n // 10 - 4.5) * 0.03, 4), round(lon + (n % 10 - 4.5) * 0.04, 4)
+
+
+def geocode_rows():
+    """geocode_zip rows for every zip code the generator uses."""
+    for index, (city, state, zip3, _, _) in enumerate(CITIES):
+        for n in range(100):
+            yield (f"{zip3}{n:02d}", city, state) + zip_centroid(index, n)
+
+
+def random_place(rng):
+    """(city index, city, state, zip code, latitude, longitude) of a random address."""
+    index = rng.randrange(len(CITIES))
+    city, state, zip3, _, _ = CITIES[index]
+    n = rng.randint(0, 99)
+    lat, lon = zip_centroid(index, n)
+    return (
+        index,
+        city,
+        state,
+        f"{zip3}{n:02d}",
+        round(lat + rng.uniform(-0.015, 0.015), 6),
+        round(lon + rng.uniform(-0.02, 0.02), 6),
+    )
+
+
+def distance_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance, same formula as geo_distance_miles() in SQL."""
+    a = (
+        math.sin(math.radians(lat2 - lat1) / 2) ** 2
+        + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * 3958.8 * math.asin(math.sqrt(min(1.0, a)))
+
+
+def add_person(loader, rng, kind, i, user_type):
+    """users + home location + user_x_address for agent/renter i. Returns (user_id, location_id, city)."""
+    n = ID_KINDS[kind] << 40 | i  # unique per person across agents and renters
+    user_id = loader.make_id("user", n)
+    location_id = loader.make_id("location", n)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    _, city, state, zipcode, lat, lon = random_place(rng)
+    loader.add(
+        "users", user_id, f"{first} {last}", f"{first}.{last}.{kind}{i}@example.com".lower(), user_type
+    )
+    loader.add(
+        "locations",
+        location_id,
+        f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+        city,
+        state,
+        zipcode,
+        "United States",
+        lat,
+        lon,
+    )
+    loader.add("user_x_address", loader.make_id("user_address", n), user_id, location_id)
+    return user_id, location_id, city
+
+
+def generate_agents(loader, rng, agents):
+    for i in range(agents):
+        user_id, _, _ = add_person(loader, rng, "agent", i, "Agent")
+        loader.add(
+            "agent",
+            loader.make_id("agent", i),
+            user_id,
+            rng.choice(JOB_TITLES),
+            rng.choice(AGENCIES),
+            f"{rng.randint(2000000000, 9899999999)}",
+        )
+
+
+def generate_renters(loader, rng, renters, rewards_share=0.3):
+    for i in range(renters):
+        user_id, location_id, city = add_person(loader, rng, "renter", i, "Renter")
+        renter_id = loader.make_id("renter", i)
+        loader.add(
+            "renter",
+            renter_id,
+            user_id,
+            date(2024, 1, 1) + timedelta(days=rng.randrange(1095)),
+            city,
+            f"{rng.randint(500, 8000)}.00",
+        )
+        # card 2*i is the renter's primary card (used by bookings), 2*i+1 is optional
+        for k in range(1 if rng.random() < 0.7 else 2):
+            loader.add(
+                "card",
+                loader.make_id("card", 2 * i + k),
+                renter_id,
+                location_id,
+                f"4{rng.randrange(10**15):015d}",
+                date(2026 + rng.randrange(6), rng.randint(1, 12), 1),
+                f"{rng.randrange(1000):03d}",
+            )
+        if rng.random() < rewards_share:
+            loader.add("rewards_member", renter_id, rng.randrange(5000), "2025-01-01 00:00:00")
+
+
+def generate_schools(loader, rng, schools):
+    """Returns the schools of each city as lists of (school number, latitude, longitude)."""
+    by_city = [[] for _ in CITIES]
+    for i in range(schools):
+        location_id = loader.make_id("location", ID_KINDS["school"] << 40 | i)
+        index, city, state, zipcode, lat, lon = random_place(rng)
+        by_city[index].append((i, lat, lon))
+        loader.add(
+            "locations",
+            location_id,
+            f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            city,
+            state,
+            zipcode,
+            "United States",
+            lat,
+            lon,
+        )
+        loader.add(
+            "school",
+            loader.make_id("school", i),
+            f"{rng.choice(LAST_NAMES)} {rng.choice(SCHOOL_SUFFIXES)}",
+            location_id,
+        )
+    return by_city
+
+
+def generate_properties(
+    loader, rng, properties, agents, renters, schools_by_city, schools_per_property, bookings_per_property
+):
+    type_names = list(PROPERTY_TYPES)
+    type_weights = [PROPERTY_TYPES[t][0] for t in type_names]
+    booking_n = 0
+    for i in range(properties):
+        ptype = rng.choices(type_names, type_weights)[0]
+        _, description, rent_range, sale_range = PROPERTY_TYPES[ptype]
+        listing_type = "Rent" if rng.random() < 0.6 else "Sale"
+        low, high = rent_range if listing_type == "Rent" else sale_range
+        property_id = loader.make_id("property", i)
+        location_id = loader.make_id("location", ID_KINDS["property"] << 40 | i)
+        agent_id = loader.make_id("agent", rng.randrange(agents)) if agents else None
+        index, city, state, zipcode, lat, lon = random_place(rng)
+
+        loader.add(
+            "locations",
+            location_id,
+            f"{rng.randint(1, 9999)} {rng.choice(STREETS)}",
+            city,
+            state,
+            zipcode,
+            "United States",
+            lat,
+            lon,
+        )
+        loader.add(
+            "property",
+            property_id,
+            ptype,
+            location_id,
+            agent_id,
+            listing_type,
+            description,
+            f"{rng.uniform(low, high):.2f}",
+            "Active" if rng.random() < 0.9 else "Inactive",
+            f"{rng.uniform(0, 0.05):.4f}",
+        )
+        if ptype == "House":
+            rooms = rng.randint(1, 7)
+            loader.add("house", loader.make_id("house", i), property_id, rooms, rooms * rng.randint(350, 700))
+        elif ptype == "Apartment":
+            rooms = rng.randint(1, 5)
+            loader.add(
+                "apartment",
+                loader.make_id("apartment", i),
+                property_id,
+                rng.choice(BUILDING_TYPES),
+                rng.randint(1, 40),
+                rooms,
+                rooms * rng.randint(300, 500),
+            )
+        elif ptype == "CommercialBuilding":
+            loader.add(
+                "commercialBuilding",
+                loader.make_id("commercial", i),
+                property_id,
+                rng.randint(2000, 60000),
+                rng.choice(BUSINESS_TYPES),
+            )
+        elif ptype == "Land":
+            loader.add("land", loader.make_id("land", i), property_id)
+        else:
+            loader.add("vacationHome", loader.make_id("vacation", i), property_id)
+
+        nearby = schools_by_city[index]
+        for k, (s, school_lat, school_lon) in enumerate(
+            rng.sample(nearby, min(schools_per_property, len(nearby)))
+        ):
+            loader.add(
+                "property_x_school",
+                loader.make_id("property_school", i * schools_per_property + k),
+                property_id,
+                loader.make_id("school", s),
+                f"{distance_miles(lat, lon, school_lat, school_lon):.2f}",
+            )
+
+        # rentals get back-to-back, non-overlapping stays (inclusive dates)
+        if listing_type == "Rent" and renters:
+            start = date(2024, 1, 1) + timedelta(days=rng.randrange(90))
+            for _ in range(rng.randint(0, 2 * bookings_per_property)):
+                end = start + timedelta(days=rng.randint(1, 14))
+                r = rng.randrange(renters)
+                loader.add(
+                    "booking",
+                    loader.make_id("booking", booking_n),
+                    loader.make_id("card", 2 * r),
+                    loader.make_id("renter", r),
+                    agent_id,
+                    property_id,
+                    start,
+                    end,
+                    start - timedelta(days=rng.randint(0, 180)),  # booked up to 6 months ahead
+                )
+                booking_n += 1
+                start = end + timedelta(days=rng.randint(1, 60))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic real-estate data with COPY.")
+    parser.add_argument("--properties", type=parse_count, default=1000, help="e.g. 1K, 250K, 10M")
+    parser.add_argument("--renters", type=parse_count, help="default: properties / 2")
+    parser.add_argument("--agents", type=parse_count, help="default: properties / 100")
+    parser.add_argument("--schools", type=parse_count, help="default: properties / 100")
+    parser.add_argument("--schools-per-property", type=int, default=2)
+    parser.add_argument("--bookings-per-property", type=int, default=2, help="average per rental")
+    parser.add_argument("--chunk-rows", type=parse_count, default=50000, help="rows per COPY round")
+    parser.add_argument("--seed", type=int, default=425)
+    parser.add_argument("--truncate", action="store_true", help="empty all tables first")
+    args = parser.parse_args()
+
+    renters = args.renters if args.renters is not None else max(1, args.properties // 2)
+    agents = args.agents if args.agents is not None else max(1, args.properties // 100)
+    schools = args.schools if args.schools is not None else max(1, args.properties // 100)
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    started = time.perf_counter()
+    try:
+        if args.truncate:
+            cur.execute(f"TRUNCATE {', '.join(table for table, _ in TABLES)} CASCADE")
+
+        # reference data, kept across --truncate
+        execute_values(
+            cur,
+            "INSERT INTO geocode_zip (ZipCode, City, State, Latitude, Longitude) VALUES %s "
+            "ON CONFLICT (ZipCode) DO NOTHING",
+            list(geocode_rows()),
+            page_size=5000,
+        )
+
+        loader = Loader(cur, args.seed, args.chunk_rows)
+        # each section has its own RNG stream so changing one count keeps the others' rows
+        generate_agents(loader, random.Random(f"{args.seed}-agents"), agents)
+        generate_renters(loader, random.Random(f"{args.seed}-renters"), renters)
+        schools_by_city = generate_schools(loader, random.Random(f"{args.seed}-schools"), schools)
+        generate_properties(
+            loader,
+            random.Random(f"{args.seed}-properties"),
+            args.properties,
+            agents,
+            renters,
+            schools_by_city,
+            args.schools_per_property,
+            args.bookings_per_property,
+        )
+        loader.flush()
+        conn.commit()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Data generation error: {error}")
+        conn.rollback()
+        raise SystemExit(1)
+
+    conn.autocommit = True
+    cur.execute("ANALYZE")
+    cur.close()
+    conn.close()
+
+    elapsed = time.perf_counter() - started
+    total = sum(loader.counts.values())
+    for table, _ in TABLES:
+        print(f"{table:<20}{loader.counts[table]:>12,}")
+    print(f"{'total':<20}{total:>12,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import csv
+import io
+import os
+
+import psycopg2
+
+from run import DB_CONFIG
+
+# geocode.py
+# Offline geocoding for locations (SQL/migrations/006_geo_search.sql).
+# - loads zip code centroids from a local file into geocode_zip (upsert)
+# - fills Latitude/Longitude of locations from their zip code; the
+#   property_search triggers pick the coordinates up set-based
+# - recomputes every property/school distance in one statement, and with
+#   --link-schools also links each property to all schools within that radius
+#
+# Accepted files: CSV with ZipCode,City,State,Latitude,Longitude columns (see
+# SQL/zip_centroids.csv), or the US Census ZCTA Gazetteer text file
+# (tab-separated GEOID ... INTPTLAT INTPTLONG).
+#
+# Example: python geocode.py --file 2023_Gaz_zcta_national.txt --link-schools 5
+
+DEFAULT_FILE = os.path.join("SQL", "zip_centroids.csv")
+
+
+def read_centroids(path):
+    """Yield (zip, city, state, latitude, longitude) rows from a CSV or Gazetteer file."""
+    with open(path, newline="", encoding="utf-8") as f:
+        sample = f.readline()
+        f.seek(0)
+        delimiter = "\t" if "\t" in sample else ","
+        reader = csv.DictReader(f, delimiter=delimiter)
+        # Gazetteer headers carry trailing whitespace
+        reader.fieldnames = [name.strip() for name in reader.fieldnames]
+        for row in reader:
+            if "GEOID" in row:
+                yield row["GEOID"].strip(), None, None, float(row["INTPTLAT"]), float(row["INTPTLONG"])
+            else:
+                yield (
+                    row["ZipCode"].strip(),
+                    (row.get("City") or "").strip() or None,
+                    (row.get("State") or "").strip() or None,
+                    float(row["Latitude"]),
+                    float(row["Longitude"]),
+                )
+
+
+def load_centroids(cur, rows):
+    """COPY centroids into geocode_zip, replacing existing zip codes. Returns the row count."""
+    buffer = io.StringIO()
+    for zipcode, city, state, lat, lon in rows:
+        values = [zipcode, city, state, repr(lat), repr(lon)]
+        buffer.write("\t".join("\\N" if v is None else v for v in values) + "\n")
+    buffer.seek(0)
+    cur.execute("CREATE TEMP TABLE geocode_load (LIKE geocode_zip) ON COMMIT DROP")
+    cur.copy_expert("COPY geocode_load (ZipCode, City, State, Latitude, Longitude) FROM STDIN", buffer)
+    cur.execute(
+        """
+        INSERT INTO geocode_zip (ZipCode, City, State, Latitude, Longitude)
+        SELECT DISTINCT ON (ZipCode) ZipCode, City, State, Latitude, Longitude
+        FROM geocode_load
+        ON CONFLICT (ZipCode) DO UPDATE SET
+            City = COALESCE(EXCLUDED.City, geocode_zip.City),
+            State = COALESCE(EXCLUDED.State, geocode_zip.State),
+            Latitude = EXCLUDED.Latitude,
+            Longitude = EXCLUDED.Longitude
+        """
+    )
+    return cur.rowcount
+
+
+def geocode_locations(cur, overwrite=False):
+    """Set coordinates of locations from their zip code. Returns the locations updated."""
+    cur.execute(
+        """
+        UPDATE locations l
+        SET Latitude = g.Latitude, Longitude = g.Longitude
+        FROM geocode_zip g
+        WHERE g.ZipCode = l.ZipCode
+          AND (%s OR l.Latitude IS NULL)
+        """,
+        (overwrite,),
+    )
+    return cur.rowcount
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load zip code centroids and geocode locations.")
+    parser.add_argument("--file", default=DEFAULT_FILE, help=f"centroid file (default: {DEFAULT_FILE})")
+    parser.add_argument("--overwrite", action="store_true", help="re-geocode locations that have coordinates")
+    parser.add_argument(
+        "--link-schools", type=float, metavar="MILES", help="link every property to the schools within MILES"
+    )
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(
+        host=DB_CONFIG["host"],
+        database=DB_CONFIG["dbname"],
+        user=DB_CONFIG["user"],
+        password=DB_CONFIG["password"],
+        port=DB_CONFIG["port"],
+    )
+    cur = conn.cursor()
+    try:
+        zips = load_centroids(cur, read_centroids(args.file))
+        located = geocode_locations(cur, args.overwrite)
+        cur.execute("SELECT refresh_school_distances(NULL)")
+        distances = cur.fetchone()[0]
+        linked = 0
+        if args.link_schools is not None:
+            cur.execute("SELECT link_nearby_schools(NULL, %s)", (args.link_schools,))
+            linked = cur.fetchone()[0]
+        conn.commit()
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Geocoding error: {error}")
+        conn.rollback()
+        raise SystemExit(1)
+    finally:
+        cur.close()
+        conn.close()
+
+    print(f"{zips} zip codes loaded, {located} locations geocoded, {distances} school distances computed")
+    if args.link_schools is not None:
+        print(f"{linked} property/school links within {args.link_schools:g} miles")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict
+
+# listing_cache.py
+# In-process read-through cache for property listing pages (search_properties,
+# list_all_properties).
+# - keys are normalized search parameters plus the page position
+# - entries expire after ttl seconds; least recently used entries are evicted
+#   beyond max_entries or max_rows cached rows
+# - every entry carries tags naming the data it was built from ("properties",
+#   "bookings", ...) and the properties it shows ("property:<id>"); writers
+#   invalidate by tag after they commit, listing_events.py on NOTIFY
+# - hit/miss/eviction counters via stats()
+
+
+def property_tag(property_id):
+    """Tag of entries that show the given property."""
+    return f"property:{property_id}"
+
+
+class ListingCache:
+    """Thread-safe TTL + LRU cache of listing pages (tuples of rows)."""
+
+    def __init__(self, ttl=60.0, max_entries=256, max_rows=50000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()  # key -> (expires_at, rows, tags)
+        self._rows = 0
+        self._generation = 0  # bumped by invalidate(); loads that raced one are not cached
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def _drop(self, key):
+        """Remove one entry. Caller must hold the lock."""
+        _, rows, _ = self._entries.pop(key)
+        self._rows -= len(rows)
+
+    def get(self, key):
+        """Cached rows for key (as a new list), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key, rows, tags=("properties",), generation=None):
+        if not self.enabled or len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tuple(rows), frozenset(tags))
+            self._rows += len(rows)
+            while len(self._entries) > self.max_entries or self._rows > self.max_rows:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_load(self, key, load, tags=("properties",), id_of=None):
+        """Read-through lookup: rows from the cache, else load() and cache them.
+
+        With id_of, each row also tags the entry as "property:<id_of(row)>".
+        """
+        if not self.enabled:
+            return load()
+        rows = self.get(key)
+        if rows is None:
+            generation = self._generation
+            rows = load()
+            if id_of is not None:
+                tags = tuple(tags) + tuple(property_tag(id_of(row)) for row in rows)
+            self.put(key, rows, tags, generation)
+        return rows
+
+    def invalidate(self, *tags):
+        """Drop entries built from any of the given tags (all entries if none given)."""
+        with self._lock:
+            if tags:
+                doomed = [k for k, (_, _, t) in self._entries.items() if not t.isdisjoint(tags)]
+            else:
+                doomed = list(self._entries)
+            for key in doomed:
+                self._drop(key)
+            self._generation += 1
+            self.invalidations += len(doomed)
+            return len(doomed)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "rows": self._rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,122 @@
+import json
+import select
+import threading
+
+import psycopg2
+import psycopg2.extensions
+
+from listing_cache import property_tag
+
+# listing_events.py
+# Cross-process listing cache invalidation. The triggers in
+# SQL/migrations/003_listing_notify.sql NOTIFY listing_changes with the table,
+# operation and affected IDs of every write; ListingListener LISTENs on a
+# dedicated connection in a daemon thread and evicts the matching cache entries.
+# After a lost connection it reconnects and clears the whole cache, since
+# notifications sent in the meantime are gone.
+
+CHANNEL = "listing_changes"
+
+# tables whose rows are shown per property (ids are PropertyIDs) -> broader tag
+# for entries that might gain the property
+PROPERTY_DETAIL_TABLES = {
+    "house": "bedrooms",
+    "apartment": "bedrooms",
+    "commercialbuilding": None,
+    "land": None,
+    "vacationhome": None,
+    "property_x_school": None,
+}
+
+
+def tags_for_event(event):
+    """Cache tags to invalidate for a notification payload; None means everything."""
+    table, ids = event.get("table"), event.get("ids")
+    if table == "booking":
+        return ["bookings"]
+    if table == "school":
+        return ["schools"]
+    if table in PROPERTY_DETAIL_TABLES:
+        if ids is None:
+            return ["properties"]
+        broader = PROPERTY_DETAIL_TABLES[table]
+        return ([broader] if broader else []) + [property_tag(i) for i in ids]
+    if table in ("property", "locations"):
+        # price, type, availability or city changes can move a property into any search
+        return ["properties"]
+    return None
+
+
+class ListingListener(threading.Thread):
+    """Daemon thread that applies listing_changes notifications to a ListingCache."""
+
+    def __init__(self, conn_kwargs, cache, poll_interval=5.0, retry_interval=5.0):
+        super().__init__(name="listing-listener", daemon=True)
+        self.conn_kwargs = conn_kwargs
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self.retry_interval = retry_interval
+        self.events = 0
+        self.evicted = 0
+        self.reconnects = 0
+        self._stopping = threading.Event()
+
+    @classmethod
+    def from_config(cls, config, cache):
+        """Build a listener from a DB_CONFIG style dict."""
+        return cls(
+            {
+                "host": config["host"],
+                "database": config["dbname"],
+                "user": config["user"],
+                "password": config["password"],
+                "port": config["port"],
+            },
+            cache,
+        )
+
+    def handle(self, payload):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            event = {}
+        self.events += 1
+        tags = tags_for_event(event)
+        if tags is None:
+            self.evicted += self.cache.invalidate()
+        elif tags:
+            self.evicted += self.cache.invalidate(*tags)
+
+    def listen(self):
+        conn = psycopg2.connect(**self.conn_kwargs)
+        try:
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {CHANNEL}")
+            while not self._stopping.is_set():
+                if select.select([conn], [], [], self.poll_interval) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    self.handle(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    def run(self):
+        first = True
+        while not self._stopping.is_set():
+            if not first:
+                # anything sent while we were disconnected is lost
+                self.reconnects += 1
+                self.evicted += self.cache.invalidate()
+            first = False
+            try:
+                self.listen()
+            except (Exception, psycopg2.DatabaseError):
+                self._stopping.wait(self.retry_interval)
+
+    def stop(self):
+        self._stopping.set()
+
+    def stats(self):
+        return {"events": self.events, "evicted": self.evicted, "reconnects": self.reconnects}
@@ -1,9 +1,27 @@
 import psycopg2
-import uuid
-from datetime import datetime
+import psycopg2.errors
+from datetime import date, datetime, timedelta
 import dotenv
 import os
 import re
+import sys
+
+import db_pool
+import listing_cache
+import listing_events
+import query_stats
+import search
+from repositories import (
+    PROPERTY_TYPES,
+    AddressRepository,
+    AnalyticsRepository,
+    BookingRepository,
+    PaymentRepository,
+    PropertyRepository,
+    RewardsRepository,
+    UserRepository,
+)
+from session import Session
 
 # main.py
 # Functions:
@@ -13,9 +31,10 @@ import re
 # - payment/address management
 # - agent property management
 # - booking management
+# - agent analytics dashboard
 
 # Global session state
-current_user = None  # {'user_id', 'name', 'email', 'type', 'renter_id'?, 'agent_id'?}
+current_session = None  # Session of the logged-in user (session.py)
 date_pattern = r"^\d{4}-\d{2}-\d{2}$"
 
 dotenv.load_dotenv()
@@ -26,8 +45,31 @@ DB_CONFIG = {
     "password": os.getenv("password"),
     "host": os.getenv("host"),
     "port": os.getenv("port"),
+    # connection pool limits (see db_pool.py)
+    "pool_min_size": os.getenv("pool_min_size", "1"),
+    "pool_max_size": os.getenv("pool_max_size", "5"),
+    "pool_timeout": os.getenv("pool_timeout", "30"),
+    "pool_idle_timeout": os.getenv("pool_idle_timeout", "300"),
+    "pool_health_check": os.getenv("pool_health_check", "30"),
 }
 
+# Listing pages (keyset pagination) and server-side cursor batch size
+PAGE_SIZE = int(os.getenv("page_size", "20"))
+STREAM_ITERSIZE = int(os.getenv("stream_itersize", "500"))
+
+# add_property links schools this close to the new property (SQL/migrations/006)
+NEARBY_SCHOOL_MILES = float(os.getenv("nearby_school_miles", "5"))
+
+# Listing pages cached in this process (see listing_cache.py); ttl 0 disables
+LISTING_CACHE = listing_cache.ListingCache(
+    ttl=float(os.getenv("listing_cache_ttl", "60")),
+    max_entries=int(os.getenv("listing_cache_size", "256")),
+    max_rows=int(os.getenv("listing_cache_max_rows", "50000")),
+)
+# Evicts LISTING_CACHE entries on writes from other processes (LISTEN/NOTIFY)
+LISTING_NOTIFY = os.getenv("listing_notify", "1") != "0"
+listing_listener = None
+
 def read_date(prompt: str):
     s = input(prompt).strip()
     if not s:
@@ -40,16 +82,9 @@ def read_date(prompt: str):
 
 
 def get_connection():
-    """Connect to the PostgreSQL database server using .env config."""
+    """Check out a pooled connection to the PostgreSQL database server."""
     try:
-        print("Connecting to the PostgreSQL database...")
-        conn = psycopg2.connect(
-            host=DB_CONFIG["host"],
-            database=DB_CONFIG["dbname"],
-            user=DB_CONFIG["user"],
-            password=DB_CONFIG["password"],
-            port=DB_CONFIG["port"],
-        )
+        conn = db_pool.get_pool(DB_CONFIG, query_stats.connection_factory()).getconn()
         cur = conn.cursor()
         return conn, cur
     except (Exception, psycopg2.DatabaseError) as error:
@@ -57,9 +92,96 @@ def get_connection():
         return None, None
 
 
+def release_connection(conn, cur):
+    """Close the cursor and hand the connection back to the pool."""
+    try:
+        cur.close()
+    finally:
+        db_pool.get_pool(DB_CONFIG).putconn(conn)
+
+
+def browse_pages(pager, show_rows, select_prompt=None):
+    """Page through a KeysetPager whose first page is loaded.
+
+    Without select_prompt the user can page or stream all remaining rows; with
+    it, the row picked by its listed number is returned (None if invalid).
+    """
+    while True:
+        show_rows(pager.rows, pager.first_index())
+        nav = []
+        if pager.has_next:
+            nav.append("n = next page")
+        if pager.has_prev:
+            nav.append("p = previous page")
+        if pager.has_next and select_prompt is None:
+            nav.append("a = show all remaining")
+        if nav:
+            print(f"Page {pager.page}: " + ", ".join(nav))
+        elif select_prompt is None:
+            return None
+
+        if select_prompt is None:
+            choice = input("Select an option (blank when done): ").strip().lower()
+        else:
+            choice = input(select_prompt).strip().lower()
+
+        if choice == "n" and pager.has_next:
+            pager.next()
+        elif choice == "p" and pager.has_prev:
+            pager.prev()
+        elif choice == "a" and select_prompt is None and pager.has_next:
+            show_rows(pager.stream_rest(), pager.first_index() + len(pager.rows))
+            return None
+        elif select_prompt is None:
+            return None
+        else:
+            try:
+                offset = int(choice) - pager.first_index()
+            except ValueError:
+                print("Invalid selection.\n")
+                return None
+            if offset < 0 or offset >= len(pager.rows):
+                print("Invalid selection.\n")
+                return None
+            return pager.rows[offset]
+
+
+def mask_card(number):
+    """Card number with all but the last 4 digits starred."""
+    num_str = str(number)
+    if len(num_str) > 4:
+        return "*" * (len(num_str) - 4) + num_str[-4:]
+    return num_str
+
+
+def pick(rows, prompt):
+    """Row chosen by its listed number (from 1), or None if invalid."""
+    try:
+        idx = int(input(prompt).strip())
+    except ValueError:
+        idx = 0
+    if idx < 1 or idx > len(rows):
+        print("Invalid selection.\n")
+        return None
+    return rows[idx - 1]
+
+
+def print_addresses(rows):
+    for idx, loc in enumerate(rows, start=1):
+        print(f"{idx}. {loc.address}, {loc.city}, {loc.state} {loc.zip_code}, {loc.country} (LocationID {loc.location_id})")
+
+
+def print_cards(cards, show_address=False):
+    for idx, card in enumerate(cards, start=1):
+        line = f"{idx}. CardID {card.card_id}, Number {mask_card(card.card_number)}, Exp {card.expiration_date}"
+        if show_address:
+            line += f", AddressID {card.address_id}"
+        print(line)
+
+
 def login():
-    """Authenticate user by email and set session state."""
-    global current_user
+    """Authenticate user by email and load their session (profile, cards, addresses, rewards)."""
+    global current_session
 
     email = input("Enter your email: ").strip()
     if not email:
@@ -71,36 +193,13 @@ def login():
         return False
 
     try:
-        cur.execute(
-            "SELECT UserID, Name, Email, Type FROM users WHERE Email = %s", (email,)
-        )
-        user_row = cur.fetchone()
-
-        if user_row is None:
+        session = Session.login(conn, email)
+        if session is None:
             print("User not found. Please register first.\n")
             return False
 
-        user_id, name, email, user_type = user_row
-        current_user = {
-            "user_id": str(user_id),
-            "name": name,
-            "email": email,
-            "type": user_type,
-        }
-
-        if user_type == "Renter":
-            cur.execute("SELECT RenterID FROM renter WHERE UserID = %s", (user_id,))
-            renter_row = cur.fetchone()
-            if renter_row:
-                current_user["renter_id"] = str(renter_row[0])
-
-        elif user_type == "Agent":
-            cur.execute("SELECT AgentID FROM agent WHERE UserID = %s", (user_id,))
-            agent_row = cur.fetchone()
-            if agent_row:
-                current_user["agent_id"] = str(agent_row[0])
-
-        print(f"\nWelcome, {name}! ({user_type})\n")
+        current_session = session
+        print(f"\nWelcome, {session.name}! ({session.type})\n")
         return True
 
     except (Exception, psycopg2.DatabaseError) as error:
@@ -108,16 +207,15 @@ def login():
         conn.rollback()
         return False
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 def logout():
     """Clear current user session."""
-    global current_user
-    if current_user:
-        print(f"Goodbye, {current_user['name']}!\n")
-    current_user = None
+    global current_session
+    if current_session:
+        print(f"Goodbye, {current_session.name}!\n")
+    current_session = None
 
 
 def register_account():
@@ -127,6 +225,7 @@ def register_account():
         return
 
     try:
+        users = UserRepository(conn)
         print("\n===== Account Registration =====")
 
         name = input("Enter your name: ").strip()
@@ -139,8 +238,7 @@ def register_account():
             print("Email cannot be empty.\n")
             return
 
-        cur.execute("SELECT UserID FROM users WHERE Email = %s", (email,))
-        if cur.fetchone() is not None:
+        if users.email_exists(email):
             print("Email already registered. Please use login instead.\n")
             return
 
@@ -157,18 +255,10 @@ def register_account():
             print("Invalid choice.\n")
             return
 
-        user_id = str(uuid.uuid4())
-
-        cur.execute(
-            "INSERT INTO users (UserID, Name, Email, Type) VALUES (%s, %s, %s, %s)",
-            (user_id, name, email, user_type),
-        )
-
         if user_type == "Renter":
             move_in_date = read_date("Enter move-in date (YYYY-MM-DD): ")
             if move_in_date is None:
                 print("Move-in date cannot be empty or invalid.\n")
-                conn.rollback()
                 return
 
             preferred_locations = input(
@@ -182,35 +272,18 @@ def register_account():
                 budget = float(budget_str)
             except ValueError:
                 print("Invalid budget amount.\n")
-                conn.rollback()
                 return
 
-            renter_id = str(uuid.uuid4())
-            cur.execute(
-                "INSERT INTO renter (RenterID, UserID, MoveInDate, PreferedLocations, Budget) "
-                "VALUES (%s, %s, %s, %s, %s)",
-                (renter_id, user_id, move_in_date, preferred_locations, budget),
-            )
+            user_id = users.create_user(name, email, user_type)
+            users.create_renter(user_id, move_in_date, preferred_locations, budget)
 
         elif user_type == "Agent":
-            job_title = input("Enter job title: ").strip()
-            if not job_title:
-                job_title = None
-
-            agency = input("Enter agency name: ").strip()
-            if not agency:
-                agency = None
+            job_title = input("Enter job title: ").strip() or None
+            agency = input("Enter agency name: ").strip() or None
+            contact_info = input("Enter contact information: ").strip() or None
 
-            contact_info = input("Enter contact information: ").strip()
-            if not contact_info:
-                contact_info = None
-
-            agent_id = str(uuid.uuid4())
-            cur.execute(
-                "INSERT INTO agent (AgentID, UserID, JobTitle, Agency, ContactInfo) "
-                "VALUES (%s, %s, %s, %s, %s)",
-                (agent_id, user_id, job_title, agency, contact_info),
-            )
+            user_id = users.create_user(name, email, user_type)
+            users.create_agent(user_id, job_title, agency, contact_info)
 
         conn.commit()
         print(f"\nRegistration successful! Hello, {name}!\n")
@@ -220,42 +293,21 @@ def register_account():
         print(f"Registration error: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 # ===================== RENTER: PAYMENT INFO =====================
 
 def renter_manage_payment_info():
-    global current_user
-    if current_user is None or current_user.get("type") != "Renter":
+    session = current_session
+    if session is None or session.type != "Renter":
         print("You must be logged in as a renter to manage payment information.\n")
         return
 
-    renter_id = current_user.get("renter_id")
-
+    renter_id = session.renter_id
     if renter_id is None:
-        conn, cur = get_connection()
-        if conn is None:
-            return
-        try:
-            cur.execute(
-                "SELECT RenterID FROM renter WHERE UserID = %s",
-                (current_user["user_id"],),
-            )
-            row = cur.fetchone()
-            if row is None:
-                print("No renter record found for current user.\n")
-                return
-            renter_id = str(row[0])
-            current_user["renter_id"] = renter_id
-        except (Exception, psycopg2.DatabaseError) as error:
-            print(f"Error loading renter info: {error}\n")
-            conn.rollback()
-            return
-        finally:
-            cur.close()
-            conn.close()
+        print("No renter record found for current user.\n")
+        return
 
     while True:
         print("\n===== Payment Information =====")
@@ -275,196 +327,97 @@ def renter_manage_payment_info():
             return
 
         try:
+            payments = PaymentRepository(conn)
             if choice == "4":
-                cur.execute(
-                    "SELECT CardID, CardNumber, ExpirationDate, CVV, AddressID "
-                    "FROM card WHERE RenterID = %s",
-                    (renter_id,),
-                )
-                rows = cur.fetchall()
-                if not rows:
+                cards = session.cards(conn)
+                if not cards:
                     print("No cards found.\n")
                 else:
                     print("\nYour cards:")
-                    for idx, (card_id, number, exp, cvv, addr_id) in enumerate(
-                        rows, start=1
-                    ):
-                        num_str = str(number)
-                        if len(num_str) > 4:
-                            masked = "*" * (len(num_str) - 4) + num_str[-4:]
-                        else:
-                            masked = num_str
-                        print(
-                            f"{idx}. CardID {card_id}, Number {masked}, Exp {exp}, AddressID {addr_id}"
-                        )
+                    print_cards(cards, show_address=True)
                     print()
 
             elif choice == "1":
-                cur.execute(
-                    "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
-                    "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
-                    "WHERE ua.UserID = %s",
-                    (current_user["user_id"],),
-                )
-                addresses = cur.fetchall()
+                addresses = session.addresses(conn)
                 if not addresses:
                     print("You must add an address before adding a card.\n")
                 else:
                     print("\nSelect billing address:")
-                    for idx, row in enumerate(addresses, start=1):
-                        loc_id, addr, city, state, zipcode, country = row
-                        print(
-                            f"{idx}. {addr}, {city}, {state} {zipcode}, {country} (LocationID {loc_id})"
-                        )
-                    addr_choice = input(
-                        "Enter number of billing address: "
-                    ).strip()
-                    try:
-                        addr_idx = int(addr_choice)
-                        if addr_idx < 1 or addr_idx > len(addresses):
-                            print("Invalid selection.\n")
-                        else:
-                            location_id = addresses[addr_idx - 1][0]
-                            card_number = input("Enter card number: ").strip()
-                            expiration_date = input(
-                                "Enter expiration date (YYYY-MM-DD): "
-                            ).strip()
-                            cvv = input("Enter CVV: ").strip()
-                            card_id = str(uuid.uuid4())
-                            cur.execute(
-                                "INSERT INTO card (CardID, RenterID, AddressID, CardNumber, ExpirationDate, CVV) "
-                                "VALUES (%s, %s, %s, %s, %s, %s)",
-                                (
-                                    card_id,
-                                    renter_id,
-                                    location_id,
-                                    card_number,
-                                    expiration_date,
-                                    cvv,
-                                ),
-                            )
-                            conn.commit()
-                            print("Card added.\n")
-                    except ValueError:
-                        print("Invalid selection.\n")
+                    print_addresses(addresses)
+                    address = pick(addresses, "Enter number of billing address: ")
+                    if address is not None:
+                        card_number = input("Enter card number: ").strip()
+                        expiration_date = input(
+                            "Enter expiration date (YYYY-MM-DD): "
+                        ).strip()
+                        cvv = input("Enter CVV: ").strip()
+                        payments.add_card(renter_id, address.location_id, card_number, expiration_date, cvv)
+                        conn.commit()
+                        session.invalidate("cards")
+                        print("Card added.\n")
 
             elif choice == "2":
-                cur.execute(
-                    "SELECT CardID, CardNumber, ExpirationDate, CVV, AddressID "
-                    "FROM card WHERE RenterID = %s",
-                    (renter_id,),
-                )
-                cards = cur.fetchall()
+                cards = session.cards(conn)
                 if not cards:
                     print("No cards to modify.\n")
                 else:
                     print("\nSelect card to modify:")
-                    for idx, row in enumerate(cards, start=1):
-                        card_id, number, exp, cvv, addr_id = row
-                        num_str = str(number)
-                        if len(num_str) > 4:
-                            masked = "*" * (len(num_str) - 4) + num_str[-4:]
-                        else:
-                            masked = num_str
-                        print(
-                            f"{idx}. CardID {card_id}, Number {masked}, Exp {exp}"
+                    print_cards(cards)
+                    card = pick(cards, "Enter number of card: ")
+                    if card is not None:
+                        new_number = input(
+                            "Enter new card number (leave blank to keep current): "
+                        ).strip()
+                        new_exp = input(
+                            "Enter new expiration date YYYY-MM-DD (leave blank to keep current): "
+                        ).strip()
+                        new_cvv = input(
+                            "Enter new CVV (leave blank to keep current): "
+                        ).strip()
+                        payments.update_card(
+                            renter_id,
+                            card.card_id,
+                            new_number or card.card_number,
+                            new_exp or card.expiration_date,
+                            new_cvv or card.cvv,
                         )
-                    card_choice = input("Enter number of card: ").strip()
-                    try:
-                        card_idx = int(card_choice)
-                        if card_idx < 1 or card_idx > len(cards):
-                            print("Invalid selection.\n")
-                        else:
-                            card_id, number, exp, cvv, addr_id = cards[card_idx - 1]
-                            new_number = input(
-                                "Enter new card number (leave blank to keep current): "
-                            ).strip()
-                            new_exp = input(
-                                "Enter new expiration date YYYY-MM-DD (leave blank to keep current): "
-                            ).strip()
-                            new_cvv = input(
-                                "Enter new CVV (leave blank to keep current): "
-                            ).strip()
-                            if not new_number:
-                                new_number = number
-                            if not new_exp:
-                                new_exp = exp
-                            if not new_cvv:
-                                new_cvv = cvv
-                            cur.execute(
-                                "UPDATE card SET CardNumber = %s, ExpirationDate = %s, CVV = %s "
-                                "WHERE CardID = %s AND RenterID = %s",
-                                (new_number, new_exp, new_cvv, card_id, renter_id),
-                            )
-                            conn.commit()
-                            print("Card updated.\n")
-                    except ValueError:
-                        print("Invalid selection.\n")
+                        conn.commit()
+                        session.invalidate("cards")
+                        print("Card updated.\n")
 
             elif choice == "3":
-                cur.execute(
-                    "SELECT CardID, CardNumber, ExpirationDate, CVV, AddressID "
-                    "FROM card WHERE RenterID = %s",
-                    (renter_id,),
-                )
-                cards = cur.fetchall()
+                cards = session.cards(conn)
                 if not cards:
                     print("No cards to delete.\n")
                 else:
                     print("\nSelect card to delete:")
-                    for idx, row in enumerate(cards, start=1):
-                        card_id, number, exp, cvv, addr_id = row
-                        num_str = str(number)
-                        if len(num_str) > 4:
-                            masked = "*" * (len(num_str) - 4) + num_str[-4:]
+                    print_cards(cards)
+                    card = pick(cards, "Enter number of card: ")
+                    if card is not None:
+                        if payments.has_active_bookings(card.card_id):
+                            print("Cannot delete card with active bookings.\n")
                         else:
-                            masked = num_str
-                        print(
-                            f"{idx}. CardID {card_id}, Number {masked}, Exp {exp}"
-                        )
-                    card_choice = input("Enter number of card: ").strip()
-                    try:
-                        card_idx = int(card_choice)
-                        if card_idx < 1 or card_idx > len(cards):
-                            print("Invalid selection.\n")
-                        else:
-                            card_id, number, exp, cvv, addr_id = cards[card_idx - 1]
-                            cur.execute(
-                                "SELECT COUNT(*) FROM booking WHERE CardID = %s AND EndDate >= CURRENT_DATE",
-                                (card_id,),
-                            )
-                            count = cur.fetchone()[0]
-                            if count > 0:
-                                print(
-                                    "Cannot delete card with active bookings.\n"
-                                )
-                            else:
-                                cur.execute(
-                                    "DELETE FROM card WHERE CardID = %s AND RenterID = %s",
-                                    (card_id, renter_id),
-                                )
-                                conn.commit()
-                                print("Card deleted.\n")
-                    except ValueError:
-                        print("Invalid selection.\n")
+                            payments.delete_card(renter_id, card.card_id)
+                            conn.commit()
+                            session.invalidate("cards")
+                            print("Card deleted.\n")
 
         except (Exception, psycopg2.DatabaseError) as error:
             print(f"Payment error: {error}\n")
             conn.rollback()
         finally:
-            cur.close()
-            conn.close()
+            release_connection(conn, cur)
 
 
 # ===================== RENTER: ADDRESSES =====================
 
 def renter_manage_addresses():
-    global current_user
-    if current_user is None or current_user.get("type") != "Renter":
+    session = current_session
+    if session is None or session.type != "Renter":
         print("You must be logged in as a renter to manage addresses.\n")
         return
 
-    user_id = current_user["user_id"]
+    user_id = session.user_id
 
     while True:
         print("\n===== Address Management =====")
@@ -484,28 +437,17 @@ def renter_manage_addresses():
             return
 
         try:
+            addresses = AddressRepository(conn)
             if choice == "4":
-                cur.execute(
-                    "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
-                    "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
-                    "WHERE ua.UserID = %s",
-                    (user_id,),
-                )
-                rows = cur.fetchall()
+                rows = session.addresses(conn)
                 if not rows:
                     print("No addresses found.\n")
                 else:
                     print("\nYour addresses:")
-                    for idx, (loc_id, addr, city, state, zipcode, country) in enumerate(
-                        rows, start=1
-                    ):
-                        print(
-                            f"{idx}. {addr}, {city}, {state} {zipcode}, {country} (LocationID {loc_id})"
-                        )
+                    print_addresses(rows)
                     print()
 
             elif choice == "1":
-                location_id = str(uuid.uuid4())
                 address = input("Enter street address: ").strip()
                 city = input("Enter city: ").strip()
                 state = input("Enter state: ").strip()
@@ -515,154 +457,76 @@ def renter_manage_addresses():
                 if not address or not city or not state or not zipcode or not country:
                     print("All address fields are required.\n")
                 else:
-                    cur.execute(
-                        "INSERT INTO locations (LocationID, Address, City, State, ZipCode, Country) "
-                        "VALUES (%s, %s, %s, %s, %s, %s)",
-                        (location_id, address, city, state, zipcode, country),
-                    )
-                    user_address_id = str(uuid.uuid4())
-                    cur.execute(
-                        "INSERT INTO user_x_address (UserAddressID, UserID, LocationID) "
-                        "VALUES (%s, %s, %s)",
-                        (user_address_id, user_id, location_id),
-                    )
+                    addresses.add_for_user(user_id, address, city, state, zipcode, country)
                     conn.commit()
+                    session.invalidate("addresses")
                     print("Address added.\n")
 
             elif choice == "2":
-                cur.execute(
-                    "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
-                    "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
-                    "WHERE ua.UserID = %s",
-                    (user_id,),
-                )
-                rows = cur.fetchall()
+                rows = session.addresses(conn)
                 if not rows:
                     print("No addresses to modify.\n")
                 else:
                     print("\nSelect address to modify:")
-                    for idx, (loc_id, addr, city, state, zipcode, country) in enumerate(
-                        rows, start=1
-                    ):
-                        print(
-                            f"{idx}. {addr}, {city}, {state} {zipcode}, {country} (LocationID {loc_id})"
+                    print_addresses(rows)
+                    loc = pick(rows, "Enter number of address: ")
+                    if loc is not None:
+                        new_address = input(
+                            "Enter new street address (leave blank to keep current): "
+                        ).strip()
+                        new_city = input(
+                            "Enter new city (leave blank to keep current): "
+                        ).strip()
+                        new_state = input(
+                            "Enter new state (leave blank to keep current): "
+                        ).strip()
+                        new_zipcode = input(
+                            "Enter new zip code (leave blank to keep current): "
+                        ).strip()
+                        new_country = input(
+                            "Enter new country (leave blank to keep current): "
+                        ).strip()
+                        addresses.update_location(
+                            loc.location_id,
+                            new_address or loc.address,
+                            new_city or loc.city,
+                            new_state or loc.state,
+                            new_zipcode or loc.zip_code,
+                            new_country or loc.country,
                         )
-                    choice_idx = input("Enter number of address: ").strip()
-                    try:
-                        addr_idx = int(choice_idx)
-                        if addr_idx < 1 or addr_idx > len(rows):
-                            print("Invalid selection.\n")
-                        else:
-                            loc_id, addr, city, state, zipcode, country = rows[
-                                addr_idx - 1
-                            ]
-                            new_address = input(
-                                "Enter new street address (leave blank to keep current): "
-                            ).strip()
-                            new_city = input(
-                                "Enter new city (leave blank to keep current): "
-                            ).strip()
-                            new_state = input(
-                                "Enter new state (leave blank to keep current): "
-                            ).strip()
-                            new_zipcode = input(
-                                "Enter new zip code (leave blank to keep current): "
-                            ).strip()
-                            new_country = input(
-                                "Enter new country (leave blank to keep current): "
-                            ).strip()
-                            if not new_address:
-                                new_address = addr
-                            if not new_city:
-                                new_city = city
-                            if not new_state:
-                                new_state = state
-                            if not new_zipcode:
-                                new_zipcode = zipcode
-                            if not new_country:
-                                new_country = country
-                            cur.execute(
-                                "UPDATE locations SET Address = %s, City = %s, State = %s, ZipCode = %s, Country = %s "
-                                "WHERE LocationID = %s",
-                                (
-                                    new_address,
-                                    new_city,
-                                    new_state,
-                                    new_zipcode,
-                                    new_country,
-                                    loc_id,
-                                ),
-                            )
-                            conn.commit()
-                            print("Address updated.\n")
-                    except ValueError:
-                        print("Invalid selection.\n")
+                        conn.commit()
+                        session.invalidate("addresses")
+                        print("Address updated.\n")
 
             elif choice == "3":
-                cur.execute(
-                    "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
-                    "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
-                    "WHERE ua.UserID = %s",
-                    (user_id,),
-                )
-                rows = cur.fetchall()
+                rows = session.addresses(conn)
                 if not rows:
                     print("No addresses to delete.\n")
                 else:
                     print("\nSelect address to delete:")
-                    for idx, (loc_id, addr, city, state, zipcode, country) in enumerate(
-                        rows, start=1
-                    ):
-                        print(
-                            f"{idx}. {addr}, {city}, {state} {zipcode}, {country} (LocationID {loc_id})"
-                        )
-                    choice_idx = input("Enter number of address: ").strip()
-                    try:
-                        addr_idx = int(choice_idx)
-                        if addr_idx < 1 or addr_idx > len(rows):
-                            print("Invalid selection.\n")
+                    print_addresses(rows)
+                    loc = pick(rows, "Enter number of address: ")
+                    if loc is not None:
+                        if addresses.has_cards(loc.location_id):
+                            print("Cannot delete address with associated cards.\n")
                         else:
-                            loc_id, addr, city, state, zipcode, country = rows[
-                                addr_idx - 1
-                            ]
-                            cur.execute(
-                                "SELECT COUNT(*) FROM card WHERE AddressID = %s",
-                                (loc_id,),
-                            )
-                            count = cur.fetchone()[0]
-                            if count > 0:
-                                print(
-                                    "Cannot delete address with associated cards.\n"
-                                )
-                            else:
-                                cur.execute(
-                                    "DELETE FROM user_x_address WHERE UserID = %s AND LocationID = %s",
-                                    (user_id, loc_id),
-                                )
-                                cur.execute(
-                                    "DELETE FROM locations WHERE LocationID = %s",
-                                    (loc_id,),
-                                )
-                                conn.commit()
-                                print("Address deleted.\n")
-                    except ValueError:
-                        print("Invalid selection.\n")
+                            addresses.delete_for_user(user_id, loc.location_id)
+                            conn.commit()
+                            session.invalidate("addresses")
+                            print("Address deleted.\n")
 
         except (Exception, psycopg2.DatabaseError) as error:
             print(f"Address error: {error}\n")
             conn.rollback()
         finally:
-            cur.close()
-            conn.close()
+            release_connection(conn, cur)
 
 
 # ===================== AGENT: PROPERTY MANAGEMENT =====================
 
 def manage_properties():
     """Agent: Add / Delete / Modify properties."""
-    global current_user
-
-    if current_user is None or current_user.get("type") != "Agent":
+    if current_session is None or current_session.type != "Agent":
         print("You must be logged in as an Agent to manage properties.\n")
         return
 
@@ -690,6 +554,24 @@ def manage_properties():
             print("Invalid option.\n")
 
 
+def print_property_list(rows, start=1):
+    for prop in rows:
+        print(f"Property ID: {prop.property_id}")
+        print(f"  Type: {prop.type}")
+        print(f"  Address: {prop.address}, {prop.city}, {prop.state} {prop.zip_code}, {prop.country}")
+        print(f"  Price: ${prop.price:.2f}")
+        print(f"  Availability: {prop.availability}")
+        print(f"  Crime Rate: {prop.crime_rate}")
+        if prop.school_names:
+            print("  Nearby Schools:")
+            for name, dist in zip(prop.school_names, prop.school_distances):
+                if dist is None:
+                    print(f"    - {name}")
+                else:
+                    print(f"    - {name} ({dist} mi)")
+        print("-" * 40)
+
+
 def list_all_properties():
     """List all properties with basic info."""
     conn, cur = get_connection()
@@ -697,80 +579,28 @@ def list_all_properties():
         return
 
     try:
-        cur.execute(
-            """
-            SELECT p.propertyid, p.type, p.description, p.price, p.availability, p.crimerate,
-                   l.address, l.city, l.state, l.zipcode, l.country
-            FROM property p
-            JOIN locations l ON p.locationid = l.locationid
-            ORDER BY l.city, l.state, p.price;
-        """
-        )
-        rows = cur.fetchall()
-
-        if not rows:
+        pager = PropertyRepository(conn).listing_pager(PAGE_SIZE, STREAM_ITERSIZE, LISTING_CACHE)
+        if not pager.first():
             print("\nThere are no properties in the system.\n")
             return
 
         print("\n===== All Properties =====")
-        for row in rows:
-            (
-                pid,
-                ptype,
-                desc,
-                price,
-                avail,
-                crime,
-                addr,
-                city,
-                state,
-                zipcode,
-                country,
-            ) = row
-            print(f"Property ID: {pid}")
-            print(f"  Type: {ptype}")
-            print(f"  Address: {addr}, {city}, {state} {zipcode}, {country}")
-            print(f"  Price: ${price:.2f}")
-            print(f"  Availability: {avail}")
-            print(f"  Crime Rate: {crime}")
-            cur.execute(
-                """
-                SELECT s.name, pxs.distancemiles
-                FROM property_x_school pxs
-                JOIN school s ON pxs.schoolid = s.schoolid
-                WHERE pxs.propertyid = %s
-                ORDER BY pxs.distancemiles NULLS LAST, s.name;
-                """,
-                (pid,),
-            )
-            schools = cur.fetchall()
-            if schools:
-                print("  Nearby Schools:")
-                for name, dist in schools:
-                    if dist is None:
-                        print(f"    - {name}")
-                    else:
-                        print(f"    - {name} ({dist} mi)")
-            print("-" * 40)
-        
-
+        browse_pages(pager, print_property_list)
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error listing properties: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 def add_property():
     """Add a new property, tie it to current agent, store listing type, and optional nearby schools."""
-    global current_user
-    if current_user is None or current_user.get("type") != "Agent":
+    if current_session is None or current_session.type != "Agent":
         print("You must be logged in as an Agent.\n")
         return
 
-    agent_id = current_user.get("agent_id")
+    agent_id = current_session.agent_id
     if not agent_id:
         print("Agent ID missing.\n")
         return
@@ -786,7 +616,6 @@ def add_property():
         state = input("State: ").strip()
         zipcode = input("Zip code: ").strip()
         country = input("Country: ").strip()
-
         if not (address and city and state and zipcode and country):
             print("All address fields are required.\n")
             return
@@ -799,20 +628,11 @@ def add_property():
             return
 
         print("\nProperty type options:")
-        print("1. House")
-        print("2. Apartment")
-        print("3. CommercialBuilding")
-        print("4. Land")
-        print("5. VacationHome")
+        type_map = {}
+        for number, name in enumerate(PROPERTY_TYPES, start=1):
+            print(f"{number}. {name}")
+            type_map[str(number)] = name
         type_choice = input("Select property type (1-5): ").strip()
-
-        type_map = {
-            "1": "House",
-            "2": "Apartment",
-            "3": "CommercialBuilding",
-            "4": "Land",
-            "5": "VacationHome",
-        }
         if type_choice not in type_map:
             print("Invalid property type choice.\n")
             return
@@ -841,118 +661,54 @@ def add_property():
 
         crime_rate = input("Crime rate description (optional): ").strip() or None
 
-        location_id = str(uuid.uuid4())
-        cur.execute(
-            """
-            INSERT INTO locations (locationid, address, city, state, zipcode, country)
-            VALUES (%s, %s, %s, %s, %s, %s);
-            """,
-            (location_id, address, city, state, zipcode, country),
-        )
-
-        property_id = str(uuid.uuid4())
-        cur.execute(
-            """
-            INSERT INTO property (propertyid, type, locationid, description, price, availability, crimerate, listingtype, agentid)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
-            """,
-            (property_id, ptype, location_id, description, price, status, crime_rate, listing_type, agent_id),
-        )
-
+        # subtype columns, in repositories.SUBTYPES order
+        details = ()
         if ptype == "House":
             num_rooms = int(input("Number of rooms: ").strip())
             sqft = int(input("Square feet: ").strip())
-            house_id = str(uuid.uuid4())
-            cur.execute(
-                """
-                INSERT INTO house (houseid, propertyid, numrooms, squarefeet)
-                VALUES (%s, %s, %s, %s);
-                """,
-                (house_id, property_id, num_rooms, sqft),
-            )
-
+            details = (num_rooms, sqft)
         elif ptype == "Apartment":
             building_type = input("Building type (e.g., 'HighRise'): ").strip()
             floor = int(input("Floor: ").strip())
             num_rooms = int(input("Number of rooms: ").strip())
-            sqft = int(input("Square feet: ").strip())  # ✅ added
-            apt_id = str(uuid.uuid4())
-            cur.execute(
-                """
-                INSERT INTO apartment (apartmentid, propertyid, buildingtype, floor, numrooms, squarefeet)
-                VALUES (%s, %s, %s, %s, %s, %s);
-                """,
-                (apt_id, property_id, building_type, floor, num_rooms, sqft),
-            )
-
+            sqft = int(input("Square feet: ").strip())
+            details = (building_type, floor, num_rooms, sqft)
         elif ptype == "CommercialBuilding":
             sqft = int(input("Square feet: ").strip())
             business_type = input("Type of business allowed (e.g., 'Retail'): ").strip()
-            cb_id = str(uuid.uuid4())
-            cur.execute(
-                """
-                INSERT INTO commercialbuilding (commercialbuildingid, propertyid, squarefeet, businesstype)
-                VALUES (%s, %s, %s, %s);
-                """,
-                (cb_id, property_id, sqft, business_type),
-            )
-
-        elif ptype == "Land":
-            land_id = str(uuid.uuid4())
-            cur.execute(
-                "INSERT INTO land (landid, propertyid) VALUES (%s, %s);",
-                (land_id, property_id),
-            )
-
-        elif ptype == "VacationHome":
-            vh_id = str(uuid.uuid4())
-            cur.execute(
-                "INSERT INTO vacationhome (vacationhomeid, propertyid) VALUES (%s, %s);",
-                (vh_id, property_id),
-            )
-
-        # ✅ Nearby schools (optional)
-        add_schools = input("Add nearby schools? (y/n): ").strip().lower()
+            details = (sqft, business_type)
+
+        properties = PropertyRepository(conn)
+        location_id = AddressRepository(conn).create_location(address, city, state, zipcode, country)
+        property_id = properties.create(
+            agent_id, location_id, ptype, description, price, status, crime_rate, listing_type, details
+        )
+
+        # Schools within NEARBY_SCHOOL_MILES are linked with their computed distance
+        linked = properties.link_nearby_schools(property_id, NEARBY_SCHOOL_MILES)
+        if linked:
+            print(f"Linked {linked} school(s) within {NEARBY_SCHOOL_MILES:g} miles.")
+
+        # ✅ Other nearby schools (optional)
+        add_schools = input("Add other nearby schools? (y/n): ").strip().lower()
         if add_schools == "y":
             while True:
                 school_name = input("School name (blank to stop): ").strip()
                 if not school_name:
                     break
-                dist_str = input("Distance (miles, blank if unknown): ").strip()
-                dist = None
-                if dist_str:
-                    try:
-                        dist = float(dist_str)
-                    except ValueError:
-                        print("Invalid distance; leaving blank.")
-
-                # Find or create school
-                cur.execute("SELECT schoolid FROM school WHERE name = %s", (school_name,))
-                row = cur.fetchone()
-                if row:
-                    school_id = row[0]
-                else:
-                    school_id = str(uuid.uuid4())
-                    cur.execute("INSERT INTO school (schoolid, name) VALUES (%s, %s)", (school_id, school_name))
-
-                pxs_id = str(uuid.uuid4())
-                cur.execute(
-                    """
-                    INSERT INTO property_x_school (propertyschoolid, propertyid, schoolid, distance_miles)
-                    VALUES (%s, %s, %s, %s)
-                    """,
-                    (pxs_id, property_id, school_id, dist),
-                )
+                properties.add_school(property_id, school_name)
+            # distances of schools with a known address
+            properties.refresh_school_distances(property_id)
 
         conn.commit()
+        LISTING_CACHE.invalidate("properties")
         print("\nProperty added successfully!\n")
 
     except Exception as e:
         print(f"Error adding property: {e}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 
@@ -968,87 +724,52 @@ def modify_property():
         if not pid:
             return
 
-        cur.execute(
-            """
-            SELECT p.propertyid, p.type, p.description, p.price, p.availability, p.crimerate,
-                   l.locationid, l.address, l.city, l.state, l.zipcode, l.country
-            FROM property p
-            JOIN locations l ON p.locationid = l.locationid
-            WHERE p.propertyid = %s;
-        """,
-            (pid,),
-        )
-        row = cur.fetchone()
-
-        if not row:
+        properties = PropertyRepository(conn)
+        prop = properties.get(pid)
+        if not prop:
             print("No such property.\n")
             return
 
-        (
-            propertyid,
-            ptype,
-            desc,
-            price,
-            avail,
-            crime,
-            locid,
-            address,
-            city,
-            state,
-            zipcode,
-            country,
-        ) = row
-
         print("\nLeave any field blank to keep current value.")
 
-        new_desc = input(f"Description [{desc}]: ").strip() or desc
+        new_desc = input(f"Description [{prop.description}]: ").strip() or prop.description
 
-        price_str = input(f"Price [{price}]: ").strip()
+        price_str = input(f"Price [{prop.price}]: ").strip()
         if price_str:
             try:
                 new_price = float(price_str)
             except ValueError:
                 print("Invalid price; keeping old value.")
-                new_price = price
+                new_price = prop.price
         else:
-            new_price = price
-
-        new_avail = input(f"Availability [{avail}]: ").strip() or avail
-        new_crime = input(f"Crime rate [{crime}]: ").strip() or crime
-
-        new_address = input(f"Address [{address}]: ").strip() or address
-        new_city = input(f"City [{city}]: ").strip() or city
-        new_state = input(f"State [{state}]: ").strip() or state
-        new_zip = input(f"Zip code [{zipcode}]: ").strip() or zipcode
-        new_country = input(f"Country [{country}]: ").strip() or country
-
-        cur.execute(
-            """
-            UPDATE property
-            SET description = %s, price = %s, availability = %s, crimerate = %s
-            WHERE propertyid = %s;
-        """,
-            (new_desc, new_price, new_avail, new_crime, propertyid),
-        )
+            new_price = prop.price
+
+        new_avail = input(f"Availability [{prop.availability}]: ").strip() or prop.availability
+        new_crime = input(f"Crime rate [{prop.crime_rate}]: ").strip() or prop.crime_rate
+
+        new_address = input(f"Address [{prop.address}]: ").strip() or prop.address
+        new_city = input(f"City [{prop.city}]: ").strip() or prop.city
+        new_state = input(f"State [{prop.state}]: ").strip() or prop.state
+        new_zip = input(f"Zip code [{prop.zip_code}]: ").strip() or prop.zip_code
+        new_country = input(f"Country [{prop.country}]: ").strip() or prop.country
 
-        cur.execute(
-            """
-            UPDATE locations
-            SET address = %s, city = %s, state = %s, zipcode = %s, country = %s
-            WHERE locationid = %s;
-        """,
-            (new_address, new_city, new_state, new_zip, new_country, locid),
+        properties.update(prop.property_id, new_desc, new_price, new_avail, new_crime)
+        AddressRepository(conn).update_location(
+            prop.location_id, new_address, new_city, new_state, new_zip, new_country
         )
+        if new_zip != prop.zip_code:
+            # re-geocoded by the locations_geocode trigger
+            properties.refresh_school_distances(prop.property_id)
 
         conn.commit()
+        LISTING_CACHE.invalidate("properties")
         print("\nProperty updated successfully!\n")
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error modifying property: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 def delete_property():
@@ -1063,62 +784,35 @@ def delete_property():
         if not pid:
             return
 
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM booking WHERE propertyid = %s;
-        """,
-            (pid,),
-        )
-        count = cur.fetchone()[0]
-        if count > 0:
+        properties = PropertyRepository(conn)
+        if properties.has_bookings(pid):
             print("Cannot delete property with existing bookings.\n")
             return
 
-        cur.execute(
-            """
-            SELECT type, locationid
-            FROM property
-            WHERE propertyid = %s;
-        """,
-            (pid,),
-        )
-        row = cur.fetchone()
-        if not row:
+        # location row left intact intentionally
+        if not properties.delete(pid):
             print("No such property.\n")
             return
 
-        ptype, locid = row
-
-        if ptype == "House":
-            cur.execute("DELETE FROM house WHERE propertyid = %s;", (pid,))
-        elif ptype == "Apartment":
-            cur.execute("DELETE FROM apartment WHERE propertyid = %s;", (pid,))
-        elif ptype == "CommercialBuilding":
-            cur.execute(
-                "DELETE FROM commercialbuilding WHERE propertyid = %s;", (pid,)
-            )
-        elif ptype == "Land":
-            cur.execute("DELETE FROM land WHERE propertyid = %s;", (pid,))
-        elif ptype == "VacationHome":
-            cur.execute("DELETE FROM vacationhome WHERE propertyid = %s;", (pid,))
-
-        cur.execute("DELETE FROM property WHERE propertyid = %s;", (pid,))
-
-        # location row left intact intentionally
-
         conn.commit()
+        LISTING_CACHE.invalidate("properties")
         print("Property deleted successfully.\n")
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(f"Error deleting property: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 # ===================== PROPERTY SEARCH (Renter/Agent) =====================
 
+def print_search_results(rows, start=1):
+    for idx, (prop_id, ptype, ltype, desc, price, c, s, beds, _) in enumerate(rows, start=start):
+        print(f"{idx}. [{ltype}] {ptype} in {c}, {s} - ${price}, Bedrooms: {beds if beds is not None else 'N/A'}")
+        print(f"   {desc} (PropertyID {prop_id})")
+
+
 def search_properties():
     conn, cur = get_connection()
     if conn is None:
@@ -1133,168 +827,91 @@ def search_properties():
         min_price = input("Min price (blank for any): ").strip()
         max_price = input("Max price (blank for any): ").strip()
         min_bedrooms = input("Min bedrooms (blank for any): ").strip()
-        desired_date = read_date("Desired date (YYYY-MM-DD, blank for any): ")
-        sort = input("Sort by price/bedrooms/none: ").strip().lower()
-
-        query = """
-            SELECT p.PropertyID,
-                   p.Type,
-                   p.ListingType,
-                   p.Description,
-                   p.Price,
-                   l.City,
-                   l.State,
-                   COALESCE(h.NumRooms, a.NumRooms) AS Bedrooms
-            FROM property p
-            JOIN locations l ON p.LocationID = l.LocationID
-            LEFT JOIN house h ON p.PropertyID = h.PropertyID
-            LEFT JOIN apartment a ON p.PropertyID = a.PropertyID
-            WHERE p.Availability = 'Active'
-        """
-        params = []
-
-        if city:
-            query += " AND l.City = %s"
-            params.append(city)
-        if state:
-            query += " AND l.State = %s"
-            params.append(state)
-        if prop_type:
-            query += " AND p.Type = %s"
-            params.append(prop_type)
-        if listing_type: 
-            query += " AND p.ListingType = %s"
-            params.append(listing_type)
-        if min_price:
-            query += " AND p.Price >= %s"
-            params.append(min_price)
-        if max_price:
-            query += " AND p.Price <= %s"
-            params.append(max_price)
-        if min_bedrooms:
-            query += " AND COALESCE(h.NumRooms, a.NumRooms) >= %s"
-            params.append(min_bedrooms)
-        if desired_date:
-            query += """
-                AND NOT EXISTS (
-                    SELECT 1 FROM booking b
-                    WHERE b.PropertyID = p.PropertyID
-                      AND %s BETWEEN b.StartDate AND b.EndDate
-                )
-            """
-            params.append(desired_date)
-
-        if sort == "price":
-            query += " ORDER BY p.Price"
-        elif sort == "bedrooms":
-            query += " ORDER BY Bedrooms"
-
-        cur.execute(query, tuple(params))
-        rows = cur.fetchall()
-
-        if not rows:
+        check_in = read_date("Check-in date (YYYY-MM-DD, blank for any): ")
+        check_out = None
+        if check_in:
+            check_out = read_date("Check-out date (YYYY-MM-DD, blank for one day): ")
+        keyword = input("Keywords in description (blank for any): ").strip()
+        place = input("Near zip code or lat,lon (blank for anywhere): ").strip()
+        near = within_miles = None
+        if place:
+            near = search.locate(conn, place)
+            within_miles = input(f"Within miles [{search.DEFAULT_RADIUS_MILES}]: ").strip()
+        sort = input("Sort by price/bedrooms/relevance/none: ").strip().lower()
+
+        filters = search.normalize_filters(
+            city,
+            state,
+            prop_type,
+            listing_type,
+            min_price,
+            max_price,
+            min_bedrooms,
+            check_in,
+            check_out,
+            keyword,
+            near,
+            within_miles,
+        )
+        pager = search.SearchPager(conn, filters, sort, PAGE_SIZE, STREAM_ITERSIZE, LISTING_CACHE)
+        if not pager.first() and filters["keyword"] and search.trigram_available(conn):
+            # no exact word matches: retry tolerating typos
+            filters = search.fuzzy_filters(filters)
+            pager = search.SearchPager(conn, filters, sort, PAGE_SIZE, STREAM_ITERSIZE, LISTING_CACHE)
+            if pager.first():
+                print(f"\nNo exact matches for '{filters['fuzzy_keyword']}'; showing similar descriptions.")
+        if not pager.rows:
             print("No properties found.\n")
         else:
             print("\nResults:")
-            for idx, (prop_id, ptype, ltype, desc, price, c, s, beds) in enumerate(rows, start=1):
-                print(f"{idx}. [{ltype}] {ptype} in {c}, {s} - ${price}, Bedrooms: {beds if beds is not None else 'N/A'}")
-                print(f"   {desc} (PropertyID {prop_id})")
+            browse_pages(pager, print_search_results)
             print()
 
     except Exception as e:
         print(f"Search error: {e}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 
 # ===================== RENTER: BOOK PROPERTY & BOOKINGS =====================
 
 def renter_book_property():
-    global current_user
-    if current_user is None or current_user.get("type") != "Renter":
+    session = current_session
+    if session is None or session.type != "Renter":
         print("You must be logged in as a renter to book properties.\n")
         return
 
-    renter_id = current_user.get("renter_id")
+    renter_id = session.renter_id
     if renter_id is None:
-        conn, cur = get_connection()
-        if conn is None:
-            return
-        try:
-            cur.execute(
-                "SELECT RenterID FROM renter WHERE UserID = %s",
-                (current_user["user_id"],),
-            )
-            row = cur.fetchone()
-            if row is None:
-                print("No renter record found for current user.\n")
-                return
-            renter_id = str(row[0])
-            current_user["renter_id"] = renter_id
-        except (Exception, psycopg2.DatabaseError) as error:
-            print(f"Error loading renter info: {error}\n")
-            conn.rollback()
-            return
-        finally:
-            cur.close()
-            conn.close()
+        print("No renter record found for current user.\n")
+        return
 
     conn, cur = get_connection()
     if conn is None:
         return
 
     try:
-        cur.execute(
-            """
-            SELECT p.PropertyID,
-                   p.Type,
-                   p.Description,
-                   p.Price,
-                   l.City,
-                   l.State,
-                   COALESCE(h.NumRooms, a.NumRooms) AS Bedrooms
-            FROM property p
-            JOIN locations l ON p.LocationID = l.LocationID
-            LEFT JOIN house h ON p.PropertyID = h.PropertyID
-            LEFT JOIN apartment a ON p.PropertyID = a.PropertyID
-            WHERE p.Availability = 'Active'
-        """
-        )
-        props = cur.fetchall()
-        if not props:
+
+        pager = PropertyRepository(conn).bookable_pager(PAGE_SIZE, STREAM_ITERSIZE)
+        if not pager.first():
             print("No available properties to book.\n")
             return
 
+        def show_props(rows, start):
+            for idx, prop in enumerate(rows, start=start):
+                print(
+                    f"{idx}. {prop.type} in {prop.city}, {prop.state} - ${prop.price}, "
+                    f"Bedrooms: {prop.bedrooms if prop.bedrooms is not None else 'N/A'}"
+                )
+                print(f"   {prop.description}")
+
         print("\nAvailable properties:")
-        for idx, (prop_id, ptype, desc, price, c, s, beds) in enumerate(
-            props, start=1
-        ):
-            print(
-                f"{idx}. {ptype} in {c}, {s} - ${price}, "
-                f"Bedrooms: {beds if beds is not None else 'N/A'}"
-            )
-            print(f"   {desc}")
-
-        choice = input("Select a property number to book: ").strip()
-        try:
-            idx = int(choice)
-            if idx < 1 or idx > len(props):
-                print("Invalid selection.\n")
-                return
-        except ValueError:
-            print("Invalid selection.\n")
+        prop = browse_pages(pager, show_props, "Select a property number to book: ")
+        if prop is None:
             return
 
-        prop_id, ptype, desc, price, c, s, beds = props[idx - 1]
-
-        cur.execute("SELECT AgentID FROM property WHERE PropertyID = %s", (prop_id,))
-        agent_row = cur.fetchone()
-        agent_id = agent_row[0] if agent_row else None
-
-
         start_str = input("Enter start date (YYYY-MM-DD): ").strip()
         end_str = input("Enter end date (YYYY-MM-DD): ").strip()
         try:
@@ -1307,81 +924,48 @@ def renter_book_property():
             print("Invalid date format.\n")
             return
 
-        cur.execute(
-            "SELECT CardID, CardNumber, ExpirationDate FROM card WHERE RenterID = %s",
-            (renter_id,),
-        )
-        cards = cur.fetchall()
+        cards = session.cards(conn)
         if not cards:
             print("You must add a credit card before booking.\n")
             return
 
         print("\nSelect payment method:")
-        for i, (card_id, number, exp) in enumerate(cards, start=1):
-            num_str = str(number)
-            if len(num_str) > 4:
-                masked = "*" * (len(num_str) - 4) + num_str[-4:]
-            else:
-                masked = num_str
-            print(f"{i}. Card ending in {masked}, Exp {exp}")
-        card_choice = input("Enter number of card: ").strip()
-        try:
-            card_idx = int(card_choice)
-            if card_idx < 1 or card_idx > len(cards):
-                print("Invalid selection.\n")
-                return
-        except ValueError:
-            print("Invalid selection.\n")
+        for i, card in enumerate(cards, start=1):
+            print(f"{i}. Card ending in {mask_card(card.card_number)}, Exp {card.expiration_date}")
+        card = pick(cards, "Enter number of card: ")
+        if card is None:
             return
 
-        card_id, number, exp = cards[card_idx - 1]
-
         days = (end_date - start_date).days
-        total_cost = float(price) * days
+        total_cost = prop.price * days  # Decimal, as booking_totals computes it
 
         print("\nBooking summary:")
-        print(f"Property: {ptype} in {c}, {s}")
+        print(f"Property: {prop.type} in {prop.city}, {prop.state}")
         print(f"Dates: {start_date} to {end_date} ({days} days)")
         print(f"Total cost: ${total_cost}")
-        print(f"Payment method: card ending in {str(number)[-4:]}")
+        print(f"Payment method: card ending in {str(card.card_number)[-4:]}")
 
         confirm = input("Confirm booking? (y/n): ").strip().lower()
         if confirm != "y":
             print("Booking cancelled.\n")
             return
 
-        cur.execute(
-            """
-            SELECT COUNT(*) FROM booking
-            WHERE PropertyID = %s
-              AND NOT (EndDate < %s OR StartDate > %s)
-            """,
-            (prop_id, start_date, end_date),
-        )
-        if cur.fetchone()[0] > 0:
+        try:
+            receipt = BookingRepository(conn).book(renter_id, card.card_id, prop.property_id, start_date, end_date)
+        except psycopg2.errors.ExclusionViolation:
+            conn.rollback()
             print("Property already booked for that period.\n")
             return
-
-        booking_id = str(uuid.uuid4())
-        cur.execute(
-            """
-            INSERT INTO booking (BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """,
-            (booking_id, card_id, renter_id, agent_id, prop_id, start_date, end_date),
-        )
-
-        cur.execute("SELECT points FROM rewards_member WHERE renterid = %s", (renter_id,))
-        rm = cur.fetchone()
-        if rm is not None:
-            points_earned = int(total_cost)
-            cur.execute(
-                "UPDATE rewards_member SET points = points + %s WHERE renterid = %s",
-                (points_earned, renter_id),
-            )
-            print(f"Rewards: +{points_earned} points!")
+        if receipt is None:
+            print("Property is no longer available.\n")
+            return
+        if receipt.points_earned is not None:
+            print(f"Rewards: +{receipt.points_earned} points!")
 
         conn.commit()
+        LISTING_CACHE.invalidate("bookings")
+        if receipt.points_earned is not None:
+            session.invalidate("rewards")
         print("Booking created.\n")
 
 
@@ -1389,49 +973,39 @@ def renter_book_property():
         print(f"Booking error: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
+
+
+def print_renter_bookings(rows, start=1):
+    for idx, b in enumerate(rows, start=start):
+        print(f"{idx}. {b.type} in {b.city}, {b.state}")
+        print(
+            f"   {b.start_date} to {b.end_date} ({b.nights} days), Total ${b.total_cost}, Card {mask_card(b.card_number)}"
+        )
+        print(f"   {b.description} (BookingID {b.booking_id})")
 
 
 def renter_manage_bookings():
     """Renter: view and cancel own bookings."""
-    global current_user
-    if current_user is None:
+    if current_session is None:
         print("You must be logged in to manage bookings.\n")
         return
 
-    if current_user.get("type") == "Agent":
+    if current_session.type == "Agent":
         print("Agent booking management not implemented here (use agent menu).\n")
         return
 
-    renter_id = current_user.get("renter_id")
+    renter_id = current_session.renter_id
     if renter_id is None:
-        conn, cur = get_connection()
-        if conn is None:
-            return
-        try:
-            cur.execute(
-                "SELECT RenterID FROM renter WHERE UserID = %s",
-                (current_user["user_id"],),
-            )
-            row = cur.fetchone()
-            if row is None:
-                print("No renter record found for current user.\n")
-                return
-            renter_id = str(row[0])
-            current_user["renter_id"] = renter_id
-        except (Exception, psycopg2.DatabaseError) as error:
-            print(f"Error loading renter info: {error}\n")
-            conn.rollback()
-            return
-        finally:
-            cur.close()
-            conn.close()
+        print("No renter record found for current user.\n")
+        return
 
     while True:
         print("\n===== My Bookings =====")
         print("1. View My Bookings")
         print("2. Cancel Booking")
+        print("3. View My Bookings by Total Cost")
+        print("4. Spending Summary")
         print("0. Back")
 
         choice = input("Select an option: ").strip()
@@ -1444,146 +1018,82 @@ def renter_manage_bookings():
             return
 
         try:
-            if choice == "1":
-                cur.execute(
-                    """
-                    SELECT b.BookingID,
-                           p.PropertyID,
-                           p.Type,
-                           p.Description,
-                           p.Price,
-                           b.StartDate,
-                           b.EndDate,
-                           l.City,
-                           l.State,
-                           c.CardNumber
-                    FROM booking b
-                    JOIN property p ON b.PropertyID = p.PropertyID
-                    JOIN locations l ON p.LocationID = l.LocationID
-                    JOIN card c ON b.CardID = c.CardID
-                    WHERE b.RenterID = %s
-                """,
-                    (renter_id,),
-                )
-                rows = cur.fetchall()
-                if not rows:
+            bookings = BookingRepository(conn)
+            if choice in ("1", "3"):
+                sort = "start" if choice == "1" else "total"
+                pager = bookings.renter_pager(renter_id, sort, PAGE_SIZE, STREAM_ITERSIZE)
+                if not pager.first():
                     print("No bookings found.\n")
                 else:
                     print()
-                    for idx, (
-                        book_id,
-                        prop_id,
-                        ptype,
-                        desc,
-                        price,
-                        start,
-                        end,
-                        c,
-                        s,
-                        card_num,
-                    ) in enumerate(rows, start=1):
-                        days = (end - start).days
-                        total_cost = float(price) * days
-                        num_str = str(card_num)
-                        if len(num_str) > 4:
-                            masked = "*" * (len(num_str) - 4) + num_str[-4:]
-                        else:
-                            masked = num_str
-                        print(f"{idx}. {ptype} in {c}, {s}")
-                        print(
-                            f"   {start} to {end} ({days} days), Total ${total_cost}, Card {masked}"
-                        )
-                        print(f"   {desc} (BookingID {book_id})")
+                    browse_pages(pager, print_renter_bookings)
                     print()
 
+            elif choice == "4":
+                spend = bookings.renter_spend(renter_id)
+                if not spend.bookings:
+                    print("No bookings found.\n")
+                else:
+                    print(f"\n{spend.bookings} bookings, {spend.nights} days, total spent ${spend.total_spent}")
+                    print(f"From {spend.first_start} to {spend.last_end}\n")
+
             elif choice == "2":
-                cur.execute(
-                    """
-                    SELECT b.BookingID,
-                           p.PropertyID,
-                           p.Type,
-                           p.Description,
-                           p.Price,
-                           b.StartDate,
-                           b.EndDate,
-                           l.City,
-                           l.State
-                    FROM booking b
-                    JOIN property p ON b.PropertyID = p.PropertyID
-                    JOIN locations l ON p.LocationID = l.LocationID
-                    WHERE b.RenterID = %s
-                """,
-                    (renter_id,),
-                )
-                rows = cur.fetchall()
+                rows = bookings.for_renter(renter_id)
                 if not rows:
                     print("No bookings to cancel.\n")
                 else:
                     print("\nSelect booking to cancel:")
-                    for idx, (
-                        book_id,
-                        prop_id,
-                        ptype,
-                        desc,
-                        price,
-                        start,
-                        end,
-                        c,
-                        s,
-                    ) in enumerate(rows, start=1):
-                        print(
-                            f"{idx}. {ptype} in {c}, {s} from {start} to {end}"
-                        )
-                    choice_idx = input("Enter number of booking: ").strip()
-                    try:
-                        b_idx = int(choice_idx)
-                        if b_idx < 1 or b_idx > len(rows):
-                            print("Invalid selection.\n")
-                        else:
-                            (
-                                book_id,
-                                prop_id,
-                                ptype,
-                                desc,
-                                price,
-                                start,
-                                end,
-                                c,
-                                s,
-                            ) = rows[b_idx - 1]
-                            confirm = input(
-                                "Are you sure you want to cancel this booking? (y/n): "
-                            ).strip().lower()
-                            if confirm == "y":
-                                cur.execute(
-                                    "DELETE FROM booking WHERE BookingID = %s AND RenterID = %s",
-                                    (book_id, renter_id),
-                                )
-                                cur.execute(
-                                    "UPDATE property SET Availability = 'Active' WHERE PropertyID = %s",
-                                    (prop_id,),
-                                )
-                                conn.commit()
-                                print(
-                                    "Booking cancelled. Refund will be issued to your saved payment method.\n"
-                                )
-                    except ValueError:
-                        print("Invalid selection.\n")
+                    for idx, b in enumerate(rows, start=1):
+                        print(f"{idx}. {b.type} in {b.city}, {b.state} from {b.start_date} to {b.end_date}")
+                    booking = pick(rows, "Enter number of booking: ")
+                    if booking is not None:
+                        confirm = input(
+                            "Are you sure you want to cancel this booking? (y/n): "
+                        ).strip().lower()
+                        if confirm == "y":
+                            bookings.cancel_for_renter(renter_id, booking)
+                            conn.commit()
+                            # the property is also set back to Active
+                            LISTING_CACHE.invalidate("bookings", "properties")
+                            print(
+                                "Booking cancelled. Refund will be issued to your saved payment method.\n"
+                            )
 
         except (Exception, psycopg2.DatabaseError) as error:
             print(f"Booking management error: {error}\n")
             conn.rollback()
         finally:
-            cur.close()
-            conn.close()
+            release_connection(conn, cur)
 
 
 # ===================== AGENT: BOOKINGS (from your version) =====================
 
+def print_agent_bookings(rows, start=1):
+    for b in rows:
+        masked_card = "**** **** **** " + b.card_number[-4:]
+        print(f"Booking ID: {b.booking_id}")
+        print(f"  Property: {b.type} ({b.property_id})")
+        print(
+            f"  Address: {b.address}, {b.city}, {b.state} {b.zip_code}"
+        )
+        print(f"  Description: {b.description}")
+        print(f"  Price (per period unit): ${b.price:.2f}")
+        print(f"  Rental Period: {b.start_date} to {b.end_date} ({b.nights} days), Total ${b.total_cost}")
+        print(
+            f"  Renter: {b.renter_name} <{b.renter_email}>"
+        )
+        print(f"  Payment Method: {masked_card}")
+        print("-" * 40)
+
+
+def print_renter_spend(rows, start=1):
+    for idx, r in enumerate(rows, start=start):
+        print(f"{idx}. {r.renter_name} <{r.renter_email}>: {r.bookings} bookings, {r.nights} days, ${r.total_spent}")
+
+
 def manage_agent_bookings():
     """Agent: view and cancel bookings for properties under their agency."""
-    global current_user
-    agent_id = current_user.get("agent_id") if current_user else None
+    agent_id = current_session.agent_id if current_session else None
     if not agent_id:
         print("Agent ID not found for current user.\n")
         return
@@ -1593,92 +1103,43 @@ def manage_agent_bookings():
         return
 
     try:
+        bookings = BookingRepository(conn)
         while True:
             print("\n===== Bookings for My Agency =====")
 
-            cur.execute(
-                """
-                SELECT b.bookingid,
-                    p.propertyid, p.type, p.description, p.price,
-                    l.address, l.city, l.state, l.zipcode,
-                    b.startdate, b.enddate,
-                    u.name AS renter_name, u.email AS renter_email,
-                    c.cardnumber
-                FROM booking b
-                JOIN property p ON b.propertyid = p.propertyid
-                JOIN locations l ON p.locationid = l.locationid
-                JOIN renter r ON b.renterid = r.renterid
-                JOIN users u ON r.userid = u.userid
-                JOIN card c ON b.cardid = c.cardid
-                WHERE p.agentid = %s
-                ORDER BY b.startdate DESC;
-                """,
-                (agent_id,),
-            )
-
-            rows = cur.fetchall()
-
-            if not rows:
+            # latest start first, a page at a time
+            pager = bookings.agent_pager(agent_id, "recent", PAGE_SIZE, STREAM_ITERSIZE)
+            if not pager.first():
                 print("There are no bookings associated with your agency.\n")
             else:
-                for row in rows:
-                    (
-                        bookingid,
-                        pid,
-                        ptype,
-                        desc,
-                        price,
-                        addr,
-                        city,
-                        state,
-                        zipcode,
-                        startdate,
-                        enddate,
-                        renter_name,
-                        renter_email,
-                        cardnumber,
-                    ) = row
-                    masked_card = "**** **** **** " + cardnumber[-4:]
-                    print(f"Booking ID: {bookingid}")
-                    print(f"  Property: {ptype} ({pid})")
-                    print(
-                        f"  Address: {addr}, {city}, {state} {zipcode}"
-                    )
-                    print(f"  Description: {desc}")
-                    print(f"  Price (per period unit): ${price:.2f}")
-                    print(f"  Rental Period: {startdate} to {enddate}")
-                    print(
-                        f"  Renter: {renter_name} <{renter_email}>"
-                    )
-                    print(f"  Payment Method: {masked_card}")
-                    print("-" * 40)
+                browse_pages(pager, print_agent_bookings)
 
             print("1. Cancel a booking")
+            print("2. Bookings by total cost")
+            print("3. Spend by renter")
             print("0. Back")
             choice = input("Select an option: ").strip()
 
-            if choice == "1":
+            if choice == "2":
+                pager = bookings.agent_pager(agent_id, "total", PAGE_SIZE, STREAM_ITERSIZE)
+                if pager.first():
+                    browse_pages(pager, print_agent_bookings)
+            elif choice == "3":
+                pager = bookings.renter_spend_pager(agent_id, PAGE_SIZE, STREAM_ITERSIZE)
+                if pager.first():
+                    browse_pages(pager, print_renter_spend)
+            elif choice == "1":
                 bid = input(
                     "Enter Booking ID to cancel (or blank to cancel): "
                 ).strip()
                 if not bid:
                     continue
 
-                cur.execute(
-                    """
-                    DELETE FROM booking b
-                    USING property p
-                    WHERE b.propertyid = p.propertyid
-                    AND b.bookingid = %s
-                    AND p.agentid = %s;
-                    """,
-                    (bid, agent_id),
-                )
-
-                if cur.rowcount == 0:
+                if not bookings.cancel_for_agent(agent_id, bid):
                     print("No such booking found for your agency.\n")
                 else:
                     conn.commit()
+                    LISTING_CACHE.invalidate("bookings")
                     print("Booking cancelled.\n")
             elif choice == "0":
                 break
@@ -1689,8 +1150,109 @@ def manage_agent_bookings():
         print(f"Error managing agent bookings: {error}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
+
+
+# ===================== AGENT: ANALYTICS =====================
+
+DASHBOARD_DAYS = 30  # days of the "last" and "next" windows
+DASHBOARD_MONTHS = 12  # months of revenue, up to the current one
+CHECK_IN_DAYS = 14
+
+
+def add_months(day, months):
+    """First day of the month that is `months` after day's month."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def print_window_stats(label, stats):
+    occupancy = "n/a" if stats.occupancy is None else f"{stats.occupancy}%"
+    print(
+        f"{label}: occupancy {occupancy} ({stats.booked_nights} nights booked), "
+        f"revenue ${stats.revenue:.2f}, {stats.check_ins} check-ins"
+    )
+
+
+def print_property_stats(rows, start=1):
+    for idx, s in enumerate(rows, start=start):
+        print(
+            f"{idx}. {s.type} in {s.city}, {s.state} (${s.price:.2f}): "
+            f"{s.booked_nights} nights, {s.occupancy}% occupied, revenue ${s.revenue:.2f}"
+        )
+        print(f"   PropertyID {s.property_id}")
+
+
+def print_check_ins(rows, start=1):
+    for idx, b in enumerate(rows, start=start):
+        print(f"{idx}. {b.start_date} to {b.end_date}: {b.renter_name} <{b.renter_email}>")
+        print(f"   {b.type} at {b.address}, {b.city}, {b.state} ({b.nights} days, ${b.total_cost})")
+
+
+def agent_dashboard():
+    """Agent: occupancy and revenue of their properties, per month and per property, and upcoming check-ins."""
+    agent_id = current_session.agent_id if current_session else None
+    if not agent_id:
+        print("Agent ID not found for current user.\n")
+        return
+
+    conn, cur = get_connection()
+    if conn is None:
+        return
+
+    try:
+        analytics = AnalyticsRepository(conn)
+        today = date.today()
+        window = timedelta(days=DASHBOARD_DAYS)
+        first_month = add_months(today, 1 - DASHBOARD_MONTHS)
+        next_month = add_months(today, 1)
+        while True:
+            print("\n===== Analytics Dashboard =====")
+            past = analytics.window(agent_id, today - window, today)
+            ahead = analytics.window(agent_id, today, today + window)
+            print(f"{past.properties} properties")
+            print_window_stats(f"Last {DASHBOARD_DAYS} days", past)
+            print_window_stats(f"Next {DASHBOARD_DAYS} days (booked so far)", ahead)
+            print()
+
+            print("1. Revenue by month")
+            print("2. Revenue by property")
+            print("3. Upcoming check-ins")
+            print("0. Back")
+            choice = input("Select an option: ").strip()
+
+            if choice == "1":
+                print(f"\n{'Month':<8} {'Nights':>7} {'Occupancy':>10} {'Check-ins':>10} {'Revenue':>14}")
+                for m in analytics.monthly(agent_id, first_month, next_month):
+                    occupancy = "n/a" if m.occupancy is None else f"{m.occupancy}%"
+                    revenue = f"${m.revenue:.2f}"
+                    print(f"{m.month:%Y-%m}  {m.booked_nights:>7} {occupancy:>10} {m.check_ins:>10} {revenue:>14}")
+            elif choice == "2":
+                pager = analytics.property_pager(agent_id, first_month, next_month, PAGE_SIZE, STREAM_ITERSIZE)
+                if not pager.first():
+                    print("You have no properties.\n")
+                else:
+                    print(f"\nSince {first_month:%Y-%m}, most revenue first:")
+                    browse_pages(pager, print_property_stats)
+            elif choice == "3":
+                pager = analytics.check_in_pager(
+                    agent_id, today, today + timedelta(days=CHECK_IN_DAYS), PAGE_SIZE, STREAM_ITERSIZE
+                )
+                if not pager.first():
+                    print(f"No check-ins in the next {CHECK_IN_DAYS} days.\n")
+                else:
+                    print(f"\nCheck-ins in the next {CHECK_IN_DAYS} days:")
+                    browse_pages(pager, print_check_ins)
+            elif choice == "0":
+                break
+            else:
+                print("Invalid option.\n")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Dashboard error: {error}\n")
+        conn.rollback()
+    finally:
+        release_connection(conn, cur)
 
 
 def manage_bookings():
@@ -1700,13 +1262,11 @@ def manage_bookings():
     - Renters: their own bookings (renter_manage_bookings).
     - Agents: bookings for properties under their agency (manage_agent_bookings).
     """
-    global current_user
-
-    if current_user is None:
+    if current_session is None:
         print("You must be logged in to manage bookings.\n")
         return
 
-    user_type = current_user.get("type")
+    user_type = current_session.type
 
     if user_type == "Renter":
         renter_manage_bookings()
@@ -1719,11 +1279,11 @@ def manage_bookings():
 # ===================== REWARDS PROGRAM =====================
 
 def renter_rewards_menu():
-    global current_user
-    if current_user is None or current_user.get("type") != "Renter":
+    session = current_session
+    if session is None or session.type != "Renter":
         print("Login as renter.\n")
         return
-    renter_id = current_user.get("renter_id")
+    renter_id = session.renter_id
     if not renter_id:
         print("Renter ID missing.\n")
         return
@@ -1732,15 +1292,14 @@ def renter_rewards_menu():
     if conn is None:
         return
     try:
+        rewards = RewardsRepository(conn)
         while True:
-            cur.execute("SELECT points, joinedat FROM rewards_member WHERE renterid = %s", (renter_id,))
-            row = cur.fetchone()
+            member = session.rewards(conn)
 
             print("\n===== Rewards Program =====")
-            if row:
-                pts, joined = row
-                print(f"Status: Member since {joined}")
-                print(f"Points: {pts}")
+            if member:
+                print(f"Status: Member since {member.joined_at}")
+                print(f"Points: {member.points}")
                 print("1. Leave rewards program")
             else:
                 print("Status: Not a member")
@@ -1751,13 +1310,15 @@ def renter_rewards_menu():
             if choice == "0":
                 break
 
-            if not row and choice == "1":
-                cur.execute("INSERT INTO rewards_member (renterid, points) VALUES (%s, 0)", (renter_id,))
+            if not member and choice == "1":
+                rewards.join(renter_id)
                 conn.commit()
+                session.invalidate("rewards")
                 print("Joined rewards program.\n")
-            elif row and choice == "1":
-                cur.execute("DELETE FROM rewards_member WHERE renterid = %s", (renter_id,))
+            elif member and choice == "1":
+                rewards.leave(renter_id)
                 conn.commit()
+                session.invalidate("rewards")
                 print("Left rewards program.\n")
             else:
                 print("Invalid.\n")
@@ -1765,12 +1326,33 @@ def renter_rewards_menu():
         print(f"Rewards error: {e}\n")
         conn.rollback()
     finally:
-        cur.close()
-        conn.close()
+        release_connection(conn, cur)
 
 
 # ===================== MENUS =====================
 
+def show_stats():
+    """Hidden "stats" menu option: query statistics and listing cache counters."""
+    query_stats.print_report()
+    stats = LISTING_CACHE.stats()
+    print("===== Listing Cache =====")
+    print(
+        f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+        f"{stats['entries']} entries / {stats['rows']} rows cached"
+    )
+    print(
+        f"{stats['evictions']} evicted, {stats['expirations']} expired, "
+        f"{stats['invalidations']} invalidated"
+    )
+    if listing_listener is not None:
+        events = listing_listener.stats()
+        print(
+            f"{events['events']} change notifications, {events['evicted']} entries evicted by them, "
+            f"{events['reconnects']} listener reconnects"
+        )
+    print()
+
+
 def renter_menu():
     """Menu for logged-in renters."""
     while True:
@@ -1801,6 +1383,8 @@ def renter_menu():
         elif choice == "7":
             logout()
             break
+        elif choice == "stats":  # hidden: query and cache statistics
+            show_stats()
         elif choice == "0":
             print("Exiting program.")
             exit(0)
@@ -1818,7 +1402,8 @@ def agent_menu():
         print("4. View My Properties")
         print("5. Search Properties")
         print("6. View/Cancel Bookings (My Properties)")
-        print("7. Logout")
+        print("7. Analytics Dashboard")
+        print("8. Logout")
         print("0. Exit Program")
 
         choice = input("Select an option: ").strip()
@@ -1849,8 +1434,12 @@ def agent_menu():
                 else:
                     print("Invalid option.\n")
         elif choice == "7":
+            agent_dashboard()
+        elif choice == "8":
             logout()
             break
+        elif choice == "stats":  # hidden: query and cache statistics
+            show_stats()
         elif choice == "0":
             print("Exiting program.")
             exit(0)
@@ -1858,13 +1447,21 @@ def agent_menu():
             print("Invalid option.\n")
 
 
+def start_listing_listener():
+    """Start the background LISTEN thread for cross-process cache invalidation."""
+    global listing_listener
+    if listing_listener is None and LISTING_NOTIFY and LISTING_CACHE.enabled:
+        listing_listener = listing_events.ListingListener.from_config(DB_CONFIG, LISTING_CACHE)
+        listing_listener.start()
+
+
 def main_menu():
     """Top-level menu."""
-    global current_user
+    start_listing_listener()
     while True:
         print("\n===== Real Estate Booking System =====")
 
-        if current_user is None:
+        if current_session is None:
             print("1. Register Account")
             print("2. Login")
             print("0. Exit")
@@ -1875,10 +1472,12 @@ def main_menu():
                 register_account()
             elif choice == "2":
                 if login():
-                    if current_user["type"] == "Renter":
+                    if current_session.type == "Renter":
                         renter_menu()
-                    elif current_user["type"] == "Agent":
+                    elif current_session.type == "Agent":
                         agent_menu()
+            elif choice == "stats":  # hidden: query and cache statistics
+                show_stats()
             elif choice == "0":
                 print("Exiting program.")
                 break
@@ -1887,11 +1486,17 @@ def main_menu():
         else:
             print("Already logged in. Use logout from your menu.")
             # Let them go to their menu directly
-            if current_user["type"] == "Renter":
+            if current_session.type == "Renter":
                 renter_menu()
-            elif current_user["type"] == "Agent":
+            elif current_session.type == "Agent":
                 agent_menu()
 
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # command mode (cli.py) shares this module instead of importing a second copy
+        sys.modules.setdefault("main", sys.modules[__name__])
+        import cli
+
+        raise SystemExit(cli.main(sys.argv[1:]))
     main_menu()
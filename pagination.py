@@ -0,0 +1,149 @@
+import uuid
+
+from records import record_cursor
+
+# pagination.py
+# Helpers for walking large property listings without fetchall():
+# - stream_rows(): server-side (named) cursor that pulls rows in itersize batches
+# - KeysetPager: next/previous pages keyed on the listing's ORDER BY columns,
+#   optionally read through a ListingCache (listing_cache.py)
+
+
+def stream_rows(conn, query, params=None, itersize=500, row_type=None):
+    """Yield rows of query through a named cursor, itersize rows per round trip."""
+    with record_cursor(conn, row_type, name=f"stream_{uuid.uuid4().hex}") as cur:
+        cur.itersize = itersize
+        cur.execute(query, params)
+        for row in cur:
+            yield row
+
+
+def keyset_sql(base_sql, keys, after=None, before=None, limit=None):
+    """Wrap base_sql (no ORDER BY) as subquery q and seek past/before a key.
+
+    keys are SQL expressions over q that together form a unique sort key,
+    e.g. ["q.city", "q.state", "q.price", "q.propertyid"]. Returns the SQL and
+    the extra parameters to append after the base query's own parameters.
+    """
+    key_list = ", ".join(keys)
+    placeholders = ", ".join(["%s"] * len(keys))
+    sql = f"SELECT * FROM ({base_sql}) q"
+    extra = []
+    direction = "ASC"
+    if after is not None:
+        sql += f" WHERE ({key_list}) > ({placeholders})"
+        extra.extend(after)
+    elif before is not None:
+        sql += f" WHERE ({key_list}) < ({placeholders})"
+        extra.extend(before)
+        direction = "DESC"
+    sql += " ORDER BY " + ", ".join(f"{k} {direction}" for k in keys)
+    if limit is not None:
+        sql += " LIMIT %s"
+        extra.append(limit)
+    return sql, extra
+
+
+class KeysetPager:
+    """Keyset (seek) pagination over base_sql ordered by keys.
+
+    key_of(row) must return the Python values of keys for a fetched row.
+    Each page costs one LIMIT query; no OFFSET scans, no full result in memory.
+    With row_type (a records.py NamedTuple) rows are returned as records.
+    """
+
+    def __init__(
+        self,
+        conn,
+        base_sql,
+        params,
+        keys,
+        key_of,
+        page_size=20,
+        itersize=500,
+        cache=None,
+        cache_key=None,
+        cache_tags=("properties",),
+        row_type=None,
+    ):
+        self.conn = conn
+        self.base_sql = base_sql
+        self.params = list(params or [])
+        self.keys = keys
+        self.key_of = key_of
+        self.page_size = page_size
+        self.itersize = itersize
+        # optional ListingCache; pages are cached under cache_key + page position
+        self.cache = cache
+        self.cache_key = cache_key
+        self.cache_tags = cache_tags
+        self.row_type = row_type
+        self.rows = []
+        self.page = 0
+        self.has_next = False
+        self.has_prev = False
+
+    def fetch(self, after=None, before=None, limit=None):
+        """Rows strictly after/before a key, always returned in ascending order."""
+        if self.cache is None or self.cache_key is None:
+            return self.query(after, before, limit)
+        return self.cache.get_or_load(
+            (self.cache_key, after, before, limit),
+            lambda: self.query(after, before, limit),
+            self.cache_tags,
+            lambda row: row[0],  # listing rows start with PropertyID
+        )
+
+    def query(self, after=None, before=None, limit=None):
+        """fetch() without the cache."""
+        sql, extra = keyset_sql(self.base_sql, self.keys, after, before, limit)
+        with record_cursor(self.conn, self.row_type) as cur:
+            cur.execute(sql, self.params + extra)
+            rows = cur.fetchall()
+        if before is not None:
+            rows.reverse()
+        return rows
+
+    def first(self):
+        rows = self.fetch(limit=self.page_size + 1)
+        self.rows = rows[: self.page_size]
+        self.has_next = len(rows) > self.page_size
+        self.has_prev = False
+        self.page = 1
+        return self.rows
+
+    def next(self):
+        if not self.has_next:
+            return self.rows
+        rows = self.fetch(after=self.key_of(self.rows[-1]), limit=self.page_size + 1)
+        if not rows:
+            self.has_next = False
+            return self.rows
+        self.rows = rows[: self.page_size]
+        self.has_next = len(rows) > self.page_size
+        self.has_prev = True
+        self.page += 1
+        return self.rows
+
+    def prev(self):
+        if not self.has_prev:
+            return self.rows
+        rows = self.fetch(before=self.key_of(self.rows[0]), limit=self.page_size + 1)
+        if len(rows) < self.page_size:
+            # rows were deleted meanwhile; fall back to the real first page
+            return self.first()
+        self.has_prev = len(rows) > self.page_size
+        self.rows = rows[-self.page_size:]
+        self.has_next = True
+        self.page = self.page - 1 if self.has_prev else 1
+        return self.rows
+
+    def first_index(self):
+        """1-based position of the first row on the current page."""
+        return (self.page - 1) * self.page_size + 1
+
+    def stream_rest(self):
+        """Stream every row after the current page through a server-side cursor."""
+        after = self.key_of(self.rows[-1]) if self.rows else None
+        sql, extra = keyset_sql(self.base_sql, self.keys, after=after)
+        return stream_rows(self.conn, sql, self.params + extra, self.itersize, self.row_type)
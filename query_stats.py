@@ -0,0 +1,208 @@
+import atexit
+import functools
+import heapq
+import os
+import re
+import sys
+import threading
+import time
+
+import dotenv
+import psycopg2.extensions
+
+import db_pool
+
+# query_stats.py
+# Optional per-statement instrumentation for main.py (env var query_stats=1).
+# - InstrumentedConnection hands out cursors that time every execute/COPY,
+#   including cursors with their own factory (records.RecordCursor)
+# - statements are grouped by fingerprint (SQL with literals and whitespace
+#   normalized) and calling function, with call count, time and rows
+# - the slowest statements (query_stats_slowest, default 20) are kept with their
+#   duration, caller and row count
+# - the summary is printed on exit, or from the hidden "stats" menu option
+
+dotenv.load_dotenv()
+
+ENABLED = os.getenv("query_stats", "").strip().lower() in ("1", "true", "yes", "on")
+SLOWEST = int(os.getenv("query_stats_slowest", "20"))
+
+# frames in these modules are skipped when looking for the calling function
+HELPER_MODULES = {__name__, "db_pool", "pagination", "search", "repositories", "records", "session", "contextlib"}
+
+_QUOTED = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM = re.compile(r"%\(\w+\)s|%s")
+_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql):
+    """Normalize SQL so the same statement with different literals groups together."""
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _QUOTED.sub("?", str(sql))
+    sql = _PARAM.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    return _SPACE.sub(" ", sql).strip()
+
+
+def calling_function():
+    """module.function of the nearest caller outside the helper modules."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "?")
+        if module not in HELPER_MODULES and not module.startswith("psycopg2"):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+class QueryStats:
+    """Thread-safe aggregate of statement timings plus the slowest statements."""
+
+    def __init__(self, slowest=20):
+        self.slowest_size = slowest
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.by_statement = {}  # (fingerprint, caller) -> [calls, seconds, max seconds, rows, errors]
+            self.slowest = []  # min-heap of (seconds, seq, fingerprint, caller, rows)
+            self.statements = 0
+            self.rows = 0
+            self.seconds = 0.0
+            self._seq = 0
+
+    def record(self, sql, caller, seconds, rows, failed=False):
+        key = (fingerprint(sql), caller)
+        with self._lock:
+            entry = self.by_statement.setdefault(key, [0, 0.0, 0.0, 0, 0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+            entry[3] += rows
+            entry[4] += failed
+            self.statements += 1
+            self.rows += rows
+            self.seconds += seconds
+            self._seq += 1
+            item = (seconds, self._seq, key[0], caller, rows)
+            if len(self.slowest) < self.slowest_size:
+                heapq.heappush(self.slowest, item)
+            elif seconds > self.slowest[0][0]:
+                heapq.heapreplace(self.slowest, item)
+        return key
+
+    def add_rows(self, key, rows):
+        """Rows fetched later through a named (server-side) cursor."""
+        with self._lock:
+            if key in self.by_statement:
+                self.by_statement[key][3] += rows
+            self.rows += rows
+
+    def totals(self):
+        with self._lock:
+            return {"statements": self.statements, "rows": self.rows, "seconds": self.seconds}
+
+    def report(self, top=15, file=None):
+        """Print totals, the statements with the most total time, and the slowest statements."""
+        file = file or sys.stdout
+        with self._lock:
+            grouped = sorted(self.by_statement.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+            slowest = sorted(self.slowest, reverse=True)
+            statements, rows, seconds = self.statements, self.rows, self.seconds
+
+        def short(sql, width=90):
+            return sql if len(sql) <= width else sql[: width - 3] + "..."
+
+        print("\n===== Query Statistics =====", file=file)
+        print(f"{statements} statements, {rows} rows, {seconds * 1000:.1f} ms in the database driver", file=file)
+        if not statements:
+            return
+        print(f"\nTop {len(grouped)} by total time:", file=file)
+        print(f"{'calls':>7}{'total ms':>11}{'avg ms':>9}{'max ms':>9}{'rows':>9}  caller / statement", file=file)
+        for (sql, caller), (calls, total, longest, n_rows, errors) in grouped:
+            failed = f" ({errors} failed)" if errors else ""
+            print(
+                f"{calls:>7}{total * 1000:>11.2f}{total / calls * 1000:>9.2f}{longest * 1000:>9.2f}"
+                f"{n_rows:>9}  {caller}{failed}",
+                file=file,
+            )
+            print(f"{'':>47}{short(sql)}", file=file)
+        print(f"\nSlowest {len(slowest)} statements:", file=file)
+        for seconds, _, sql, caller, n_rows in slowest:
+            print(f"{seconds * 1000:>10.2f} ms {n_rows:>8} rows  {caller}", file=file)
+            print(f"{'':>30}{short(sql)}", file=file)
+        print(file=file)
+
+
+STATS = QueryStats(SLOWEST)
+
+
+class InstrumentedCursor(psycopg2.extensions.cursor):
+    """Cursor that records every statement it runs in STATS."""
+
+    _stats_key = None
+
+    def _timed(self, run, sql):
+        caller = calling_function()
+        started = time.perf_counter()
+        try:
+            result = run()
+        except BaseException:
+            STATS.record(sql, caller, time.perf_counter() - started, 0, failed=True)
+            raise
+        elapsed = time.perf_counter() - started
+        # client-side cursors have the whole result after execute()
+        rows = self.rowcount if self.name is None and self.description is not None else 0
+        self._stats_key = STATS.record(sql, caller, elapsed, max(rows, 0))
+        return result
+
+    def execute(self, query, vars=None):
+        return self._timed(lambda: super(InstrumentedCursor, self).execute(query, vars), query)
+
+    def executemany(self, query, vars_list):
+        return self._timed(lambda: super(InstrumentedCursor, self).executemany(query, vars_list), query)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(lambda: super(InstrumentedCursor, self).copy_expert(sql, file, size), sql)
+
+    def __next__(self):
+        row = super().__next__()
+        if self.name is not None and self._stats_key is not None:
+            STATS.add_rows(self._stats_key, 1)
+        return row
+
+
+@functools.lru_cache(maxsize=None)
+def instrumented(cursor_factory):
+    """cursor_factory with InstrumentedCursor mixed in (e.g. records.RecordCursor)."""
+    if issubclass(cursor_factory, InstrumentedCursor):
+        return cursor_factory
+    return type(f"Instrumented{cursor_factory.__name__}", (InstrumentedCursor, cursor_factory), {})
+
+
+class InstrumentedConnection(db_pool.PooledConnection):
+    """Pooled connection whose cursors are all InstrumentedCursors."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.get("cursor_factory")
+        kwargs["cursor_factory"] = InstrumentedCursor if factory is None else instrumented(factory)
+        return super().cursor(*args, **kwargs)
+
+
+def connection_factory():
+    """Connection class for the pool: instrumented only when query_stats is on."""
+    return InstrumentedConnection if ENABLED else db_pool.PooledConnection
+
+
+def print_report():
+    if not ENABLED:
+        print("Query statistics are off (set query_stats=1 in .env).\n")
+        return
+    STATS.report()
+
+
+if ENABLED:
+    atexit.register(STATS.report)
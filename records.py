@@ -0,0 +1,233 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import NamedTuple, Optional
+
+import psycopg2.extensions
+
+# records.py
+# Typed rows for the repositories (repositories.py) and pagers (pagination.py).
+# - NamedTuple records: tuples with named fields and no per-row __dict__
+#   (__slots__ = ()), so a record costs what the plain row tuple costs
+# - RecordCursor: psycopg2 cursor factory that builds each fetched row as a
+#   record; record_cursor() opens one (named for server-side streaming)
+#
+# benchmarks/bench_records.py compares their memory with tuples and dicts.
+
+
+class RecordCursor(psycopg2.extensions.cursor):
+    """Cursor returning row_type._make(row) for every row fetched."""
+
+    row_type = None
+
+    def fetchone(self):
+        row = super().fetchone()
+        return None if row is None else self.row_type._make(row)
+
+    def fetchmany(self, size=None):
+        return list(map(self.row_type._make, super().fetchmany(size)))
+
+    def fetchall(self):
+        return list(map(self.row_type._make, super().fetchall()))
+
+    def __iter__(self):
+        # the base __iter__ returns the cursor itself: drive its C-level next()
+        # directly, a for loop would re-enter this method
+        make = self.row_type._make
+        it = super().__iter__()
+        while True:
+            try:
+                row = next(it)
+            except StopIteration:
+                return
+            yield make(row)
+
+
+def record_cursor(conn, row_type=None, name=None):
+    """Cursor whose rows are row_type records (plain tuples without row_type)."""
+    if row_type is None:
+        return conn.cursor(name)
+    cur = conn.cursor(name, cursor_factory=RecordCursor)
+    cur.row_type = row_type
+    return cur
+
+
+class User(NamedTuple):
+    user_id: str
+    name: str
+    email: str
+    type: str
+    renter_id: Optional[str]
+    agent_id: Optional[str]
+
+
+class Location(NamedTuple):
+    location_id: str
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    country: str
+
+
+class Card(NamedTuple):
+    card_id: str
+    card_number: str
+    expiration_date: date
+    cvv: str
+    address_id: str
+
+
+class PropertyListing(NamedTuple):
+    """Row of the agent property list, with nearby schools nearest first."""
+
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    availability: str
+    crime_rate: Optional[str]
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    country: str
+    school_names: Optional[list]
+    school_distances: Optional[list]
+
+
+class PropertyDetail(NamedTuple):
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    availability: str
+    crime_rate: Optional[str]
+    location_id: str
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    country: str
+
+
+class BookableProperty(NamedTuple):
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    city: str
+    state: str
+    bedrooms: Optional[int]
+    agent_id: Optional[str]
+
+
+class RenterBooking(NamedTuple):
+    booking_id: str
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    start_date: date
+    end_date: date
+    city: str
+    state: str
+    card_number: str
+    nights: int
+    total_cost: Decimal  # price * nights, computed in SQL (booking_totals)
+
+
+class AgentBooking(NamedTuple):
+    booking_id: str
+    property_id: str
+    type: str
+    description: str
+    price: Decimal
+    address: str
+    city: str
+    state: str
+    zip_code: str
+    start_date: date
+    end_date: date
+    renter_name: str
+    renter_email: str
+    card_number: str
+    nights: int
+    total_cost: Decimal
+
+
+class BookingReceipt(NamedTuple):
+    booking_id: str
+    total_cost: Decimal
+    points_earned: Optional[int]  # None outside the rewards program
+
+
+class ImportedBooking(NamedTuple):
+    line: int  # line of the import file
+    booking_id: Optional[str]  # None when rejected
+    reason: Optional[str]  # why the row was rejected
+    total_cost: Optional[Decimal]
+    points_earned: Optional[int]
+
+
+class SpendSummary(NamedTuple):
+    bookings: int
+    nights: int
+    total_spent: Decimal
+    first_start: Optional[date]  # None without bookings
+    last_end: Optional[date]
+
+
+class RenterSpend(NamedTuple):
+    """One renter's bookings of an agent's properties."""
+
+    renter_id: str
+    renter_name: str
+    renter_email: str
+    bookings: int
+    nights: int
+    total_spent: Decimal
+
+
+class AgentStats(NamedTuple):
+    """An agent's properties over a window of days (agent_daily_stats)."""
+
+    properties: int
+    booked_nights: int
+    revenue: Decimal
+    check_ins: int
+    occupancy: Optional[Decimal]  # % of property-nights booked; None without properties
+
+
+class MonthlyStats(NamedTuple):
+    month: date  # first day of the month
+    booked_nights: int
+    revenue: Decimal
+    check_ins: int
+    occupancy: Optional[Decimal]
+
+
+class PropertyStats(NamedTuple):
+    """One property over a window of months (property_monthly_stats)."""
+
+    property_id: str
+    type: str
+    city: str
+    state: str
+    price: Decimal
+    booked_nights: int
+    revenue: Decimal
+    occupancy: Decimal
+
+
+class RewardsMembership(NamedTuple):
+    points: int
+    joined_at: datetime
+
+
+class Profile(NamedTuple):
+    """Everything a login loads (UserRepository.profile)."""
+
+    user: User
+    cards: list  # Card records, empty for agents
+    addresses: list  # Location records
+    rewards: Optional[RewardsMembership]  # None outside the rewards program
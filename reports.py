@@ -0,0 +1,324 @@
+import io
+from datetime import date
+from decimal import Decimal
+from typing import NamedTuple
+
+import numpy as np
+import psycopg2.extensions
+
+# reports.py
+# Portfolio reports over the booking history, computed with NumPy
+# (pip install numpy):
+# - load_bookings(): the bookings overlapping a window as BookingColumns, one
+#   NumPy array per column, read from a single COPY ... TO STDOUT (FORMAT
+#   binary) without building a Python object per booking
+# - summary(): per city, state, property type or the whole portfolio: bookings,
+#   nights, occupancy, revenue, average/median stay length and lead time
+# - occupancy(): the occupancy curve, nights booked, occupancy and revenue per
+#   day, week or month (and group)
+# cli.py `report` prints them as JSON or CSV; benchmarks/bench_reports.py
+# measures them at 10M bookings.
+#
+# Like booking_totals (SQL/migrations/008), a night is a day in
+# [StartDate, EndDate) and earns the property's current price. Nights, revenue
+# and occupancy count the nights inside the window; bookings, stay lengths and
+# lead times count the bookings checking in inside it. Occupancy is nights
+# over the nights of the current properties. Lead time is StartDate minus the
+# day of BookedAt (SQL/migrations/010); bookings without BookedAt are skipped.
+
+GROUPS = ("none", "city", "state", "type")
+PERIODS = ("day", "week", "month")
+SUMMARY_COLUMNS = [
+    "group", "properties", "bookings", "nights", "occupancy", "revenue",
+    "avg_stay", "median_stay", "avg_lead", "median_lead",
+]
+OCCUPANCY_COLUMNS = ["period", "group", "properties", "nights", "occupancy", "revenue"]
+
+UNKNOWN_DAY = np.iinfo(np.int32).min  # booked day of bookings without BookedAt
+
+# current properties per (city, state) and type: occupancy denominators and the
+# city/type codes of load_bookings
+PORTFOLIO_SQL = """
+    SELECT l.City, l.State, p.Type, count(*)
+    FROM property p
+    JOIN locations l ON l.LocationID = p.LocationID
+    GROUP BY l.City, l.State, p.Type
+"""
+
+# days since 1970-01-01, price in cents, and 0-based city and type codes
+BOOKING_COLUMNS_SQL = """
+    COPY (
+        SELECT (b.StartDate - DATE '1970-01-01')::int4,
+               (b.EndDate - DATE '1970-01-01')::int4,
+               COALESCE(b.BookedAt::date - DATE '1970-01-01', %(unknown)s)::int4,
+               (p.Price * 100)::int8,
+               (c.Code - 1)::int4,
+               (t.Code - 1)::int4
+        FROM booking b
+        JOIN property p ON p.PropertyID = b.PropertyID
+        JOIN locations l ON l.LocationID = p.LocationID
+        JOIN unnest(%(cities)s::text[], %(states)s::text[]) WITH ORDINALITY AS c (City, State, Code)
+            ON c.City = l.City AND c.State = l.State
+        JOIN unnest(%(types)s::text[]) WITH ORDINALITY AS t (Type, Code) ON t.Type = p.Type
+        WHERE b.StartDate < %(end)s AND b.EndDate > %(start)s
+    ) TO STDOUT (FORMAT binary)
+"""
+
+# One COPY binary tuple of BOOKING_COLUMNS_SQL: field count, then length and
+# big-endian value of each field (never NULL, so every tuple has this layout).
+COPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+COPY_ROW = np.dtype(
+    [
+        ("fields", ">i2"),
+        ("start_len", ">i4"), ("start", ">i4"),
+        ("end_len", ">i4"), ("end", ">i4"),
+        ("booked_len", ">i4"), ("booked", ">i4"),
+        ("price_len", ">i4"), ("price", ">i8"),
+        ("city_len", ">i4"), ("city", ">i4"),
+        ("type_len", ">i4"), ("type", ">i4"),
+    ]
+)
+
+
+class BookingColumns(NamedTuple):
+    """Bookings as parallel NumPy arrays, one element per booking."""
+
+    start: np.ndarray  # int32 days since 1970-01-01
+    end: np.ndarray
+    booked: np.ndarray  # int32 day of BookedAt, UNKNOWN_DAY without it
+    price: np.ndarray  # int64 nightly price in cents
+    city: np.ndarray  # int32 index into cities
+    type: np.ndarray  # int32 index into types
+    cities: list  # (city, state) pairs
+    types: list
+    properties: np.ndarray  # int64 property counts, shape (len(cities), len(types))
+
+
+def day_number(day):
+    return (day - date(1970, 1, 1)).days
+
+
+def parse_copy_binary(data, dtype):
+    """Tuples of COPY ... (FORMAT binary) output whose every tuple has the layout dtype."""
+    if bytes(data[:11]) != COPY_SIGNATURE:
+        raise ValueError("Not COPY binary output")
+    header = 19 + int.from_bytes(data[15:19], "big")
+    body = data[header:-2]  # the trailer is a field count of -1
+    fields = (len(dtype.names) - 1) // 2
+    if len(body) % dtype.itemsize:
+        raise ValueError("Unexpected COPY row layout")
+    rows = np.frombuffer(body, dtype)
+    if len(rows) and (rows["fields"] != fields).any():
+        raise ValueError("Unexpected COPY row layout")
+    return rows
+
+
+def load_bookings(conn, start, end):
+    """BookingColumns of the bookings overlapping [start, end).
+
+    At the start of a transaction it is made REPEATABLE READ and READ ONLY, so
+    the portfolio and the bookings come from one snapshot; the caller ends it.
+    """
+    with conn.cursor() as cur:
+        if conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        cur.execute(PORTFOLIO_SQL)
+        counts = cur.fetchall()
+        cities = sorted({(city, state) for city, state, _, _ in counts})
+        types = sorted({ptype for _, _, ptype, _ in counts})
+        city_index = {c: i for i, c in enumerate(cities)}
+        type_index = {t: i for i, t in enumerate(types)}
+        properties = np.zeros((len(cities), len(types)), np.int64)
+        for city, state, ptype, count in counts:
+            properties[city_index[city, state], type_index[ptype]] = count
+
+        sql = cur.mogrify(
+            BOOKING_COLUMNS_SQL,
+            {
+                "unknown": int(UNKNOWN_DAY),
+                "cities": [c for c, _ in cities],
+                "states": [s for _, s in cities],
+                "types": types,
+                "start": start,
+                "end": end,
+            },
+        )
+        rows = copy_rows(cur, sql.decode(), COPY_ROW)
+    return booking_columns(rows, cities, types, properties)
+
+
+def copy_rows(cur, sql, dtype):
+    """Rows of a COPY ... TO STDOUT (FORMAT binary) statement as a NumPy record array."""
+    buffer = io.BytesIO()
+    cur.copy_expert(sql, buffer)
+    return parse_copy_binary(buffer.getbuffer(), dtype)
+
+
+def booking_columns(rows, cities, types, properties):
+    """BookingColumns from COPY_ROW rows (native-endian copies of each column)."""
+    return BookingColumns(
+        rows["start"].astype(np.int32),
+        rows["end"].astype(np.int32),
+        rows["booked"].astype(np.int32),
+        rows["price"].astype(np.int64),
+        rows["city"].astype(np.int32),
+        rows["type"].astype(np.int32),
+        cities,
+        types,
+        properties,
+    )
+
+
+def group_codes(cols, group):
+    """(group code of every booking, group labels, properties per group)."""
+    if group == "none":
+        return np.zeros(len(cols.start), np.int32), ["all"], np.array([cols.properties.sum()])
+    if group == "city":
+        return cols.city, [f"{city}, {state}" for city, state in cols.cities], cols.properties.sum(axis=1)
+    if group == "type":
+        return cols.type, list(cols.types), cols.properties.sum(axis=0)
+    if group == "state":
+        states = sorted({state for _, state in cols.cities})
+        state_of_city = np.array([states.index(state) for _, state in cols.cities], np.int32)
+        properties = np.bincount(state_of_city, cols.properties.sum(axis=1), len(states)).astype(np.int64)
+        return state_of_city[cols.city], states, properties
+    raise ValueError(f"group must be one of {', '.join(GROUPS)}")
+
+
+def group_medians(codes, values, groups):
+    """Median of values per group code (NaN for empty groups), with one sort."""
+    counts = np.bincount(codes, minlength=groups)
+    if not len(values):
+        return np.full(groups, np.nan)
+    low = values.min()
+    # group in the high 32 bits, so one sort orders by group, then value
+    keys = np.sort((codes.astype(np.int64) << 32) | (values.astype(np.int64) - low))
+    ordered = (keys & 0xFFFFFFFF) + low
+    first = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    found = counts > 0
+    lower = ordered[(first + (counts - 1) // 2)[found]]
+    upper = ordered[(first + counts // 2)[found]]
+    medians = np.full(groups, np.nan)
+    medians[found] = (lower + upper) / 2
+    return medians
+
+
+def cents(amount):
+    return Decimal(int(round(amount))).scaleb(-2)
+
+
+def ratio(part, whole, digits=2):
+    """part / whole rounded, None where whole is 0."""
+    return round(float(part) / float(whole), digits) if whole else None
+
+
+def percent(part, whole):
+    return ratio(100 * part, whole, 1)
+
+
+def number(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def clip_nights(cols, lo, hi):
+    """Start and end of every booking clipped to the days [lo, hi), as offsets from lo."""
+    return np.clip(cols.start, lo, hi) - lo, np.clip(cols.end, lo, hi) - lo
+
+
+def summary(cols, start, end, group="none"):
+    """Rows of SUMMARY_COLUMNS, one per group, for the days [start, end)."""
+    lo, hi = day_number(start), day_number(end)
+    codes, labels, properties = group_codes(cols, group)
+    groups = len(labels)
+
+    first, last = clip_nights(cols, lo, hi)
+    nights_in = last - first
+    nights = np.bincount(codes, nights_in, groups)
+    revenue = np.bincount(codes, cols.price * nights_in, groups)
+
+    checking_in = (cols.start >= lo) & (cols.start < hi)
+    in_codes = codes[checking_in]
+    stays = (cols.end - cols.start)[checking_in]
+    bookings = np.bincount(in_codes, minlength=groups)
+    stay_total = np.bincount(in_codes, stays, groups)
+    stay_median = group_medians(in_codes, stays, groups)
+
+    known = cols.booked[checking_in] != UNKNOWN_DAY
+    lead_codes = in_codes[known]
+    leads = (cols.start[checking_in] - cols.booked[checking_in])[known]
+    lead_count = np.bincount(lead_codes, minlength=groups)
+    lead_total = np.bincount(lead_codes, leads, groups)
+    lead_median = group_medians(lead_codes, leads, groups)
+
+    days = hi - lo
+    return [
+        {
+            "group": labels[g],
+            "properties": int(properties[g]),
+            "bookings": int(bookings[g]),
+            "nights": int(nights[g]),
+            "occupancy": percent(nights[g], properties[g] * days),
+            "revenue": cents(revenue[g]),
+            "avg_stay": ratio(stay_total[g], bookings[g]),
+            "median_stay": number(stay_median[g]),
+            "avg_lead": ratio(lead_total[g], lead_count[g]),
+            "median_lead": number(lead_median[g]),
+        }
+        for g in range(groups)
+    ]
+
+
+def period_starts(lo, hi, period):
+    """(first day of each period, index of its first day in [lo, hi))."""
+    days = np.arange(lo, hi).astype("datetime64[D]")
+    if period == "day":
+        keys = days
+    elif period == "week":
+        # weeks start on Monday; 1970-01-01 was a Thursday
+        keys = days - (np.arange(lo, hi) + 3) % 7
+    elif period == "month":
+        keys = days.astype("datetime64[M]").astype("datetime64[D]")
+    else:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}")
+    index = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+    return keys[index], index
+
+
+def occupancy(cols, start, end, period="month", group="none"):
+    """Rows of OCCUPANCY_COLUMNS per period of [start, end) and group (the occupancy curve)."""
+    lo, hi = day_number(start), day_number(end)
+    if hi <= lo:
+        return []
+    codes, labels, properties = group_codes(cols, group)
+    groups, days = len(labels), hi - lo
+
+    # +1 on each group's first night, -1 after its last, then a running sum per
+    # day: properties booked (and their revenue) on every day of the window
+    first, last = clip_nights(cols, lo, hi)
+    booked = last > first
+    width = days + 1
+    base = codes[booked].astype(np.int64) * width
+    checkin, checkout = base + first[booked], base + last[booked]
+    prices = cols.price[booked]
+    size = groups * width
+    nights = np.bincount(checkin, minlength=size) - np.bincount(checkout, minlength=size)
+    revenue = np.bincount(checkin, prices, size) - np.bincount(checkout, prices, size)
+    nights = nights.reshape(groups, width).cumsum(axis=1)[:, :days]
+    revenue = revenue.reshape(groups, width).cumsum(axis=1)[:, :days]
+
+    starts, index = period_starts(lo, hi, period)
+    period_nights = np.add.reduceat(nights, index, axis=1)
+    period_revenue = np.add.reduceat(revenue, index, axis=1)
+    period_days = np.diff(np.append(index, days))
+    return [
+        {
+            "period": str(starts[i]),
+            "group": labels[g],
+            "properties": int(properties[g]),
+            "nights": int(period_nights[g, i]),
+            "occupancy": percent(period_nights[g, i], properties[g] * period_days[i]),
+            "revenue": cents(period_revenue[g, i]),
+        }
+        for i in range(len(starts))
+        for g in range(groups)
+    ]
@@ -0,0 +1,837 @@
+import csv
+import io
+import uuid
+from datetime import date
+
+from pagination import KeysetPager
+from records import (
+    AgentBooking,
+    AgentStats,
+    BookableProperty,
+    BookingReceipt,
+    Card,
+    ImportedBooking,
+    Location,
+    MonthlyStats,
+    PropertyDetail,
+    Profile,
+    PropertyListing,
+    PropertyStats,
+    RenterBooking,
+    RenterSpend,
+    RewardsMembership,
+    SpendSummary,
+    User,
+    record_cursor,
+)
+
+# repositories.py
+# Data access for main.py and other frontends (cli.py, benchmarks). Each
+# repository wraps one connection and returns typed records (records.py):
+# - UserRepository: accounts, login lookup with renter/agent ids
+# - AddressRepository: a user's addresses (locations)
+# - PaymentRepository: a renter's cards
+# - PropertyRepository: listings, add/modify/delete properties
+# - BookingRepository: booking, rewards accrual, renter/agent booking lists,
+#   bulk import of an agent's bookings
+# - AnalyticsRepository: agent dashboard figures from the rollup tables
+# - RewardsRepository: rewards program membership
+#
+# Repositories never commit: the caller owns the transaction, so several calls
+# can be batched into one. Database errors propagate unchanged (overlapping
+# bookings raise psycopg2.errors.ExclusionViolation).
+#
+# The statements are module constants: async_repositories.py (the HTTP API,
+# api.py) runs the same SQL through an async driver.
+
+
+class Repository:
+    """Base: one connection, a short-lived cursor per call."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def fetch_one(self, record, sql, params=None):
+        with record_cursor(self.conn, record) as cur:
+            cur.execute(sql, params)
+            return cur.fetchone()
+
+    def fetch_all(self, record, sql, params=None):
+        with record_cursor(self.conn, record) as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+
+    def scalar(self, sql, params=None):
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            row = cur.fetchone()
+        return None if row is None else row[0]
+
+    def execute(self, sql, params=None):
+        """Run a statement; returns its row count."""
+        with self.conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.rowcount
+
+
+RENTER_ID_SQL = "SELECT RenterID FROM renter WHERE UserID = %s"
+# A user with the RenterID/AgentID of its type; the renter and agent joins use
+# the UserID indexes of migration 001.
+USER_JOIN_SQL = """
+    FROM users u
+    LEFT JOIN renter r ON r.UserID = u.UserID AND u.Type = 'Renter'
+    LEFT JOIN agent a ON a.UserID = u.UserID AND u.Type = 'Agent'
+"""
+USER_SQL = "SELECT u.UserID, u.Name, u.Email, u.Type, r.RenterID, a.AgentID" + USER_JOIN_SQL + "WHERE u.Email = %s"
+# A login's profile in one round trip: the user, its renter/agent row, rewards
+# membership, and cards and addresses aggregated as JSON arrays (in the column
+# order of RENTER_CARDS_SQL and USER_ADDRESSES_SQL).
+PROFILE_SQL = """
+    SELECT u.UserID, u.Name, u.Email, u.Type, r.RenterID, a.AgentID,
+           COALESCE(c.Cards, '[]'), COALESCE(l.Addresses, '[]'), m.Points, m.JoinedAt
+""" + USER_JOIN_SQL + """
+    LEFT JOIN rewards_member m ON m.RenterID = r.RenterID
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_array(CardID, CardNumber, ExpirationDate, CVV, AddressID)) AS Cards
+        FROM card
+        WHERE card.RenterID = r.RenterID
+    ) c ON true
+    LEFT JOIN LATERAL (
+        SELECT json_agg(json_build_array(l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country)) AS Addresses
+        FROM user_x_address ua
+        JOIN locations l ON ua.LocationID = l.LocationID
+        WHERE ua.UserID = u.UserID
+    ) l ON true
+    WHERE u.Email = %s
+"""
+
+
+class UserRepository(Repository):
+    def find_by_email(self, email):
+        """User with the RenterID/AgentID of its type, or None (the user part of profile())."""
+        return self.fetch_one(User, USER_SQL, (email,))
+
+    def profile(self, email):
+        """Profile (user, cards, addresses, rewards membership) of a login, or None."""
+        with self.conn.cursor() as cur:
+            cur.execute(PROFILE_SQL, (email,))
+            row = cur.fetchone()
+        if row is None:
+            return None
+        user_id, name, email, user_type, renter_id, agent_id, cards, addresses, points, joined_at = row
+        return Profile(
+            User(user_id, name, email, user_type, renter_id, agent_id),
+            [Card(c[0], c[1], date.fromisoformat(c[2]), c[3], c[4]) for c in cards],
+            [Location(*a) for a in addresses],
+            None if points is None else RewardsMembership(points, joined_at),
+        )
+
+    def email_exists(self, email):
+        return self.scalar("SELECT 1 FROM users WHERE Email = %s", (email,)) is not None
+
+    def renter_id(self, user_id):
+        return self.scalar(RENTER_ID_SQL, (user_id,))
+
+    def renter_exists(self, renter_id):
+        return self.scalar("SELECT 1 FROM renter WHERE RenterID = %s", (renter_id,)) is not None
+
+    def create_user(self, name, email, user_type):
+        user_id = str(uuid.uuid4())
+        self.execute(
+            "INSERT INTO users (UserID, Name, Email, Type) VALUES (%s, %s, %s, %s)",
+            (user_id, name, email, user_type),
+        )
+        return user_id
+
+    def create_renter(self, user_id, move_in_date, preferred_locations, budget):
+        renter_id = str(uuid.uuid4())
+        self.execute(
+            "INSERT INTO renter (RenterID, UserID, MoveInDate, PreferedLocations, Budget) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (renter_id, user_id, move_in_date, preferred_locations, budget),
+        )
+        return renter_id
+
+    def create_agent(self, user_id, job_title, agency, contact_info):
+        agent_id = str(uuid.uuid4())
+        self.execute(
+            "INSERT INTO agent (AgentID, UserID, JobTitle, Agency, ContactInfo) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            (agent_id, user_id, job_title, agency, contact_info),
+        )
+        return agent_id
+
+
+USER_ADDRESSES_SQL = (
+    "SELECT l.LocationID, l.Address, l.City, l.State, l.ZipCode, l.Country "
+    "FROM user_x_address ua JOIN locations l ON ua.LocationID = l.LocationID "
+    "WHERE ua.UserID = %s"
+)
+INSERT_USER_ADDRESS_SQL = "INSERT INTO user_x_address (UserAddressID, UserID, LocationID) VALUES (%s, %s, %s)"
+# coordinates come from geocode_zip (locations_geocode trigger)
+INSERT_LOCATION_SQL = (
+    "INSERT INTO locations (LocationID, Address, City, State, ZipCode, Country) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+UPDATE_LOCATION_SQL = (
+    "UPDATE locations SET Address = %s, City = %s, State = %s, ZipCode = %s, Country = %s "
+    "WHERE LocationID = %s"
+)
+ADDRESS_HAS_CARDS_SQL = "SELECT 1 FROM card WHERE AddressID = %s LIMIT 1"
+DELETE_USER_ADDRESS_SQL = "DELETE FROM user_x_address WHERE UserID = %s AND LocationID = %s"
+DELETE_LOCATION_SQL = "DELETE FROM locations WHERE LocationID = %s"
+
+
+class AddressRepository(Repository):
+    def list_for_user(self, user_id):
+        return self.fetch_all(Location, USER_ADDRESSES_SQL, (user_id,))
+
+    def add_for_user(self, user_id, address, city, state, zip_code, country):
+        location_id = self.create_location(address, city, state, zip_code, country)
+        self.execute(INSERT_USER_ADDRESS_SQL, (str(uuid.uuid4()), user_id, location_id))
+        return location_id
+
+    def create_location(self, address, city, state, zip_code, country):
+        location_id = str(uuid.uuid4())
+        self.execute(INSERT_LOCATION_SQL, (location_id, address, city, state, zip_code, country))
+        return location_id
+
+    def update_location(self, location_id, address, city, state, zip_code, country):
+        self.execute(UPDATE_LOCATION_SQL, (address, city, state, zip_code, country, location_id))
+
+    def has_cards(self, location_id):
+        return self.scalar(ADDRESS_HAS_CARDS_SQL, (location_id,)) is not None
+
+    def delete_for_user(self, user_id, location_id):
+        self.execute(DELETE_USER_ADDRESS_SQL, (user_id, location_id))
+        self.execute(DELETE_LOCATION_SQL, (location_id,))
+
+
+RENTER_CARDS_SQL = "SELECT CardID, CardNumber, ExpirationDate, CVV, AddressID FROM card WHERE RenterID = %s"
+INSERT_CARD_SQL = (
+    "INSERT INTO card (CardID, RenterID, AddressID, CardNumber, ExpirationDate, CVV) "
+    "VALUES (%s, %s, %s, %s, %s, %s)"
+)
+UPDATE_CARD_SQL = (
+    "UPDATE card SET CardNumber = %s, ExpirationDate = %s, CVV = %s "
+    "WHERE CardID = %s AND RenterID = %s"
+)
+CARD_HAS_ACTIVE_BOOKINGS_SQL = "SELECT 1 FROM booking WHERE CardID = %s AND EndDate >= CURRENT_DATE LIMIT 1"
+DELETE_CARD_SQL = "DELETE FROM card WHERE CardID = %s AND RenterID = %s"
+
+
+class PaymentRepository(Repository):
+    def list_cards(self, renter_id):
+        return self.fetch_all(Card, RENTER_CARDS_SQL, (renter_id,))
+
+    def add_card(self, renter_id, address_id, card_number, expiration_date, cvv):
+        card_id = str(uuid.uuid4())
+        self.execute(INSERT_CARD_SQL, (card_id, renter_id, address_id, card_number, expiration_date, cvv))
+        return card_id
+
+    def update_card(self, renter_id, card_id, card_number, expiration_date, cvv):
+        self.execute(UPDATE_CARD_SQL, (card_number, expiration_date, cvv, card_id, renter_id))
+
+    def has_active_bookings(self, card_id):
+        return self.scalar(CARD_HAS_ACTIVE_BOOKINGS_SQL, (card_id,)) is not None
+
+    def delete_card(self, renter_id, card_id):
+        self.execute(DELETE_CARD_SQL, (card_id, renter_id))
+
+
+# Schools are aggregated per property in the same statement (one round trip
+# for the whole listing instead of one property_x_school query per row).
+PROPERTY_LIST_SQL = """
+    SELECT p.propertyid, p.type, p.description, p.price, p.availability, p.crimerate,
+           l.address, l.city, l.state, l.zipcode, l.country,
+           sch.names, sch.distances
+    FROM property p
+    JOIN locations l ON p.locationid = l.locationid
+    LEFT JOIN (
+        SELECT pxs.propertyid,
+               array_agg(s.name ORDER BY pxs.distancemiles NULLS LAST, s.name) AS names,
+               array_agg(pxs.distancemiles ORDER BY pxs.distancemiles NULLS LAST, s.name) AS distances
+        FROM property_x_school pxs
+        JOIN school s ON pxs.schoolid = s.schoolid
+        GROUP BY pxs.propertyid
+    ) sch ON sch.propertyid = p.propertyid
+"""
+PROPERTY_LIST_KEYS = ["q.city", "q.state", "q.price", "q.propertyid"]
+
+BOOKABLE_SQL = """
+    SELECT ps.PropertyID,
+           ps.Type,
+           ps.Description,
+           ps.Price,
+           ps.City,
+           ps.State,
+           ps.Bedrooms,
+           ps.AgentID
+    FROM property_search ps
+    WHERE ps.Availability = 'Active'
+"""
+
+PROPERTY_TYPES = ["House", "Apartment", "CommercialBuilding", "Land", "VacationHome"]
+
+# property type -> (subtype table, its key column, detail columns)
+SUBTYPES = {
+    "House": ("house", "houseid", ["numrooms", "squarefeet"]),
+    "Apartment": ("apartment", "apartmentid", ["buildingtype", "floor", "numrooms", "squarefeet"]),
+    "CommercialBuilding": ("commercialbuilding", "commercialbuildingid", ["squarefeet", "businesstype"]),
+    "Land": ("land", "landid", []),
+    "VacationHome": ("vacationhome", "vacationhomeid", []),
+}
+
+
+class PropertyRepository(Repository):
+    def listing_pager(self, page_size=20, itersize=500, cache=None):
+        """KeysetPager over every property (PropertyListing rows) by city, state, price."""
+        return KeysetPager(
+            self.conn,
+            PROPERTY_LIST_SQL,
+            [],
+            PROPERTY_LIST_KEYS,
+            lambda r: (r.city, r.state, r.price, r.property_id),
+            page_size,
+            itersize,
+            cache,
+            ("list",),
+            ("properties", "schools"),
+            row_type=PropertyListing,
+        )
+
+    def bookable_pager(self, page_size=20, itersize=500):
+        """KeysetPager over active properties (BookableProperty rows) by PropertyID."""
+        return KeysetPager(
+            self.conn,
+            BOOKABLE_SQL,
+            [],
+            ["q.propertyid"],
+            lambda r: (r.property_id,),
+            page_size,
+            itersize,
+            row_type=BookableProperty,
+        )
+
+    def bookable(self, property_id):
+        """The active property as a BookableProperty, or None."""
+        return self.fetch_one(BookableProperty, BOOKABLE_SQL + " AND ps.PropertyID = %s", (property_id,))
+
+    def get(self, property_id):
+        return self.fetch_one(
+            PropertyDetail,
+            """
+            SELECT p.propertyid, p.type, p.description, p.price, p.availability, p.crimerate,
+                   l.locationid, l.address, l.city, l.state, l.zipcode, l.country
+            FROM property p
+            JOIN locations l ON p.locationid = l.locationid
+            WHERE p.propertyid = %s
+            """,
+            (property_id,),
+        )
+
+    def create(
+        self,
+        agent_id,
+        location_id,
+        ptype,
+        description,
+        price,
+        status,
+        crime_rate,
+        listing_type,
+        details=(),
+    ):
+        """Insert a property and its subtype row; details follow SUBTYPES columns. Returns PropertyID."""
+        table, key, columns = SUBTYPES[ptype]
+        property_id = str(uuid.uuid4())
+        self.execute(
+            """
+            INSERT INTO property (propertyid, type, locationid, description, price, availability, crimerate,
+                                  listingtype, agentid)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """,
+            (property_id, ptype, location_id, description, price, status, crime_rate, listing_type, agent_id),
+        )
+        names = ", ".join([key, "propertyid"] + columns)
+        placeholders = ", ".join(["%s"] * (len(columns) + 2))
+        self.execute(
+            f"INSERT INTO {table} ({names}) VALUES ({placeholders})",
+            [str(uuid.uuid4()), property_id] + list(details),
+        )
+        return property_id
+
+    def link_nearby_schools(self, property_id, miles):
+        """Link schools within miles with their computed distance; returns the links made."""
+        return self.scalar("SELECT link_nearby_schools(%s, %s)", ([property_id], miles))
+
+    def add_school(self, property_id, school_name):
+        """Link a school by name, creating it if needed (distance set by refresh_school_distances)."""
+        school_id = self.scalar("SELECT schoolid FROM school WHERE name = %s", (school_name,))
+        if school_id is None:
+            school_id = str(uuid.uuid4())
+            self.execute("INSERT INTO school (schoolid, name) VALUES (%s, %s)", (school_id, school_name))
+        self.execute(
+            """
+            INSERT INTO property_x_school (propertyschoolid, propertyid, schoolid)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (propertyid, schoolid) DO NOTHING
+            """,
+            (str(uuid.uuid4()), property_id, school_id),
+        )
+
+    def refresh_school_distances(self, property_id):
+        return self.scalar("SELECT refresh_school_distances(%s)", ([property_id],))
+
+    def update(self, property_id, description, price, availability, crime_rate):
+        self.execute(
+            """
+            UPDATE property
+            SET description = %s, price = %s, availability = %s, crimerate = %s
+            WHERE propertyid = %s
+            """,
+            (description, price, availability, crime_rate, property_id),
+        )
+
+    def has_bookings(self, property_id):
+        return self.scalar("SELECT 1 FROM booking WHERE propertyid = %s LIMIT 1", (property_id,)) is not None
+
+    def delete(self, property_id):
+        """Delete the property and its subtype row (location kept). False if it does not exist."""
+        ptype = self.scalar("SELECT type FROM property WHERE propertyid = %s", (property_id,))
+        if ptype is None:
+            return False
+        if ptype in SUBTYPES:
+            self.execute(f"DELETE FROM {SUBTYPES[ptype][0]} WHERE propertyid = %s", (property_id,))
+        self.execute("DELETE FROM property WHERE propertyid = %s", (property_id,))
+        return True
+
+
+INSERT_BOOKING_SQL = """
+    INSERT INTO booking (BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+"""
+# A whole booking in one statement (one round trip): the property's agent and
+# price, the INSERT, and the rewards points of the stay (whole dollars) for
+# members. No row when the property is not Active; overlaps still raise
+# ExclusionViolation from booking_no_overlap.
+BOOK_SQL = """
+    WITH prop AS (
+        SELECT AgentID, Price * (%(end_date)s::date - %(start_date)s::date) AS TotalCost
+        FROM property
+        WHERE PropertyID = %(property_id)s AND Availability = 'Active'
+    ),
+    booked AS (
+        INSERT INTO booking (BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate)
+        SELECT %(booking_id)s, %(card_id)s, %(renter_id)s, AgentID, %(property_id)s, %(start_date)s, %(end_date)s
+        FROM prop
+        RETURNING BookingID
+    ),
+    rewarded AS (
+        UPDATE rewards_member
+        SET Points = Points + (SELECT trunc(TotalCost)::int FROM prop)
+        WHERE RenterID = %(renter_id)s
+        AND EXISTS (SELECT 1 FROM booked)
+        RETURNING RenterID
+    )
+    SELECT b.BookingID,
+           p.TotalCost,
+           CASE WHEN EXISTS (SELECT 1 FROM rewarded) THEN trunc(p.TotalCost)::int END
+    FROM booked b, prop p
+"""
+
+# Booking lists read booking_totals (SQL/migrations/008) for NUMERIC totals.
+RENTER_BOOKINGS_SQL = """
+    SELECT b.BookingID,
+           p.PropertyID,
+           p.Type,
+           p.Description,
+           b.Price,
+           b.StartDate,
+           b.EndDate,
+           l.City,
+           l.State,
+           c.CardNumber,
+           b.Nights,
+           b.TotalCost
+    FROM booking_totals b
+    JOIN property p ON b.PropertyID = p.PropertyID
+    JOIN locations l ON p.LocationID = l.LocationID
+    JOIN card c ON b.CardID = c.CardID
+    WHERE b.RenterID = %s
+"""
+CANCEL_RENTER_BOOKING_SQL = "DELETE FROM booking WHERE BookingID = %s AND RenterID = %s"
+REACTIVATE_PROPERTY_SQL = "UPDATE property SET Availability = 'Active' WHERE PropertyID = %s"
+
+AGENT_BOOKINGS_SQL = """
+    SELECT b.bookingid,
+        p.propertyid, p.type, p.description, b.price,
+        l.address, l.city, l.state, l.zipcode,
+        b.startdate, b.enddate,
+        u.name AS renter_name, u.email AS renter_email,
+        c.cardnumber,
+        b.nights, b.totalcost
+    FROM booking_totals b
+    JOIN property p ON b.propertyid = p.propertyid
+    JOIN locations l ON p.locationid = l.locationid
+    JOIN renter r ON b.renterid = r.renterid
+    JOIN users u ON r.userid = u.userid
+    JOIN card c ON b.cardid = c.cardid
+    WHERE b.agentid = %s
+"""
+
+EPOCH = date(1970, 1, 1)
+# sort option -> (keyset keys over the booking lists, key of a RenterBooking/AgentBooking)
+BOOKING_SORT_KEYS = {
+    "start": (["q.startdate", "q.bookingid"], lambda r: (r.start_date, r.booking_id)),
+    # latest start first (days since 1970, negated)
+    "recent": (
+        ["-(q.startdate - DATE '1970-01-01')", "q.bookingid"],
+        lambda r: (-(r.start_date - EPOCH).days, r.booking_id),
+    ),
+    # most expensive first
+    "total": (["-q.totalcost", "q.bookingid"], lambda r: (-r.total_cost, r.booking_id)),
+}
+
+RENTER_SPEND_SQL = """
+    SELECT count(*), COALESCE(sum(Nights), 0), COALESCE(sum(TotalCost), 0), min(StartDate), max(EndDate)
+    FROM booking_totals
+    WHERE RenterID = %s
+"""
+# renters of an agent's properties by what they spent on them
+AGENT_RENTER_SPEND_SQL = """
+    SELECT b.RenterID, u.Name, u.Email,
+           count(*) AS Bookings, sum(b.Nights) AS Nights, sum(b.TotalCost) AS TotalSpent
+    FROM booking_totals b
+    JOIN renter r ON b.RenterID = r.RenterID
+    JOIN users u ON r.UserID = u.UserID
+    WHERE b.AgentID = %s
+    GROUP BY b.RenterID, u.Name, u.Email
+"""
+RENTER_SPEND_KEYS = ["-q.totalspent", "q.renterid"]
+CANCEL_AGENT_BOOKING_SQL = """
+    DELETE FROM booking b
+    USING property p
+    WHERE b.propertyid = p.propertyid
+    AND b.bookingid = %s
+    AND p.agentid = %s
+"""
+
+# Bulk import: rows are COPYed into a temporary table, then one statement
+# validates the whole batch (renter, card, property, overlaps with existing
+# bookings and with rows of the batch accepted before them), inserts the
+# accepted rows and credits their rewards points. Rejected rows get the menus' messages.
+CREATE_BOOKING_IMPORT_SQL = """
+    CREATE TEMP TABLE booking_import (
+        Line INT PRIMARY KEY,
+        BookingID VARCHAR(36) NOT NULL,
+        RenterEmail TEXT,
+        PropertyID TEXT,
+        StartDate DATE NOT NULL,
+        EndDate DATE NOT NULL,
+        Card TEXT
+    ) ON COMMIT DROP
+"""
+COPY_BOOKING_IMPORT_SQL = """
+    COPY booking_import (Line, BookingID, RenterEmail, PropertyID, StartDate, EndDate, Card)
+    FROM STDIN WITH (FORMAT csv)
+"""
+# Wait for concurrent bookers of the batch's properties (they hold these row
+# locks until commit, see 007_property_availability.sql) so the next statement
+# sees their bookings.
+LOCK_IMPORT_PROPERTIES_SQL = """
+    SELECT 1 FROM property
+    WHERE PropertyID IN (SELECT PropertyID FROM booking_import)
+    ORDER BY PropertyID
+    FOR NO KEY UPDATE
+"""
+IMPORT_BOOKINGS_SQL = """
+    WITH RECURSIVE staged AS (
+        SELECT s.Line, s.BookingID, s.PropertyID, s.StartDate, s.EndDate,
+               r.RenterID, c.Matches, c.CardID, ps.AgentID,
+               ps.Price * (s.EndDate - s.StartDate) AS TotalCost,
+               CASE
+                   WHEN r.RenterID IS NULL THEN 'No renter found for ' || COALESCE(s.RenterEmail, '')
+                   WHEN c.Matches = 0 THEN 'No matching card'
+                   WHEN c.Matches > 1 THEN 'Pick one of the renter''s cards with card'
+                   WHEN ps.PropertyID IS NULL THEN 'No active property ' || COALESCE(s.PropertyID, '')
+                   WHEN ps.AgentID IS DISTINCT FROM %(agent_id)s THEN 'Not one of your properties'
+                   WHEN EXISTS (
+                       SELECT 1 FROM booking b
+                       WHERE b.PropertyID = s.PropertyID
+                       AND b.StartDate <= s.EndDate
+                       AND b.EndDate >= s.StartDate
+                   ) THEN 'Property already booked for that period'
+               END AS Reason
+        FROM booking_import s
+        LEFT JOIN users u ON u.Email = s.RenterEmail
+        LEFT JOIN renter r ON r.UserID = u.UserID
+        LEFT JOIN LATERAL (
+            SELECT count(*) AS Matches, min(card.CardID) AS CardID
+            FROM card
+            WHERE card.RenterID = r.RenterID
+            AND (s.Card IS NULL OR s.Card IN (card.CardID, right(card.CardNumber, 4)))
+        ) c ON true
+        LEFT JOIN property_search ps ON ps.PropertyID = s.PropertyID AND ps.Availability = 'Active'
+    ),
+    -- the first row of the batch wins a period: the valid rows of each property
+    -- are walked in line order, and a row overlapping a row accepted before it
+    -- is rejected (a rejected row blocks nothing)
+    valid AS (
+        SELECT Line, PropertyID, StartDate, EndDate,
+               row_number() OVER (PARTITION BY PropertyID ORDER BY Line) AS Seq
+        FROM staged
+        WHERE Reason IS NULL
+    ),
+    walked (PropertyID, Seq, Line, OverlapLine, Accepted) AS (
+        SELECT PropertyID, Seq, Line, NULL::int, ARRAY[Line]
+        FROM valid
+        WHERE Seq = 1
+        UNION ALL
+        SELECT v.PropertyID, v.Seq, v.Line, o.Line,
+               CASE WHEN o.Line IS NULL THEN w.Accepted || v.Line ELSE w.Accepted END
+        FROM walked w
+        JOIN valid v ON v.PropertyID = w.PropertyID AND v.Seq = w.Seq + 1
+        LEFT JOIN LATERAL (
+            SELECT a.Line
+            FROM valid a
+            WHERE a.PropertyID = v.PropertyID
+            AND a.Line = ANY (w.Accepted)
+            AND a.StartDate <= v.EndDate
+            AND a.EndDate >= v.StartDate
+            ORDER BY a.Line
+            LIMIT 1
+        ) o ON true
+    ),
+    checked AS (
+        SELECT s.*,
+               COALESCE(s.Reason, 'Overlaps line ' || w.OverlapLine || ' of the import') AS Verdict
+        FROM staged s
+        LEFT JOIN walked w ON w.Line = s.Line
+    ),
+    inserted AS (
+        INSERT INTO booking (BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate)
+        SELECT BookingID, CardID, RenterID, AgentID, PropertyID, StartDate, EndDate
+        FROM checked
+        WHERE Verdict IS NULL
+    ),
+    rewarded AS (
+        UPDATE rewards_member m
+        SET Points = m.Points + t.Points
+        FROM (
+            SELECT RenterID, sum(trunc(TotalCost))::int AS Points
+            FROM checked
+            WHERE Verdict IS NULL
+            GROUP BY RenterID
+        ) t
+        WHERE m.RenterID = t.RenterID
+    )
+    SELECT c.Line,
+           CASE WHEN c.Verdict IS NULL THEN c.BookingID END,
+           c.Verdict,
+           CASE WHEN c.Verdict IS NULL THEN c.TotalCost END,
+           CASE WHEN c.Verdict IS NULL AND m.RenterID IS NOT NULL THEN trunc(c.TotalCost)::int END
+    FROM checked c
+    LEFT JOIN rewards_member m ON m.RenterID = c.RenterID
+    ORDER BY c.Line
+"""
+
+
+def book_params(renter_id, card_id, property_id, start_date, end_date):
+    """Parameters of BOOK_SQL, with a new BookingID."""
+    return {
+        "booking_id": str(uuid.uuid4()),
+        "card_id": card_id,
+        "renter_id": renter_id,
+        "property_id": property_id,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+
+
+class BookingRepository(Repository):
+    def insert(self, card_id, renter_id, agent_id, property_id, start_date, end_date):
+        """Insert a booking; overlaps raise ExclusionViolation (booking_no_overlap)."""
+        booking_id = str(uuid.uuid4())
+        self.execute(
+            INSERT_BOOKING_SQL,
+            (booking_id, card_id, renter_id, agent_id, property_id, start_date, end_date),
+        )
+        return booking_id
+
+    def book(self, renter_id, card_id, property_id, start_date, end_date):
+        """Book an Active property for its agent and credit rewards points, in one
+        statement. Returns a BookingReceipt, or None if the property is not Active.
+        """
+        params = book_params(renter_id, card_id, property_id, start_date, end_date)
+        return self.fetch_one(BookingReceipt, BOOK_SQL, params)
+
+    def import_bookings(self, agent_id, rows):
+        """Book rows of (line, renter email, property id, start, end, card or None)
+        for the agent's properties; card is a CardID or last 4 digits, optional
+        when the renter has one card. Returns an ImportedBooking per row.
+        """
+        data = io.StringIO()
+        writer = csv.writer(data)
+        for line, email, property_id, start_date, end_date, card in rows:
+            writer.writerow([line, str(uuid.uuid4()), email, property_id, start_date, end_date, card])
+        data.seek(0)
+        with self.conn.cursor() as cur:
+            cur.execute(CREATE_BOOKING_IMPORT_SQL)
+            cur.copy_expert(COPY_BOOKING_IMPORT_SQL, data)
+            cur.execute(LOCK_IMPORT_PROPERTIES_SQL)
+        return self.fetch_all(ImportedBooking, IMPORT_BOOKINGS_SQL, {"agent_id": agent_id})
+
+    def for_renter(self, renter_id):
+        return self.fetch_all(RenterBooking, RENTER_BOOKINGS_SQL, (renter_id,))
+
+    def renter_pager(self, renter_id, sort="start", page_size=20, itersize=500):
+        """KeysetPager over the renter's bookings (RenterBooking rows), sorted by BOOKING_SORT_KEYS[sort]."""
+        keys, key_of = BOOKING_SORT_KEYS[sort]
+        return KeysetPager(
+            self.conn, RENTER_BOOKINGS_SQL, [renter_id], keys, key_of, page_size, itersize, row_type=RenterBooking
+        )
+
+    def renter_spend(self, renter_id):
+        """SpendSummary of all the renter's bookings."""
+        return self.fetch_one(SpendSummary, RENTER_SPEND_SQL, (renter_id,))
+
+    def cancel_for_renter(self, renter_id, booking):
+        """Cancel a RenterBooking and set its property back to Active."""
+        self.execute(CANCEL_RENTER_BOOKING_SQL, (booking.booking_id, renter_id))
+        self.execute(REACTIVATE_PROPERTY_SQL, (booking.property_id,))
+
+    def for_agent(self, agent_id):
+        """Bookings of the agent's properties, latest start first."""
+        return self.fetch_all(AgentBooking, AGENT_BOOKINGS_SQL + " ORDER BY b.startdate DESC", (agent_id,))
+
+    def agent_pager(self, agent_id, sort="recent", page_size=20, itersize=500):
+        """KeysetPager over bookings of the agent's properties (AgentBooking rows)."""
+        keys, key_of = BOOKING_SORT_KEYS[sort]
+        return KeysetPager(
+            self.conn, AGENT_BOOKINGS_SQL, [agent_id], keys, key_of, page_size, itersize, row_type=AgentBooking
+        )
+
+    def renter_spend_pager(self, agent_id, page_size=20, itersize=500):
+        """KeysetPager over RenterSpend rows of the agent's properties, biggest spender first."""
+        return KeysetPager(
+            self.conn,
+            AGENT_RENTER_SPEND_SQL,
+            [agent_id],
+            RENTER_SPEND_KEYS,
+            lambda r: (-r.total_spent, r.renter_id),
+            page_size,
+            itersize,
+            row_type=RenterSpend,
+        )
+
+    def cancel_for_agent(self, agent_id, booking_id):
+        """Cancel a booking of one of the agent's properties; False if there is none."""
+        return self.execute(CANCEL_AGENT_BOOKING_SQL, (booking_id, agent_id)) > 0
+
+
+# Agent analytics read the rollups of SQL/migrations/009_agent_rollups.sql:
+# one row per day or per property-month of the window, whatever the history.
+# Occupancy is booked nights over the nights of the agent's current properties.
+AGENT_WINDOW_STATS_SQL = """
+    SELECT p.Properties,
+           COALESCE(d.BookedNights, 0),
+           COALESCE(d.Revenue, 0),
+           COALESCE(d.CheckIns, 0),
+           round(100.0 * COALESCE(d.BookedNights, 0)
+                 / NULLIF(p.Properties * (%(end)s::date - %(start)s::date), 0), 1)
+    FROM (SELECT count(*) AS Properties FROM property WHERE AgentID = %(agent_id)s) p,
+         (SELECT sum(BookedNights) AS BookedNights, sum(Revenue) AS Revenue, sum(CheckIns) AS CheckIns
+          FROM agent_daily_stats
+          WHERE AgentID = %(agent_id)s AND Day >= %(start)s AND Day < %(end)s) d
+"""
+
+AGENT_MONTHLY_STATS_SQL = """
+    SELECT m.Month,
+           COALESCE(sum(d.BookedNights), 0),
+           COALESCE(sum(d.Revenue), 0),
+           COALESCE(sum(d.CheckIns), 0),
+           round(100.0 * COALESCE(sum(d.BookedNights), 0) / NULLIF(p.Properties * (m.NextMonth - m.Month), 0), 1)
+    FROM (
+        SELECT g::date AS Month, (g + interval '1 month')::date AS NextMonth
+        FROM generate_series(%(start)s::date, %(end)s::date - 1, interval '1 month') g
+    ) m
+    CROSS JOIN (SELECT count(*) AS Properties FROM property WHERE AgentID = %(agent_id)s) p
+    LEFT JOIN agent_daily_stats d ON d.AgentID = %(agent_id)s AND d.Day >= m.Month AND d.Day < m.NextMonth
+    GROUP BY m.Month, m.NextMonth, p.Properties
+    ORDER BY m.Month
+"""
+
+# every property of the agent, with its nights and revenue in [start, end) months
+AGENT_PROPERTY_STATS_SQL = """
+    SELECT p.PropertyID, p.Type, l.City, l.State, p.Price,
+           COALESCE(sum(s.BookedNights), 0) AS BookedNights,
+           COALESCE(sum(s.Revenue), 0) AS Revenue,
+           round(100.0 * COALESCE(sum(s.BookedNights), 0) / (%s::date - %s::date), 1) AS Occupancy
+    FROM property p
+    JOIN locations l ON l.LocationID = p.LocationID
+    LEFT JOIN property_monthly_stats s ON s.PropertyID = p.PropertyID AND s.Month >= %s AND s.Month < %s
+    WHERE p.AgentID = %s
+    GROUP BY p.PropertyID, l.City, l.State
+"""
+PROPERTY_STATS_KEYS = ["-q.revenue", "q.propertyid"]
+
+# bookings of the agent's properties checking in on [start, end)
+AGENT_CHECK_INS_SQL = AGENT_BOOKINGS_SQL + " AND b.startdate >= %s AND b.startdate < %s"
+
+
+class AnalyticsRepository(Repository):
+    """Agent dashboard figures, from the rollup tables (no booking scans)."""
+
+    def window(self, agent_id, start, end):
+        """AgentStats of the agent's properties for the days [start, end)."""
+        return self.fetch_one(AgentStats, AGENT_WINDOW_STATS_SQL, {"agent_id": agent_id, "start": start, "end": end})
+
+    def monthly(self, agent_id, start, end):
+        """MonthlyStats for each month from start up to end (first days of months), empty months too."""
+        return self.fetch_all(
+            MonthlyStats, AGENT_MONTHLY_STATS_SQL, {"agent_id": agent_id, "start": start, "end": end}
+        )
+
+    def property_pager(self, agent_id, start, end, page_size=20, itersize=500):
+        """KeysetPager over PropertyStats for the months [start, end), most revenue first."""
+        return KeysetPager(
+            self.conn,
+            AGENT_PROPERTY_STATS_SQL,
+            [end, start, start, end, agent_id],
+            PROPERTY_STATS_KEYS,
+            lambda r: (-r.revenue, r.property_id),
+            page_size,
+            itersize,
+            row_type=PropertyStats,
+        )
+
+    def check_in_pager(self, agent_id, start, end, page_size=20, itersize=500):
+        """KeysetPager over AgentBooking rows checking in on [start, end), soonest first."""
+        keys, key_of = BOOKING_SORT_KEYS["start"]
+        return KeysetPager(
+            self.conn,
+            AGENT_CHECK_INS_SQL,
+            [agent_id, start, end],
+            keys,
+            key_of,
+            page_size,
+            itersize,
+            row_type=AgentBooking,
+        )
+
+
+class RewardsRepository(Repository):
+    def membership(self, renter_id):
+        """RewardsMembership of the renter, or None if not a member."""
+        return self.fetch_one(
+            RewardsMembership,
+            "SELECT points, joinedat FROM rewards_member WHERE renterid = %s",
+            (renter_id,),
+        )
+
+    def join(self, renter_id):
+        self.execute("INSERT INTO rewards_member (renterid, points) VALUES (%s, 0)", (renter_id,))
+
+    def leave(self, renter_id):
+        self.execute("DELETE FROM rewards_member WHERE renterid = %s", (renter_id,))
@@ -1,6 +1,7 @@
 import subprocess
 import dotenv
 import os
+import glob
 
 dotenv.load_dotenv()
 
@@ -12,8 +13,11 @@ DB_CONFIG = {
     "port": os.getenv("port")
 }
 
+MIGRATIONS_DIR = os.path.join("SQL", "migrations")
+
+
 # Connects to the PostgreSQL database and runs the given SQL file
-def run_sql_file():
+def run_sql_file(path="tables.sql", stop_on_error=False):
     env = os.environ.copy()
     if DB_CONFIG["password"]:
         env["PGPASSWORD"] = DB_CONFIG["password"]
@@ -24,8 +28,10 @@ def run_sql_file():
         "-d", DB_CONFIG["dbname"],
         "-h", DB_CONFIG["host"],
         "-p", str(DB_CONFIG["port"]),
-        "-f", "tables.sql",
+        "-f", path,
     ]
+    if stop_on_error:
+        command += ["-v", "ON_ERROR_STOP=1"]
 
     result = subprocess.run(
         command,
@@ -38,11 +44,18 @@ def run_sql_file():
         print(f"Error in {result.stderr}")
         raise SystemExit(1)
     else:
-        print("tables.sql executed successfully.\n")
+        print(f"{path} executed successfully.\n")
+
+
+# Runs SQL/migrations/*.sql in file name order (indexes, triggers, ...)
+def run_migrations():
+    for path in sorted(glob.glob(os.path.join(MIGRATIONS_DIR, "*.sql"))):
+        run_sql_file(path, stop_on_error=True)
 
 
 def main():
     run_sql_file()
+    run_migrations()
     print("All Tables created successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,362 @@
+import functools
+import weakref
+from decimal import Decimal, InvalidOperation
+
+from psycopg2.extras import DateRange
+
+from pagination import KeysetPager
+
+# search.py
+# Property search engine used by search_properties.
+# Reads the denormalized property_search table (SQL/migrations/004), so no
+# search joins locations, house or apartment.
+# A keyword filter matches the generated SearchVector (full text, ranked by
+# ts_rank); when it finds nothing, fuzzy_filters() retries the words against the
+# description by trigram similarity (pg_trgm, if installed).
+# A "near" filter keeps properties within N miles of a point or zip code
+# (SQL/migrations/006: grid cells prefilter, exact distance check).
+# A "stay" filter keeps properties free from check-in through check-out: one
+# containment probe against their free intervals (property_availability,
+# SQL/migrations/007) instead of scanning their bookings.
+# Every search is normalized into a canonical statement shape: filters appear in
+# a fixed order with typed parameters, and only the presence of city, state,
+# price bounds, min bedrooms and stay (plus sort and page direction)
+# picks the shape. Type and listing type always use "%(pN)s IS NULL OR ...".
+# Each shape's SQL text is built once per process and sent as is, planned for
+# its parameters every time: generic plans of PREPAREd shapes misestimate the
+# price range and "IS NULL OR" filters, and re-planned PREPAREd statements
+# were no faster than plain SQL (benchmarks/bench_search.py).
+
+NO_BEDROOMS_KEY = 2147483647  # bedrooms sort keeps Land, CommercialBuilding, ... last
+NO_RANK = "NULL::real"  # Rank column of searches without keywords
+DEFAULT_RADIUS_MILES = 10
+
+SEARCH_SELECT = """
+    SELECT ps.PropertyID,
+           ps.Type,
+           ps.ListingType,
+           ps.Description,
+           ps.Price,
+           ps.City,
+           ps.State,
+           ps.Bedrooms,
+           {rank} AS Rank
+    FROM property_search ps
+    WHERE ps.Availability = 'Active'
+"""
+
+# sort option -> (key expressions, key param types, key of a result row)
+SORT_KEYS = {
+    "price": (
+        ["ps.Price", "ps.PropertyID"],
+        ["numeric", "varchar"],
+        lambda r: (r[4], r[0]),
+    ),
+    "bedrooms": (
+        [f"COALESCE(ps.Bedrooms, {NO_BEDROOMS_KEY})", "ps.PropertyID"],
+        ["int", "varchar"],
+        lambda r: (NO_BEDROOMS_KEY if r[7] is None else r[7], r[0]),
+    ),
+    # best match first; {rank} is the keyword filter's rank expression
+    "relevance": (
+        ["-{rank}", "ps.PropertyID"],
+        ["real", "varchar"],
+        lambda r: (-r[8], r[0]),
+    ),
+    "none": (
+        ["ps.PropertyID"],
+        ["varchar"],
+        lambda r: (r[0],),
+    ),
+}
+
+# connection -> whether pg_trgm is installed
+_trigram = weakref.WeakKeyDictionary()
+
+
+def normalize_filters(
+    city=None,
+    state=None,
+    prop_type=None,
+    listing_type=None,
+    min_price=None,
+    max_price=None,
+    min_bedrooms=None,
+    check_in=None,
+    check_out=None,
+    keyword=None,
+    near=None,
+    within_miles=None,
+):
+    """Turn raw menu input into canonical filter values. Raises ValueError.
+
+    check_in/check_out are dates of the stay (both inclusive, like booking
+    StartDate/EndDate); without a check-out the stay is the check-in day.
+    near is a (latitude, longitude) pair, see locate().
+    """
+
+    def text(value):
+        value = "" if value is None else str(value).strip()
+        return value or None
+
+    def price(value):
+        value = text(value)
+        if value is None:
+            return None
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise ValueError(f"Invalid price: {value}")
+
+    listing_type = text(listing_type)
+    bedrooms = text(min_bedrooms)
+    if near is not None:
+        miles = float(text(within_miles) or DEFAULT_RADIUS_MILES)
+        if miles <= 0:
+            raise ValueError(f"Invalid radius: {within_miles}")
+        near = (round(float(near[0]), 6), round(float(near[1]), 6), miles)
+    stay = None
+    if check_in is not None:
+        check_out = check_out or check_in
+        if check_out < check_in:
+            raise ValueError(f"Check-out {check_out} is before check-in {check_in}")
+        stay = DateRange(check_in, check_out, "[]")
+    return {
+        "city": text(city),
+        "state": text(state),
+        "type": text(prop_type),
+        "listing_type": listing_type.title() if listing_type else None,
+        "min_price": price(min_price),
+        "max_price": price(max_price),
+        "min_bedrooms": int(bedrooms) if bedrooms is not None else None,
+        "stay": stay,
+        "keyword": " ".join(keyword.split()) if text(keyword) else None,
+        "fuzzy_keyword": None,
+        "near": near,
+    }
+
+
+GEOCODE_ZIP_SQL = "SELECT Latitude, Longitude FROM geocode_zip WHERE ZipCode = %s"
+
+
+def parse_point(place):
+    """(latitude, longitude) of "lat,lon" text, None for a zip code. Raises ValueError."""
+    place = str(place).strip()
+    if "," not in place:
+        return None
+    try:
+        lat, lon = (float(part) for part in place.split(","))
+    except ValueError:
+        raise ValueError(f"Invalid coordinates: {place}")
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError(f"Invalid coordinates: {place}")
+    return lat, lon
+
+
+def locate(conn, place):
+    """(latitude, longitude) of "lat,lon" text or a zip code in geocode_zip. Raises ValueError."""
+    point = parse_point(place)
+    if point is not None:
+        return point
+    place = str(place).strip()
+    with conn.cursor() as cur:
+        cur.execute(GEOCODE_ZIP_SQL, (place,))
+        row = cur.fetchone()
+    if row is None:
+        raise ValueError(f"Unknown zip code: {place}")
+    return row
+
+
+def fuzzy_filters(filters):
+    """The same search with its keywords matched by trigram similarity instead of full text."""
+    return dict(filters, keyword=None, fuzzy_keyword=filters["keyword"])
+
+
+TRIGRAM_INSTALLED_SQL = "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+
+
+def trigram_available(conn):
+    """Whether pg_trgm is installed (SQL/migrations/005 skips the fallback without it)."""
+    if conn not in _trigram:
+        with conn.cursor() as cur:
+            cur.execute(TRIGRAM_INSTALLED_SQL)
+            _trigram[conn] = cur.fetchone()[0]
+    return _trigram[conn]
+
+
+# filters that pick the statement shape, in canonical order, with their SQL
+SHAPE_FILTERS = [
+    ("city", "varchar", "ps.City = {}"),
+    ("state", "varchar", "ps.State = {}"),
+    ("min_price", "numeric", "ps.Price >= {}"),
+    ("max_price", "numeric", "ps.Price <= {}"),
+    ("min_bedrooms", "int", "ps.Bedrooms >= {}"),
+    # free for the whole stay: one of the property's free intervals covers it
+    # (parameter is the stay as a daterange, upper bound exclusive)
+    (
+        "stay",
+        "daterange",
+        """EXISTS (
+                SELECT 1 FROM property_availability pa
+                WHERE pa.PropertyID = ps.PropertyID
+                  AND pa.FreeUntil >= upper({0})
+                  AND pa.FreeFrom <= lower({0})
+            )""",
+    ),
+    ("keyword", "text", "ps.SearchVector @@ websearch_to_tsquery('english', {})"),
+    ("fuzzy_keyword", "text", "{} <%% ps.Description"),
+    # parameter is ARRAY[latitude, longitude, miles]
+    (
+        "near",
+        "float8[]",
+        """ps.GeoCell = ANY (geo_cells({0}[1], {0}[2], {0}[3]))
+            AND geo_distance_miles(ps.Latitude, ps.Longitude, {0}[1], {0}[2]) <= {0}[3]""",
+    ),
+]
+
+# keyword filter -> rank of a matching row (higher is better)
+KEYWORD_RANKS = {
+    "keyword": "ts_rank(ps.SearchVector, websearch_to_tsquery('english', {}))",
+    "fuzzy_keyword": "word_similarity({}, ps.Description)",
+}
+
+
+def effective_sort(filters, sort):
+    """Keyword searches default to relevance; relevance needs a keyword."""
+    ranked = any(filters[name] is not None for name in KEYWORD_RANKS)
+    if sort in ("price", "bedrooms"):
+        return sort
+    return "relevance" if ranked else "none"
+
+
+def statement_shape(filters, sort, direction="first"):
+    """Canonical shape of a search: present filters, sort and page direction.
+
+    direction is "first" (no key), "next" (rows after a key) or "prev".
+    """
+    present = tuple(filters[name] is not None for name, _, _ in SHAPE_FILTERS)
+    return present, effective_sort(filters, sort), direction
+
+
+@functools.lru_cache(maxsize=None)
+def build_statement(shape):
+    """SQL of a shape, with typed %(pN)s placeholders for statement_params()."""
+    present, sort, direction = shape
+    keys, key_types, _ = SORT_KEYS[sort]
+    count = 2
+    sql = """
+      AND (%(p1)s::varchar IS NULL OR ps.Type = %(p1)s::varchar)
+      AND (%(p2)s::varchar IS NULL OR ps.ListingType = %(p2)s::varchar)
+    """
+
+    def param(type_name):
+        nonlocal count
+        count += 1
+        return f"(%(p{count})s::{type_name})"
+
+    rank = NO_RANK
+    for (name, type_name, clause), is_present in zip(SHAPE_FILTERS, present):
+        if is_present:
+            ref = param(type_name)
+            sql += " AND " + clause.format(ref)
+            if name in KEYWORD_RANKS:
+                rank = KEYWORD_RANKS[name].format(ref)
+    sql = SEARCH_SELECT.format(rank=rank) + sql
+    keys = [k.format(rank=rank) for k in keys]
+
+    order = "ASC"
+    if direction != "first":
+        op = ">" if direction == "next" else "<"
+        order = "ASC" if direction == "next" else "DESC"
+        key_params = ", ".join(param(t) for t in key_types)
+        sql += f" AND ({', '.join(keys)}) {op} ({key_params})"
+    sql += " ORDER BY " + ", ".join(f"{k} {order}" for k in keys)
+    sql += f" LIMIT {param('bigint')}"
+    return sql
+
+
+def statement_params(filters, shape, key, limit):
+    """Parameters of build_statement(shape): {"p1": ..., "p2": ...}."""
+    present, _, direction = shape
+    params = [filters["type"], filters["listing_type"]]
+    for (name, _, _), is_present in zip(SHAPE_FILTERS, present):
+        if is_present:
+            value = filters[name]
+            params.append(list(value) if isinstance(value, tuple) else value)
+    if direction != "first":
+        params.extend(key)
+    params.append(limit)
+    return {f"p{i}": value for i, value in enumerate(params, 1)}
+
+
+def search_statement(filters, sort="none", after=None, before=None, limit=20):
+    """SQL to run for one page of a search, for any driver: (sql, params, direction)."""
+    if before is not None:
+        direction, key = "prev", before
+    elif after is not None:
+        direction, key = "next", after
+    else:
+        direction, key = "first", None
+    shape = statement_shape(filters, sort, direction)
+    return build_statement(shape), statement_params(filters, shape, key, limit), direction
+
+
+def execute_search(conn, filters, sort="none", after=None, before=None, limit=20):
+    """Run one page of a search; rows in ascending key order."""
+    sql, params, direction = search_statement(filters, sort, after, before, limit)
+    with conn.cursor() as cur:
+        cur.execute(sql, params)
+        rows = cur.fetchall()
+    if direction == "prev":
+        rows.reverse()
+    return rows
+
+
+def cache_key(kind, filters, sort):
+    """ListingCache key prefix for a search: canonical filters in SHAPE order."""
+    return (kind, sort, filters["type"], filters["listing_type"]) + tuple(
+        filters[name] for name, _, _ in SHAPE_FILTERS
+    )
+
+
+def cache_tags(filters, sort):
+    """Searches for a stay also depend on bookings, bedroom searches on house/apartment."""
+    tags = ["properties"]
+    if filters["stay"] is not None:
+        tags.append("bookings")
+    if filters["min_bedrooms"] is not None or sort == "bedrooms":
+        tags.append("bedrooms")
+    return tuple(tags)
+
+
+class SearchPager(KeysetPager):
+    """KeysetPager whose pages come from the canonical search statements."""
+
+    def __init__(self, conn, filters, sort="none", page_size=20, itersize=500, cache=None):
+        self.sort = effective_sort(filters, sort)
+        self.filters = filters
+        super().__init__(
+            conn,
+            None,
+            [],
+            SORT_KEYS[self.sort][0],
+            SORT_KEYS[self.sort][2],
+            page_size,
+            itersize,
+            cache,
+            cache_key("search", filters, self.sort),
+            cache_tags(filters, self.sort),
+        )
+
+    def query(self, after=None, before=None, limit=None):
+        return execute_search(self.conn, self.filters, self.sort, after, before, limit)
+
+    def stream_rest(self):
+        """Stream the remaining rows in itersize batches of the same statement shape."""
+        after = self.key_of(self.rows[-1]) if self.rows else None
+        while True:
+            rows = self.query(after=after, limit=self.itersize)
+            yield from rows
+            if len(rows) < self.itersize:
+                return
+            after = self.key_of(rows[-1])
@@ -0,0 +1,74 @@
+from repositories import AddressRepository, PaymentRepository, RewardsRepository, UserRepository
+
+# session.py
+# The logged-in user of main.py's menus. login() loads the whole profile in one
+# query (UserRepository.profile): user, RenterID/AgentID, cards, addresses and
+# rewards membership. The menus read them from the session instead of querying
+# again.
+# - a menu that changes cards, addresses or membership calls invalidate() after
+#   it commits; the next read reloads that part on the menu's connection
+# - only this session's edits are seen: changes made by other processes (cli.py,
+#   api.py) show after the next login or invalidation
+
+
+class Session:
+    """Profile of the logged-in user, cached per part ("cards", "addresses", "rewards")."""
+
+    def __init__(self, profile):
+        self.user = profile.user
+        self._parts = {"cards": profile.cards, "addresses": profile.addresses, "rewards": profile.rewards}
+
+    @classmethod
+    def login(cls, conn, email):
+        """Session of the user with this email, or None if there is none."""
+        profile = UserRepository(conn).profile(email)
+        return None if profile is None else cls(profile)
+
+    @property
+    def user_id(self):
+        return str(self.user.user_id)
+
+    @property
+    def name(self):
+        return self.user.name
+
+    @property
+    def type(self):
+        return self.user.type
+
+    @property
+    def renter_id(self):
+        return None if self.user.renter_id is None else str(self.user.renter_id)
+
+    @property
+    def agent_id(self):
+        return None if self.user.agent_id is None else str(self.user.agent_id)
+
+    def _load(self, part, conn):
+        if part == "cards":
+            return PaymentRepository(conn).list_cards(self.renter_id) if self.renter_id else []
+        if part == "addresses":
+            return AddressRepository(conn).list_for_user(self.user_id)
+        return RewardsRepository(conn).membership(self.renter_id) if self.renter_id else None
+
+    def _get(self, part, conn):
+        if part not in self._parts:
+            self._parts[part] = self._load(part, conn)
+        return self._parts[part]
+
+    def cards(self, conn):
+        """The renter's cards (Card records); conn is only used after invalidate("cards")."""
+        return self._get("cards", conn)
+
+    def addresses(self, conn):
+        """The user's addresses (Location records)."""
+        return self._get("addresses", conn)
+
+    def rewards(self, conn):
+        """RewardsMembership, or None outside the rewards program."""
+        return self._get("rewards", conn)
+
+    def invalidate(self, *parts):
+        """Forget cached parts after an edit; all of them without arguments."""
+        for part in parts or list(self._parts):
+            self._parts.pop(part, None)
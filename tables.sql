@@ -1,3 +1,8 @@
+DROP VIEW IF EXISTS booking_totals;
+DROP TABLE IF EXISTS agent_daily_stats;
+DROP TABLE IF EXISTS property_monthly_stats;
+DROP TABLE IF EXISTS property_availability;
+DROP TABLE IF EXISTS property_search;
 DROP TABLE IF EXISTS booking;
 DROP TABLE IF EXISTS card;
 DROP TABLE IF EXISTS vacationHome;
@@ -10,8 +15,8 @@ DROP TABLE IF EXISTS school;
 DROP TABLE IF EXISTS user_x_address;
 DROP TABLE IF EXISTS rewards_member;
 DROP TABLE IF EXISTS renter;
-DROP TABLE IF EXISTS agent;
 DROP TABLE IF EXISTS property;
+DROP TABLE IF EXISTS agent;
 DROP TABLE IF EXISTS locations;
 DROP TABLE IF EXISTS users;
 